@@ -0,0 +1,65 @@
+from app import config
+from app.bundles import build_bundle
+from app.models.phi2_model import generate_game_logic
+from app.store import GAME_ID_LENGTH, logic_digest
+from app.templates.game_generator import generate_game_code, registry
+from app.templates.registry import UnknownGeneratorError
+
+
+def generate_logic(prompt):
+    """Game logic and its digest for a prompt, as a dict with "error" instead if it failed
+
+    Runs in pool worker processes, so failures come back as values rather
+    than exceptions that would abort the whole map.
+    """
+    try:
+        game_logic = generate_game_logic(prompt)
+    except Exception as e:
+        return {"prompt": prompt, "error": str(e)}
+    if not game_logic:
+        return {"prompt": prompt, "error": "Template selection failed"}
+    try:
+        registry.resolve(game_logic)
+    except UnknownGeneratorError as e:
+        return {"prompt": prompt, "error": str(e)}
+    return {"prompt": prompt, "game_logic": game_logic, "digest": logic_digest(game_logic)}
+
+
+def build_artifacts(game_logic, game_code=None):
+    """Build a game's bundle in one pool call; returns (game code, bundle code, encoded copies, bundle stats)
+
+    game_code is generated from the logic unless given (a code cache hit), and
+    is returned as generated so the caller can cache it.
+    """
+    if game_code is None:
+        game_code = generate_game_code(game_logic)
+    if not (config.BUNDLE_MINIFY or config.BUNDLE_PRECOMPRESS):
+        return game_code, game_code, None, None
+    bundle = build_bundle(game_code, config.BUNDLE_MINIFY, config.BUNDLE_PRECOMPRESS)
+    return game_code, bundle["code"], bundle["encoded"], bundle["stats"]
+
+
+def store_games(store, catalog, games):
+    """Write built games to the store and catalog in bulk; returns the number catalogued
+
+    games are dicts with prompt, digest, game_logic, code and encoded.
+    """
+    store.put_games(
+        [(game["digest"][:GAME_ID_LENGTH], game["game_logic"], game["code"], game["encoded"]) for game in games]
+    )
+    if catalog is None:
+        return 0
+    rows = []
+    for game in games:
+        game_id = game["digest"][:GAME_ID_LENGTH]
+        logic_bytes, bundle_bytes = store.artifact_sizes(game_id)
+        rows.append({
+            "game_id": game_id,
+            "digest": game["digest"],
+            "template": registry.key_for(game["game_logic"]),
+            "name": game["game_logic"].get("name"),
+            "prompt": game["prompt"],
+            "logic_bytes": logic_bytes,
+            "bundle_bytes": bundle_bytes,
+        })
+    return catalog.add_many(rows)
@@ -0,0 +1,170 @@
+import gzip
+import os
+import stat
+import time
+from mimetypes import guess_type
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.http_cache import IMMUTABLE_CACHE_CONTROL, etag_matches, strong_etag
+from app.minify import minify_js
+from app.store import ENCODING_SUFFIXES
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def encodings_available():
+    """Content encodings bundles can be precompressed with"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data, encoding):
+    if encoding == "gzip":
+        # mtime=0 keeps the output (and so its digest) stable across runs
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"Unsupported encoding {encoding!r}")
+
+
+def build_bundle(game_code, minify=True, precompress=True):
+    """Post-process generated game code into the bytes written to the store
+
+    Returns {"code", "encoded": {encoding: bytes}, "stats"}; stats has the byte
+    size at each step and the seconds spent post-processing. An encoding that
+    does not make the bundle smaller (tiny bundles) is left out, so the plain
+    file is served instead; its stats size is then the plain size.
+    """
+    started = time.perf_counter()
+    raw_bytes = len(game_code.encode("utf-8"))
+    if minify:
+        game_code = minify_js(game_code)
+    data = game_code.encode("utf-8")
+    encoded = {}
+    stats = {"raw_bytes": raw_bytes, "minified_bytes": len(data)}
+    if precompress:
+        for encoding in encodings_available():
+            body = compress(data, encoding)
+            if len(body) < len(data):
+                encoded[encoding] = body
+            stats[f"{encoding}_bytes"] = min(len(body), len(data))
+    stats["seconds"] = time.perf_counter() - started
+    return {"code": game_code, "encoded": encoded, "stats": stats}
+
+
+class BundleStats:
+    """Running totals of bundle sizes and post-processing time"""
+
+    def __init__(self):
+        self.bundles = 0
+        self.seconds = 0.0
+        self.bytes = {}
+
+    def record(self, stats):
+        self.bundles += 1
+        self.seconds += stats["seconds"]
+        for key, value in stats.items():
+            if key.endswith("_bytes"):
+                self.bytes[key] = self.bytes.get(key, 0) + value
+
+    def stats(self):
+        raw = self.bytes.get("raw_bytes", 0)
+        result = {
+            "bundles": self.bundles,
+            "postprocess_ms_avg": round(self.seconds * 1000 / self.bundles, 3) if self.bundles else None,
+        }
+        for key, value in sorted(self.bytes.items()):
+            result[key] = value
+            if key != "raw_bytes" and raw:
+                result[key.replace("_bytes", "_ratio")] = round(value / raw, 3)
+        return result
+
+
+def accepted_encodings(accept_encoding):
+    """Encodings with a non-zero q-value in an Accept-Encoding header"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves foo.js.br / foo.js.gz when the client accepts them
+
+    Files under immutable_prefixes (content-addressed names) are also sent with
+    a long-lived immutable Cache-Control header and a strong ETag taken from the
+    file name, so revalidation never needs a stat-based validator.
+    """
+
+    def __init__(self, *args, immutable_prefixes=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_prefixes = tuple(immutable_prefixes)
+
+    def is_immutable(self, full_path):
+        if not self.immutable_prefixes or self.directory is None:
+            return False
+        relative = os.path.relpath(full_path, os.path.realpath(self.directory)).replace(os.sep, "/")
+        return relative.startswith(self.immutable_prefixes)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=scope["method"])
+        if self.is_immutable(full_path):
+            # The name is the content digest; .gz/.br siblings get their own tag
+            response.headers["etag"] = strong_etag(os.path.basename(full_path))
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def is_not_modified(self, response_headers, request_headers):
+        if "if-none-match" in request_headers:
+            return etag_matches(request_headers["if-none-match"], response_headers.get("etag"))
+        return super().is_not_modified(response_headers, request_headers)
+
+    async def get_response(self, path, scope):
+        if scope["method"] in ("GET", "HEAD") and not path.endswith(tuple(ENCODING_SUFFIXES.values())):
+            accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+            for encoding in ("br", "gzip"):
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(
+                    self.lookup_path, path + ENCODING_SUFFIXES[encoding]
+                )
+                if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                    continue
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["vary"] = "Accept-Encoding"
+                if response.status_code != 304:
+                    # Served as the original file, just encoded
+                    response.headers["content-type"] = self.media_type(path)
+                    response.headers["content-encoding"] = encoding
+                return response
+        response = await super().get_response(path, scope)
+        if path.endswith(".js"):
+            response.headers["vary"] = "Accept-Encoding"
+        return response
+
+    @staticmethod
+    def media_type(path):
+        media_type, _ = guess_type(path)
+        if media_type is None:
+            return "application/octet-stream"
+        if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+            return f"{media_type}; charset=utf-8"
+        return media_type
@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app import config
+from app.models import phi2_model
+from app.store import canonical_json, logic_digest
+from app.templates import game_generator
+
+_MISSING = object()
+
+
+def normalize_prompt(prompt):
+    """Normalize a prompt for cache keys: lowercase and collapse whitespace"""
+    return " ".join(prompt.lower().split())
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a size bound and a TTL"""
+
+    def __init__(self, max_entries=1024, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = self.clock() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteCache:
+    """Persistent cache tier storing JSON-serializable values in SQLite"""
+
+    def __init__(self, path, namespace, ttl=None, clock=time.time):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= self.clock()):
+                self.misses += 1
+                return default
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        expires_at = self.clock() + self.ttl if self.ttl else None
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def stats(self):
+        return {"path": self.path, "hits": self.hits, "misses": self.misses}
+
+
+class TieredCache:
+    """Memory tier in front of an optional persistent tier"""
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key, default=None):
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key, _MISSING)
+            if value is not _MISSING:
+                # Promote to the memory tier for subsequent hits
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+def templates_fingerprint():
+    """Fingerprint GAME_TEMPLATES and the code generator templates"""
+    h = hashlib.sha256(canonical_json(phi2_model.GAME_TEMPLATES).encode("utf-8"))
+    paths = [phi2_model.__file__, game_generator.__file__]
+    names = sorted(game_generator.TEMPLATE_FILES.values()) + [game_generator.RUNTIME_FILE, game_generator.GAME_FILE]
+    paths += [os.path.join(game_generator.TEMPLATE_DIR, name) for name in names]
+    for path in paths:
+        try:
+            st = os.stat(path)
+            h.update(f"{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}".encode("utf-8"))
+        except OSError:
+            pass
+    return h.hexdigest()[:16]
+
+
+class GenerationCache:
+    """Caches prompt -> game logic and logic digest -> game code"""
+
+    def __init__(self, max_entries=1024, ttl=None, disk_path="", disk_ttl=None,
+                 fingerprint=templates_fingerprint, check_seconds=0.0, clock=time.monotonic):
+        self.fingerprint = fingerprint
+        self.version = fingerprint()
+        # check_templates fingerprints the templates at most every check_seconds
+        self.check_seconds = check_seconds
+        self.clock = clock
+        self._checked_at = clock()
+        # A persistent tier means lookups touch SQLite and should run off the event loop
+        self.persistent = bool(disk_path)
+        self.invalidations = 0
+        self._callbacks = []
+        self.logic = TieredCache(
+            LRUCache(max_entries, ttl),
+            SQLiteCache(disk_path, "logic", disk_ttl) if disk_path else None,
+        )
+        self.code = TieredCache(
+            LRUCache(max_entries, ttl),
+            SQLiteCache(disk_path, "code", disk_ttl) if disk_path else None,
+        )
+
+    def _key(self, key):
+        # Keys carry the template version so stale disk entries are never read back
+        return f"{self.version}:{key}"
+
+    def on_invalidate(self, callback):
+        """Register a callback fired after the cache is invalidated"""
+        self._callbacks.append(callback)
+        return callback
+
+    def invalidate(self):
+        """Drop every cached entry and notify registered callbacks"""
+        self.logic.clear()
+        self.code.clear()
+        self.invalidations += 1
+        for callback in self._callbacks:
+            callback()
+
+    def template_check_due(self):
+        """True once check_seconds have passed since the templates were last fingerprinted"""
+        return self.clock() - self._checked_at >= self.check_seconds
+
+    def check_templates(self):
+        """Invalidate the cache if GAME_TEMPLATES or generator templates changed
+
+        Returns False without looking at the templates until a check is due.
+        """
+        if not self.template_check_due():
+            return False
+        self._checked_at = self.clock()
+        version = self.fingerprint()
+        if version != self.version:
+            self.version = version
+            self.invalidate()
+            return True
+        return False
+
+    def get_logic(self, prompt):
+        """Return (game_logic, digest) for a prompt, or None on a miss"""
+        entry = self.logic.get(self._key(normalize_prompt(prompt)))
+        if entry is None:
+            return None
+        return entry["game_logic"], entry["digest"]
+
+    def put_logic(self, prompt, game_logic, digest=None):
+        digest = digest or logic_digest(game_logic)
+        self.logic.set(self._key(normalize_prompt(prompt)), {"game_logic": game_logic, "digest": digest})
+        return digest
+
+    def get_code(self, digest):
+        return self.code.get(self._key(digest))
+
+    def put_code(self, digest, game_code):
+        self.code.set(self._key(digest), game_code)
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "invalidations": self.invalidations,
+            "logic": self.logic.stats(),
+            "code": self.code.stats(),
+        }
+
+
+class NullGenerationCache(GenerationCache):
+    """Generation cache that never stores anything (AI2D_CACHE_ENABLED=0)"""
+
+    def __init__(self):
+        super().__init__(max_entries=0, fingerprint=lambda: "disabled")
+
+    def get_logic(self, prompt):
+        return None
+
+    def put_logic(self, prompt, game_logic, digest=None):
+        return digest or logic_digest(game_logic)
+
+    def get_code(self, digest):
+        return None
+
+    def put_code(self, digest, game_code):
+        pass
+
+
+def create_generation_cache():
+    """Build the generation cache from AI2D_CACHE_* settings"""
+    if not config.CACHE_ENABLED:
+        return NullGenerationCache()
+    return GenerationCache(
+        max_entries=config.CACHE_MAX_ENTRIES,
+        ttl=config.CACHE_TTL_SECONDS,
+        disk_path=config.CACHE_DISK_PATH,
+        disk_ttl=config.CACHE_DISK_TTL_SECONDS,
+        check_seconds=config.CACHE_TEMPLATE_CHECK_SECONDS,
+    )
@@ -0,0 +1,350 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from app import config
+from app.store import logic_digest
+
+# Sort orders for GameCatalog.list: column walked by the index, newest/most played first
+SORTS = {"recent": "created_at", "popular": "hits"}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS games ("
+    " game_id TEXT PRIMARY KEY,"
+    " digest TEXT NOT NULL,"
+    " template TEXT,"
+    " name TEXT,"
+    " prompt TEXT,"
+    " logic_bytes INTEGER NOT NULL DEFAULT 0,"
+    " bundle_bytes INTEGER NOT NULL DEFAULT 0,"
+    " created_at REAL NOT NULL,"
+    " last_accessed REAL,"
+    " hits INTEGER NOT NULL DEFAULT 0)",
+    # Every list query walks one of these instead of scanning the table
+    "CREATE INDEX IF NOT EXISTS games_created ON games (created_at, game_id)",
+    "CREATE INDEX IF NOT EXISTS games_template_created ON games (template, created_at, game_id)",
+    "CREATE INDEX IF NOT EXISTS games_hits ON games (hits, game_id)",
+    "CREATE INDEX IF NOT EXISTS games_template_hits ON games (template, hits, game_id)",
+    "CREATE INDEX IF NOT EXISTS games_last_accessed ON games (last_accessed)",
+    "CREATE INDEX IF NOT EXISTS games_digest ON games (digest)",
+    # Full-text index over names and prompts for list(query=...), kept in step by triggers
+    "CREATE VIRTUAL TABLE IF NOT EXISTS games_fts USING fts5(name, prompt, content='games')",
+    "CREATE TRIGGER IF NOT EXISTS games_fts_insert AFTER INSERT ON games BEGIN"
+    " INSERT INTO games_fts (rowid, name, prompt) VALUES (NEW.rowid, NEW.name, NEW.prompt); END",
+    "CREATE TRIGGER IF NOT EXISTS games_fts_delete AFTER DELETE ON games BEGIN"
+    " INSERT INTO games_fts (games_fts, rowid, name, prompt) VALUES ('delete', OLD.rowid, OLD.name, OLD.prompt);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS games_fts_update AFTER UPDATE OF name, prompt ON games BEGIN"
+    " INSERT INTO games_fts (games_fts, rowid, name, prompt) VALUES ('delete', OLD.rowid, OLD.name, OLD.prompt);"
+    " INSERT INTO games_fts (rowid, name, prompt) VALUES (NEW.rowid, NEW.name, NEW.prompt); END",
+    # Running totals, so stats never count millions of rows
+    "CREATE TABLE IF NOT EXISTS totals ("
+    " id INTEGER PRIMARY KEY CHECK (id = 1),"
+    " games INTEGER NOT NULL,"
+    " logic_bytes INTEGER NOT NULL,"
+    " bundle_bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO totals (id, games, logic_bytes, bundle_bytes)"
+    " SELECT 1, COUNT(*), COALESCE(SUM(logic_bytes), 0), COALESCE(SUM(bundle_bytes), 0) FROM games",
+    "CREATE TRIGGER IF NOT EXISTS games_insert AFTER INSERT ON games BEGIN"
+    " UPDATE totals SET games = games + 1, logic_bytes = logic_bytes + NEW.logic_bytes,"
+    " bundle_bytes = bundle_bytes + NEW.bundle_bytes WHERE id = 1; END",
+    "CREATE TRIGGER IF NOT EXISTS games_delete AFTER DELETE ON games BEGIN"
+    " UPDATE totals SET games = games - 1, logic_bytes = logic_bytes - OLD.logic_bytes,"
+    " bundle_bytes = bundle_bytes - OLD.bundle_bytes WHERE id = 1; END",
+)
+
+_COLUMNS = ("game_id", "digest", "template", "name", "prompt", "logic_bytes", "bundle_bytes",
+            "created_at", "last_accessed", "hits")
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a pagination cursor GameCatalog.list did not produce"""
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _match_expression(query):
+    """FTS5 query matching every word of a search as a prefix, or None if it has no words"""
+    words = _WORD_RE.findall(query.lower())
+    return " ".join(f'"{word}"*' for word in words) if words else None
+
+
+class GameCatalog:
+    """SQLite (WAL) index of stored games: metadata, sizes and popularity
+
+    Lookups by game id are primary key reads, listings walk an index and
+    searches go through a full-text index, so all stay O(log n) however many
+    games are stored. Hits are counted in memory and written in batches every
+    flush_seconds, so reads may lag behind the latest plays by that much.
+    """
+
+    def __init__(self, path, flush_seconds=5.0, clock=time.time):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending_hits = {}
+        self._last_flush = clock()
+        self.lookups = 0
+        self.misses = 0
+        self.flushes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        indexed = self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'games_fts'").fetchone()
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        if indexed is None:
+            # Catalogs created before the full-text index: index the games already in them
+            self._conn.execute("INSERT INTO games_fts (games_fts) VALUES ('rebuild')")
+
+    def add(self, game_id, digest, template=None, name=None, prompt=None, logic_bytes=0, bundle_bytes=0,
+            created_at=None):
+        """Record a stored game; returns False if it was already catalogued"""
+        with self._lock:
+            created_at = created_at if created_at is not None else self.clock()
+            # last_accessed starts at created_at so least-recently-used scans can walk its index
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO games (game_id, digest, template, name, prompt, logic_bytes,"
+                " bundle_bytes, created_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (game_id, digest, template, name, prompt, logic_bytes, bundle_bytes, created_at, created_at),
+            )
+            return cursor.rowcount == 1
+
+    def add_many(self, games):
+        """Record many stored games (dicts of add's arguments) in one transaction; returns the number added"""
+        now = self.clock()
+        rows = []
+        for game in games:
+            created_at = game.get("created_at") or now
+            rows.append((game["game_id"], game["digest"], game.get("template"), game.get("name"),
+                         game.get("prompt"), game.get("logic_bytes", 0), game.get("bundle_bytes", 0),
+                         created_at, created_at))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # Counted through the totals row, which the insert trigger keeps up to date
+                before = self._conn.execute("SELECT games FROM totals").fetchone()[0]
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO games (game_id, digest, template, name, prompt, logic_bytes,"
+                    " bundle_bytes, created_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                added = self._conn.execute("SELECT games FROM totals").fetchone()[0] - before
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def get(self, game_id):
+        """Return the catalog record of a game as a dict, or None"""
+        self._flush_if_due()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM games WHERE game_id = ?", (game_id,)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row is not None else None
+
+    def touch(self, game_id):
+        """Count a play of a game; returns False if the game is not catalogued"""
+        now = self.clock()
+        with self._lock:
+            self.lookups += 1
+            found = self._conn.execute("SELECT 1 FROM games WHERE game_id = ?", (game_id,)).fetchone()
+            if found is None:
+                self.misses += 1
+                return False
+            self._pending_hits[game_id] = self._pending_hits.get(game_id, 0) + 1
+        self._flush_if_due(now)
+        return True
+
+    def _flush_if_due(self, now=None):
+        now = now if now is not None else self.clock()
+        if now - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write counted hits and access times to the database"""
+        now = self.clock()
+        with self._lock:
+            self._last_flush = now
+            if not self._pending_hits:
+                return 0
+            pending, self._pending_hits = self._pending_hits, {}
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "UPDATE games SET hits = hits + ?, last_accessed = ? WHERE game_id = ?",
+                    [(hits, now, game_id) for game_id, hits in pending.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.flushes += 1
+            return len(pending)
+
+    def list(self, query="", template="", sort="recent", limit=20, cursor=""):
+        """Return (games, next_cursor) for one page, newest or most played first
+
+        Pages are keyset-paginated: pass the returned cursor to get the next
+        page (None when there are no more). query matches games whose name or
+        prompt has words starting with each of its words ("snak" finds "Snake
+        Game"); template filters by generator key.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort {sort!r} (expected one of: {', '.join(SORTS)})")
+        column = SORTS[sort]
+        where, params = [], []
+        if template:
+            where.append("template = ?")
+            params.append(template)
+        if query:
+            match = _match_expression(query)
+            if match is None:
+                return [], None
+            where.append("rowid IN (SELECT rowid FROM games_fts WHERE games_fts MATCH ?)")
+            params.append(match)
+        if cursor:
+            value, _, game_id = cursor.partition(":")
+            try:
+                value = float(value) if column == "created_at" else int(value)
+            except ValueError:
+                raise InvalidCursorError(f"Invalid cursor {cursor!r}") from None
+            if not game_id:
+                raise InvalidCursorError(f"Invalid cursor {cursor!r}")
+            where.append(f"({column}, game_id) < (?, ?)")
+            params += [value, game_id]
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM games"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {column} DESC, game_id DESC LIMIT ?"
+        params.append(limit + 1)
+        self._flush_if_due()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        games = [dict(zip(_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = games[-1]
+            next_cursor = f"{last[column]!r}:{last['game_id']}"
+        return games, next_cursor
+
+    def oldest(self, before, limit):
+        """(game_id, bytes) of up to limit games created before a timestamp, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT game_id, logic_bytes + bundle_bytes FROM games WHERE created_at < ?"
+                " ORDER BY created_at LIMIT ?", (before, limit)
+            ).fetchall()
+
+    def least_recent(self, limit, before=None):
+        """(game_id, bytes) of up to limit games, least recently played first
+
+        before, if given, only returns games not played since that timestamp.
+        """
+        # Called once per eviction batch, which must not evict a game just played
+        self.flush()
+        sql = "SELECT game_id, logic_bytes + bundle_bytes FROM games"
+        params = []
+        if before is not None:
+            sql += " WHERE last_accessed < ?"
+            params.append(before)
+        sql += " ORDER BY last_accessed LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def ids_after(self, game_id, limit):
+        """Up to limit game ids greater than game_id, in id order (for incremental scans)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT game_id FROM games WHERE game_id > ? ORDER BY game_id LIMIT ?", (game_id, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def remove(self, game_ids):
+        """Delete games from the catalog; returns the number removed"""
+        with self._lock:
+            for game_id in game_ids:
+                self._pending_hits.pop(game_id, None)
+            self._conn.execute("BEGIN")
+            try:
+                removed = sum(
+                    self._conn.execute("DELETE FROM games WHERE game_id = ?", (game_id,)).rowcount
+                    for game_id in game_ids
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return removed
+
+    def import_game(self, store, game_id, template_for=None):
+        """Catalogue one game already in the store; returns False if it is not added"""
+        try:
+            game_logic = store.load_logic(game_id)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Skipping {game_id} in catalog import: {e}")
+            return False
+        if game_logic is None:
+            return False
+        logic_bytes, bundle_bytes = store.artifact_sizes(game_id)
+        return self.add(
+            game_id,
+            logic_digest(game_logic),
+            template=template_for(game_logic) if template_for else None,
+            name=game_logic.get("name"),
+            logic_bytes=logic_bytes,
+            bundle_bytes=bundle_bytes,
+            created_at=store.created_time(game_id),
+        )
+
+    def import_store(self, store, template_for=None):
+        """Catalogue games already in the store (logic plus bundle); returns the number added"""
+        added = 0
+        for game_id in store.logic_ids():
+            if store.has_bundle(game_id):
+                added += self.import_game(store, game_id, template_for)
+        return added
+
+    def totals(self):
+        """Return (games, logic_bytes, bundle_bytes) across the catalog"""
+        with self._lock:
+            return self._conn.execute("SELECT games, logic_bytes, bundle_bytes FROM totals").fetchone()
+
+    def __len__(self):
+        return self.totals()[0]
+
+    def stats(self):
+        games, logic_bytes, bundle_bytes = self.totals()
+        return {
+            "path": self.path,
+            "games": games,
+            "logic_bytes": logic_bytes,
+            "bundle_bytes": bundle_bytes,
+            "lookups": self.lookups,
+            "misses": self.misses,
+            "pending_hits": sum(self._pending_hits.values()),
+            "flushes": self.flushes,
+        }
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+def create_game_catalog():
+    """Open the game catalog at AI2D_CATALOG_PATH, or None if it is disabled"""
+    if not config.CATALOG_PATH:
+        return None
+    return GameCatalog(config.CATALOG_PATH, flush_seconds=config.CATALOG_HIT_FLUSH_SECONDS)
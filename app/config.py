@@ -0,0 +1,149 @@
+import os
+
+# Runtime configuration, read once from AI2D_* environment variables
+
+
+def _env_str(name, default):
+    return os.environ.get(name, default)
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Generation cache
+CACHE_ENABLED = _env_bool("AI2D_CACHE_ENABLED", True)
+CACHE_MAX_ENTRIES = _env_int("AI2D_CACHE_MAX_ENTRIES", 1024)
+CACHE_TTL_SECONDS = _env_float("AI2D_CACHE_TTL_SECONDS", 3600.0)
+# Path of the persistent SQLite tier; empty disables it
+CACHE_DISK_PATH = _env_str("AI2D_CACHE_DISK_PATH", "")
+CACHE_DISK_TTL_SECONDS = _env_float("AI2D_CACHE_DISK_TTL_SECONDS", 7 * 24 * 3600.0)
+# Cached entries are dropped when the game templates change; the template files
+# are fingerprinted at most every TEMPLATE_CHECK_SECONDS
+CACHE_TEMPLATE_CHECK_SECONDS = _env_float("AI2D_CACHE_TEMPLATE_CHECK_SECONDS", 2.0)
+# In-memory hot set of parsed game logic served by /play and /game-logic
+# (0 entries disables it); entries are re-checked against the file's mtime at
+# most every CHECK_SECONDS
+LOGIC_HOT_SET_ENTRIES = _env_int("AI2D_LOGIC_HOT_SET_ENTRIES", 1024)
+LOGIC_HOT_SET_MAX_BYTES = _env_int("AI2D_LOGIC_HOT_SET_MAX_BYTES", 32 * 1024 * 1024)
+LOGIC_HOT_SET_CHECK_SECONDS = _env_float("AI2D_LOGIC_HOT_SET_CHECK_SECONDS", 1.0)
+# SQLite catalog of stored games backing /play, /game-logic and /games ("" disables
+# it and falls back to checking the store's files); hit counts are written in
+# batches every HIT_FLUSH_SECONDS
+CATALOG_PATH = _env_str("AI2D_CATALOG_PATH", "catalog.db")
+CATALOG_HIT_FLUSH_SECONDS = _env_float("AI2D_CATALOG_HIT_FLUSH_SECONDS", 5.0)
+# Background garbage collection of stored games, every INTERVAL_SECONDS in
+# batches of BATCH_SIZE. MAX_BYTES evicts least recently played games until the
+# store fits, MAX_AGE_SECONDS removes games by creation time and
+# MAX_IDLE_SECONDS by last play (0 disables each; they need the catalog).
+# Half-written games and temp files older than ORPHAN_GRACE_SECONDS are removed
+GC_ENABLED = _env_bool("AI2D_GC_ENABLED", True)
+GC_INTERVAL_SECONDS = _env_float("AI2D_GC_INTERVAL_SECONDS", 600.0)
+GC_BATCH_SIZE = _env_int("AI2D_GC_BATCH_SIZE", 200)
+GC_MAX_BYTES = _env_int("AI2D_GC_MAX_BYTES", 0)
+GC_MAX_AGE_SECONDS = _env_float("AI2D_GC_MAX_AGE_SECONDS", 0.0)
+GC_MAX_IDLE_SECONDS = _env_float("AI2D_GC_MAX_IDLE_SECONDS", 0.0)
+GC_ORPHAN_GRACE_SECONDS = _env_float("AI2D_GC_ORPHAN_GRACE_SECONDS", 3600.0)
+# Artifact files are fanned out into DEPTH levels of WIDTH hex digit directories
+# (games/ab/cd/<id>.js); 0 keeps the flat layout. python -m app.migrate_store
+# moves existing flat files
+STORE_SHARD_DEPTH = _env_int("AI2D_STORE_SHARD_DEPTH", 2)
+STORE_SHARD_WIDTH = _env_int("AI2D_STORE_SHARD_WIDTH", 2)
+# "files" stores one file per artifact; "packed" appends them to segment files
+# in STORE_SEGMENT_DIR (rotated at MAX_BYTES, compacted once COMPACT_RATIO of a
+# segment is deleted records), served from memory maps
+STORE_BACKEND = _env_str("AI2D_STORE_BACKEND", "files")
+STORE_SEGMENT_DIR = _env_str("AI2D_STORE_SEGMENT_DIR", "segments")
+STORE_SEGMENT_MAX_BYTES = _env_int("AI2D_STORE_SEGMENT_MAX_BYTES", 64 * 1024 * 1024)
+STORE_SEGMENT_COMPACT_RATIO = _env_float("AI2D_STORE_SEGMENT_COMPACT_RATIO", 0.5)
+# Directory for compiled Phaser template bytecode ("" keeps it in memory only)
+TEMPLATE_BYTECODE_CACHE_DIR = _env_str("AI2D_TEMPLATE_BYTECODE_CACHE_DIR", "template_cache")
+
+# Bundle post-processing: minify generated JS and write .gz (and .br, if the
+# brotli package is installed) siblings served by Accept-Encoding
+BUNDLE_MINIFY = _env_bool("AI2D_BUNDLE_MINIFY", True)
+BUNDLE_PRECOMPRESS = _env_bool("AI2D_BUNDLE_PRECOMPRESS", True)
+# Seconds browsers may reuse a /play page before revalidating it with its ETag
+# (game bundles and logic are content-addressed and cached as immutable)
+HTTP_PLAY_MAX_AGE = _env_int("AI2D_HTTP_PLAY_MAX_AGE", 300)
+
+# Executors for blocking work: a thread pool for file/SQLite I/O and a
+# process (or thread) pool for CPU-bound inference and code generation
+EXECUTOR_IO_WORKERS = _env_int("AI2D_EXECUTOR_IO_WORKERS", 8)
+EXECUTOR_CPU_WORKERS = _env_int("AI2D_EXECUTOR_CPU_WORKERS", min(4, os.cpu_count() or 1))
+EXECUTOR_CPU_KIND = _env_str("AI2D_EXECUTOR_CPU_KIND", "process")  # "process" or "thread"
+# Maximum number of generations running at once; further requests wait without blocking the loop
+GENERATION_CONCURRENCY = _env_int("AI2D_GENERATION_CONCURRENCY", EXECUTOR_CPU_WORKERS * 2)
+
+# POST /generate/batch: most prompts per request, and prompts generated
+# together before their new games are written to the store in one bulk write
+BATCH_MAX_PROMPTS = _env_int("AI2D_BATCH_MAX_PROMPTS", 5000)
+BATCH_CHUNK_SIZE = _env_int("AI2D_BATCH_CHUNK_SIZE", 64)
+
+# Generation job queue
+JOB_WORKERS = _env_int("AI2D_JOB_WORKERS", 2)
+JOB_QUEUE_DEPTH = _env_int("AI2D_JOB_QUEUE_DEPTH", 100)
+JOB_TIMEOUT_SECONDS = _env_float("AI2D_JOB_TIMEOUT_SECONDS", 120.0)
+# Finished jobs kept around for status polling
+JOB_RETENTION = _env_int("AI2D_JOB_RETENTION", 1000)
+
+# Phi-2 inference engine; the template path is used when disabled or on failure
+MODEL_ENABLED = _env_bool("AI2D_MODEL_ENABLED", False)
+MODEL_NAME = _env_str("AI2D_MODEL_NAME", "microsoft/phi-2")
+MODEL_DTYPE = _env_str("AI2D_MODEL_DTYPE", "float32")  # float32, bfloat16 or float16
+MODEL_DEVICE = _env_str("AI2D_MODEL_DEVICE", "cpu")
+# "int8" applies dynamic int8 quantization to Linear layers (CPU, float32 only);
+# quantized weights are cached on disk so later startups skip re-quantizing
+MODEL_QUANTIZE = _env_str("AI2D_MODEL_QUANTIZE", "none")
+MODEL_QUANTIZED_CACHE_DIR = _env_str("AI2D_MODEL_QUANTIZED_CACHE_DIR", "model_cache")
+# torch.set_num_threads value; 0 keeps the torch default
+MODEL_NUM_THREADS = _env_int("AI2D_MODEL_NUM_THREADS", 0)
+MODEL_TRUST_REMOTE_CODE = _env_bool("AI2D_MODEL_TRUST_REMOTE_CODE", True)
+MODEL_MAX_NEW_TOKENS = _env_int("AI2D_MODEL_MAX_NEW_TOKENS", 256)
+# Prompts matching a template with at least this keyword confidence (0-1) skip
+# the model and use the template directly (0 always asks the model)
+TEMPLATE_MIN_CONFIDENCE = _env_float("AI2D_TEMPLATE_MIN_CONFIDENCE", 0.0)
+# Few-shot examples retrieved from phi2.json per prompt (0 disables)
+MODEL_FEW_SHOT_K = _env_int("AI2D_MODEL_FEW_SHOT_K", 2)
+MODEL_FEW_SHOT_PATH = _env_str("AI2D_MODEL_FEW_SHOT_PATH", "app/templates/html/phi2.json")
+# How often (seconds) the examples file is checked for changes
+MODEL_FEW_SHOT_CHECK_SECONDS = _env_float("AI2D_MODEL_FEW_SHOT_CHECK_SECONDS", 5.0)
+# Mask logits so the model can only emit JSON matching the game logic schema
+MODEL_CONSTRAINED_DECODING = _env_bool("AI2D_MODEL_CONSTRAINED_DECODING", True)
+# past_key_values kept for shared instruction/few-shot prefixes (0 disables reuse);
+# each Phi-2 entry costs roughly 0.6 MB per prefix token in fp32
+MODEL_PREFIX_CACHE_ENTRIES = _env_int("AI2D_MODEL_PREFIX_CACHE_ENTRIES", 4)
+# Load the model on FastAPI startup instead of on the first request
+MODEL_WARMUP = _env_bool("AI2D_MODEL_WARMUP", False)
+
+# Dynamic micro-batching: prompts arriving within the wait window (or up to the
+# batch size) are padded and decoded together in one generate call
+MODEL_BATCHING = _env_bool("AI2D_MODEL_BATCHING", False)
+MODEL_BATCH_SIZE = _env_int("AI2D_MODEL_BATCH_SIZE", 8)
+MODEL_BATCH_WAIT_MS = _env_float("AI2D_MODEL_BATCH_WAIT_MS", 20.0)
+MODEL_BATCH_QUEUE = _env_int("AI2D_MODEL_BATCH_QUEUE", 256)
+
+# In-process threads running inference against the shared engine; with batching
+# enough threads must wait on the batcher at once to fill a batch
+MODEL_WORKERS = _env_int("AI2D_MODEL_WORKERS", MODEL_BATCH_SIZE if MODEL_BATCHING else 1)
+
+# Dedicated model server (python -m app.models.server). When the socket is set,
+# HTTP workers send inference to it instead of loading their own model copy
+MODEL_SERVER_SOCKET = _env_str("AI2D_MODEL_SERVER_SOCKET", "")
+MODEL_SERVER_REPLICAS = _env_int("AI2D_MODEL_SERVER_REPLICAS", 1)
+# Shared secret for the socket (the protocol unpickles requests). When empty the
+# server generates a random key into "<socket>.key" (mode 0600) and clients read it
+MODEL_SERVER_AUTHKEY = _env_str("AI2D_MODEL_SERVER_AUTHKEY", "")
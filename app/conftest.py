@@ -0,0 +1,16 @@
+import pytest
+
+
+class Clock:
+    """Manually advanced time source for components taking a clock argument"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
@@ -0,0 +1,240 @@
+import asyncio
+import os
+import time
+
+from app import config
+from app.store import iter_files, split_artifact_name
+
+# Policies in the order they run; each evicts whole games through the catalog
+POLICIES = ("max_age", "max_idle", "max_bytes")
+
+
+class ArtifactCollector:
+    """Background garbage collection of stored games
+
+    Each run applies the eviction policies through the catalog: games older
+    than max_age, games not played for max_idle seconds, then the least
+    recently played games until the store is within max_bytes (0 disables a
+    policy). It then sweeps the store for orphans: half-written games (logic
+    without a bundle or the reverse) and stale temp files older than
+    orphan_grace, and catalog rows whose files are gone, and finally lets the
+    store compact space freed by deletes (packed segments). Work is done
+    batch_size games at a time on the I/O executor, yielding to the event loop
+    between batches, so a large sweep never stalls request handling.
+    """
+
+    def __init__(self, store, catalog, executors, max_bytes=0, max_age=0, max_idle=0, orphan_grace=3600,
+                 interval=600, batch_size=200, pause=0.01, template_for=None, clock=time.time):
+        self.store = store
+        self.catalog = catalog
+        self.executors = executors
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_idle = max_idle
+        self.orphan_grace = orphan_grace
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        # Used to catalogue complete games found on disk but missing from the catalog
+        self.template_for = template_for
+        self.clock = clock
+        self._task = None
+        self.running = False
+        self.runs = 0
+        self.removed = dict.fromkeys(POLICIES + ("orphans",), 0)
+        self.bytes_reclaimed = 0
+        self.seconds = 0.0
+        self.last_run = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.collect()
+            except Exception as e:
+                print(f"Artifact GC failed: {e}")
+
+    async def collect(self):
+        """Run every policy and the orphan sweep once; returns the run's report"""
+        self.running = True
+        started = time.perf_counter()
+        report = {"removed": dict.fromkeys(self.removed, 0), "bytes_reclaimed": 0, "batches": 0}
+        try:
+            if self.catalog is not None:
+                for policy in POLICIES:
+                    while True:
+                        removed, freed = await self.executors.run_io(self._evict_batch, policy)
+                        self._record(report, policy, removed, freed)
+                        if removed < self.batch_size:
+                            break
+                        await asyncio.sleep(self.pause)
+            sweep = self._sweep()
+            while True:
+                removed, freed, done = await self.executors.run_io(self._sweep_batch, sweep)
+                self._record(report, "orphans", removed, freed)
+                if done:
+                    break
+                await asyncio.sleep(self.pause)
+            # One segment per call, so compaction is batched like everything else
+            while True:
+                reclaimed = await self.executors.run_io(self.store.compact)
+                if reclaimed is None:
+                    break
+                report["compacted_bytes"] = report.get("compacted_bytes", 0) + reclaimed
+                await asyncio.sleep(self.pause)
+        finally:
+            self.running = False
+            report["seconds"] = round(time.perf_counter() - started, 3)
+            self.runs += 1
+            self.seconds += report["seconds"]
+            self.last_run = report
+        total = sum(report["removed"].values())
+        if total:
+            print(f"Artifact GC removed {total} games, reclaimed {report['bytes_reclaimed']} bytes "
+                  f"in {report['seconds']:.3f} s")
+        return report
+
+    def _record(self, report, policy, removed, freed):
+        report["batches"] += 1
+        report["removed"][policy] += removed
+        report["bytes_reclaimed"] += freed
+        self.removed[policy] += removed
+        self.bytes_reclaimed += freed
+
+    def _remove(self, game_ids):
+        # Catalog first, so lookups 404 before the files disappear
+        if self.catalog is not None:
+            self.catalog.remove(game_ids)
+        return sum(self.store.delete_game(game_id) for game_id in game_ids)
+
+    def _evict_batch(self, policy):
+        """Remove up to batch_size games for one policy; returns (removed, bytes freed)"""
+        now = self.clock()
+        if policy == "max_age" and self.max_age:
+            candidates = self.catalog.oldest(now - self.max_age, self.batch_size)
+        elif policy == "max_idle" and self.max_idle:
+            candidates = self.catalog.least_recent(self.batch_size, before=now - self.max_idle)
+        elif policy == "max_bytes" and self.max_bytes:
+            _, logic_bytes, bundle_bytes = self.catalog.totals()
+            excess = logic_bytes + bundle_bytes - self.max_bytes
+            candidates = []
+            for game_id, size in self.catalog.least_recent(self.batch_size) if excess > 0 else ():
+                candidates.append((game_id, size))
+                excess -= size
+                if excess <= 0:
+                    break
+        else:
+            return 0, 0
+        game_ids = [game_id for game_id, _ in candidates]
+        return len(game_ids), self._remove(game_ids)
+
+    def _sweep_batch(self, sweep):
+        """Advance the orphan sweep by batch_size checks; returns (removed, bytes freed, done)"""
+        removed = freed = 0
+        for _ in range(self.batch_size):
+            try:
+                count, size = next(sweep)
+            except StopIteration:
+                return removed, freed, True
+            removed += count
+            freed += size
+        return removed, freed, False
+
+    def _sweep(self):
+        """Generator checking one file or catalog row per step, yielding (removed, bytes freed)"""
+        cutoff = self.clock() - self.orphan_grace
+        for directory in dict.fromkeys((self.store.logic_dir, self.store.games_dir)):
+            for entry in iter_files(directory):
+                yield self._check_file(entry, cutoff)
+        segments = getattr(self.store, "segments", None)
+        if segments is not None:
+            # Packed store: no files per game, so check each stored key instead
+            for key in segments.keys():
+                yield self._check_key(segments, key, cutoff)
+        if self.catalog is None:
+            return
+        after = ""
+        while True:
+            game_ids = self.catalog.ids_after(after, self.batch_size)
+            if not game_ids:
+                return
+            for game_id in game_ids:
+                # Catalogued games always had both files; one missing means it was deleted by hand
+                yield (1, self._remove([game_id])) if not self.store.has_game(game_id) else (0, 0)
+            after = game_ids[-1]
+
+    def _check_file(self, entry, cutoff):
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                return 0, 0
+        except FileNotFoundError:
+            return 0, 0
+        if entry.name.startswith(".tmp-"):
+            # Left behind by a write that crashed before its rename
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+                return 0, size
+            except FileNotFoundError:
+                return 0, 0
+        parts = split_artifact_name(entry.name)
+        if parts is None:
+            return 0, 0
+        game_id = parts[0]
+        if not self.store.has_game(game_id):
+            return 1, self._remove([game_id])
+        if (self.catalog is not None and entry.name.endswith(".json")
+                and self.catalog.get(game_id) is None):
+            # Complete but uncatalogued: catalogue it so the policies can see it
+            self.catalog.import_game(self.store, game_id, self.template_for)
+        return 0, 0
+
+    def _check_key(self, segments, key, cutoff):
+        parts = split_artifact_name(key)
+        written = segments.written_at(key)
+        if parts is None or written is None or written >= cutoff or self.store.has_game(parts[0]):
+            return 0, 0
+        return 1, self._remove([parts[0]])
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "policies": {
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                "max_idle": self.max_idle,
+                "orphan_grace": self.orphan_grace,
+            },
+            "removed": dict(self.removed),
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "seconds": round(self.seconds, 3),
+            "last_run": self.last_run,
+        }
+
+
+def create_artifact_collector(store, catalog, executors, template_for=None):
+    """Build the artifact collector from AI2D_GC_* settings, or None if disabled"""
+    if not config.GC_ENABLED:
+        return None
+    return ArtifactCollector(
+        store,
+        catalog,
+        executors,
+        max_bytes=config.GC_MAX_BYTES,
+        max_age=config.GC_MAX_AGE_SECONDS,
+        max_idle=config.GC_MAX_IDLE_SECONDS,
+        orphan_grace=config.GC_ORPHAN_GRACE_SECONDS,
+        interval=config.GC_INTERVAL_SECONDS,
+        batch_size=config.GC_BATCH_SIZE,
+        template_for=template_for,
+    )
@@ -0,0 +1,101 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app import config
+
+
+class Executors:
+    """Bounded executors that keep blocking work off the event loop"""
+
+    def __init__(self, io_workers=8, cpu_workers=2, cpu_kind="process", max_concurrency=4, model_workers=1):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.cpu_kind = cpu_kind
+        self.max_concurrency = max_concurrency
+        self.model_workers = model_workers
+        self._io = None
+        self._cpu = None
+        self._model = None
+        self._cpu_slots = asyncio.Semaphore(max_concurrency)
+        self._model_slots = asyncio.Semaphore(model_workers)
+
+    @property
+    def io(self):
+        if self._io is None:
+            self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="ai2d-io")
+        return self._io
+
+    @property
+    def cpu(self):
+        if self._cpu is None:
+            if self.cpu_kind == "process":
+                # spawn avoids forking a process that already runs executor threads
+                self._cpu = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._cpu = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="ai2d-cpu")
+        return self._cpu
+
+    @property
+    def model(self):
+        # Threads, not processes: inference shares the one Phi2Engine loaded in this process
+        if self._model is None:
+            self._model = ThreadPoolExecutor(max_workers=self.model_workers, thread_name_prefix="ai2d-model")
+        return self._model
+
+    async def run_io(self, fn, *args, **kwargs):
+        """Run a blocking I/O call in the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io, functools.partial(fn, *args, **kwargs))
+
+    async def run_cpu(self, fn, *args, **kwargs):
+        """Run a CPU-bound call in the CPU pool, bounded by max_concurrency"""
+        loop = asyncio.get_running_loop()
+        async with self._cpu_slots:
+            return await loop.run_in_executor(self.cpu, functools.partial(fn, *args, **kwargs))
+
+    async def run_inference(self, fn, *args, **kwargs):
+        """Run model inference in the in-process model pool, bounded by model_workers"""
+        loop = asyncio.get_running_loop()
+        async with self._model_slots:
+            return await loop.run_in_executor(self.model, functools.partial(fn, *args, **kwargs))
+
+    def inference_slot(self):
+        """Semaphore bounding concurrent model inference, for work run outside the model pool"""
+        return self._model_slots
+
+    def stats(self):
+        return {
+            "io_workers": self.io_workers,
+            "cpu_workers": self.cpu_workers,
+            "cpu_kind": self.cpu_kind,
+            "max_concurrency": self.max_concurrency,
+            "model_workers": self.model_workers,
+            "cpu_slots_free": self._cpu_slots._value,
+        }
+
+    def shutdown(self):
+        if self._io is not None:
+            self._io.shutdown(wait=False, cancel_futures=True)
+            self._io = None
+        if self._cpu is not None:
+            self._cpu.shutdown(wait=False, cancel_futures=True)
+            self._cpu = None
+        if self._model is not None:
+            self._model.shutdown(wait=False, cancel_futures=True)
+            self._model = None
+
+
+def create_executors():
+    """Build the executors from AI2D_EXECUTOR_* settings"""
+    return Executors(
+        io_workers=config.EXECUTOR_IO_WORKERS,
+        cpu_workers=config.EXECUTOR_CPU_WORKERS,
+        cpu_kind=config.EXECUTOR_CPU_KIND,
+        max_concurrency=config.GENERATION_CONCURRENCY,
+        model_workers=config.MODEL_WORKERS,
+    )
@@ -0,0 +1,176 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from app import config
+
+
+def logic_response_bytes(game_logic):
+    """Serialize game logic the way JSONResponse would, once per cached entry"""
+    return json.dumps(game_logic, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _deep_sizeof(value):
+    """Approximate memory held by a parsed JSON value"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(_deep_sizeof(item) for item in value)
+    return size
+
+
+class HotEntry:
+    """Parsed game logic plus its pre-serialized response body"""
+
+    __slots__ = ("logic", "body", "signature", "checked_at", "size")
+
+    def __init__(self, logic, body, signature, checked_at):
+        self.logic = logic
+        self.body = body
+        # (mtime_ns, size) of the file the entry was read from
+        self.signature = signature
+        self.checked_at = checked_at
+        self.size = _deep_sizeof(logic) + sys.getsizeof(body)
+
+
+class LogicHotSet:
+    """Bounded LRU of game logic read from disk, keyed by game id
+
+    Hits are served from memory. An entry is re-validated against its file's
+    mtime and size with a single stat at most every check_seconds, and store
+    writes invalidate it directly. Callers must treat the logic as read-only.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, check_seconds=1.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_seconds = check_seconds
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def load(self, key, path):
+        """Return the HotEntry for the JSON file at path, or None if it is missing
+
+        path may be a function returning the path (or None when there is no
+        file); it is only called when the file has to be checked or read.
+        Raises json.JSONDecodeError for a corrupt file; it is not cached.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and now - entry.checked_at < self.check_seconds:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry
+        if callable(path):
+            path = path()
+        if entry is not None:
+            signature = self._signature(path)
+            with self._lock:
+                self.revalidations += 1
+                if signature == entry.signature:
+                    entry.checked_at = now
+                    self.hits += 1
+                    return entry
+                self.stale += 1
+                self._remove(key, entry)
+        return self._read(key, path, now)
+
+    def _read(self, key, path, now):
+        if path is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                raw = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        game_logic = json.loads(raw)
+        entry = HotEntry(game_logic, logic_response_bytes(game_logic), (st.st_mtime_ns, st.st_size), now)
+        with self._lock:
+            self.misses += 1
+            if entry.size > self.max_bytes:
+                return entry
+            previous = self._data.get(key)
+            if previous is not None:
+                self._remove(key, previous)
+            self._data[key] = entry
+            self.bytes += entry.size
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+        return entry
+
+    @staticmethod
+    def _signature(path):
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _remove(self, key, entry):
+        if self._data.get(key) is entry:
+            del self._data[key]
+            self.bytes -= entry.size
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._remove(key, entry)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "revalidations": self.revalidations,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def create_logic_hot_set():
+    """Build the game logic hot set from AI2D_LOGIC_HOT_SET_* settings, or None if disabled"""
+    if config.LOGIC_HOT_SET_ENTRIES <= 0:
+        return None
+    return LogicHotSet(
+        max_entries=config.LOGIC_HOT_SET_ENTRIES,
+        max_bytes=config.LOGIC_HOT_SET_MAX_BYTES,
+        check_seconds=config.LOGIC_HOT_SET_CHECK_SECONDS,
+    )
@@ -0,0 +1,41 @@
+import hashlib
+
+from starlette.responses import Response
+
+# For URLs whose content never changes (content-addressed artifacts)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Headers a 304 must repeat from the 200 it stands in for
+_NOT_MODIFIED_HEADERS = ("cache-control", "content-location", "date", "etag", "expires", "vary")
+
+
+def strong_etag(*parts):
+    """Quoted strong ETag for a digest, or for a digest of several parts"""
+    if len(parts) == 1:
+        return f'"{parts[0]}"'
+    h = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8"))
+    return f'"{h.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(request, etag, headers):
+    """Return a 304 response if the request already has this representation, else None"""
+    if not etag_matches(request.headers.get("if-none-match"), etag):
+        return None
+    headers = {key: value for key, value in headers.items() if key.lower() in _NOT_MODIFIED_HEADERS}
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,204 @@
+import asyncio
+import itertools
+import json
+import time
+import uuid
+from collections import OrderedDict
+
+from app import config
+from app.cache import normalize_prompt
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+
+FINISHED = (SUCCEEDED, FAILED, TIMED_OUT)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at its maximum depth"""
+
+
+class Job:
+    """A queued prompt plus its status, progress events and result"""
+
+    def __init__(self, prompt, priority=0):
+        self.id = uuid.uuid4().hex
+        self.prompt = prompt
+        self.key = normalize_prompt(prompt)
+        self.priority = priority
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.events = []
+        self._changed = asyncio.Event()
+        self.add_event("status", {"status": QUEUED})
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    def add_event(self, event, data):
+        self.events.append((event, data))
+        # Wake every waiter, then arm a fresh event for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def set_status(self, status, **data):
+        self.status = status
+        if status == RUNNING:
+            self.started_at = time.time()
+        elif status in FINISHED:
+            self.finished_at = time.time()
+        self.add_event("status", dict(data, status=status))
+
+    def stage(self, name):
+        self.add_event("stage", {"stage": name})
+
+    async def stream(self):
+        """Yield (event, data) pairs from the start until the job finishes"""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await changed.wait()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "prompt": self.prompt,
+            "stages": [data["stage"] for event, data in self.events if event == "stage"],
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class JobQueue:
+    """Bounded priority queue of generation jobs served by a worker pool"""
+
+    def __init__(self, runner, workers=2, max_depth=100, timeout=120.0, retention=1000):
+        self.runner = runner
+        self.workers = workers
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.retention = retention
+        self._queue = None
+        self._tasks = []
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._sequence = itertools.count()
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+
+    async def start(self):
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_depth)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, prompt, priority=0):
+        """Queue a prompt, returning (job, deduplicated)
+
+        A queued or running job for the same normalized prompt is returned instead
+        of creating a new one. Higher priorities run first.
+        """
+        key = normalize_prompt(prompt)
+        active = self._active.get(key)
+        if active is not None:
+            self.deduplicated += 1
+            return active, True
+
+        job = Job(prompt, priority)
+        try:
+            self._queue.put_nowait((-priority, next(self._sequence), job))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"Job queue is full ({self.max_depth} jobs)")
+
+        self.submitted += 1
+        self._active[key] = job
+        self._jobs[job.id] = job
+        self._trim()
+        return job, False
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _trim(self):
+        # Forget the oldest finished jobs beyond the retention limit
+        excess = len(self._jobs) - self.retention
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done][:excess]:
+            del self._jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._active.pop(job.key, None)
+                self._queue.task_done()
+
+    async def _run(self, job):
+        job.set_status(RUNNING)
+        try:
+            job.result = await asyncio.wait_for(self.runner(job.prompt, progress=job.stage), self.timeout)
+        except asyncio.TimeoutError:
+            job.error = f"Generation exceeded {self.timeout:g}s"
+            job.set_status(TIMED_OUT, error=job.error)
+        except Exception as e:
+            job.error = str(e)
+            job.set_status(FAILED, error=job.error)
+        else:
+            job.set_status(SUCCEEDED, result=job.result)
+
+    def stats(self):
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "jobs": counts,
+        }
+
+
+def create_job_queue(runner):
+    """Build the job queue from AI2D_JOB_* settings"""
+    return JobQueue(
+        runner,
+        workers=config.JOB_WORKERS,
+        max_depth=config.JOB_QUEUE_DEPTH,
+        timeout=config.JOB_TIMEOUT_SECONDS,
+        retention=config.JOB_RETENTION,
+    )
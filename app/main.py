@@ -1,14 +1,27 @@
 from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import os
+import asyncio
+import hashlib
 import json
+import time
 
-from app.models.phi2_model import generate_game_logic
-from app.templates.game_generator import generate_game_code
+from app import config
+from app.models.phi2_model import get_engine, get_batcher, get_few_shot_index
+from app.bundles import PrecompressedStaticFiles, accepted_encodings
+from app.catalog import InvalidCursorError, SORTS, create_game_catalog
+from app.eviction import create_artifact_collector
+from app.hot_set import create_logic_hot_set
+from app.store import ENCODING_SUFFIXES
+from app.packed_store import SliceResponse, create_artifact_store
+from app.http_cache import IMMUTABLE_CACHE_CONTROL, not_modified, strong_etag
+from app.cache import create_generation_cache
+from app.executor import create_executors
+from app.pipeline import GenerationPipeline, GenerationError
+from app.jobs import create_job_queue, format_sse, QueueFullError
+from app.templates.game_generator import registry, template_stats
 
 app = FastAPI(title="AI2D - AI-Powered 2D Game Generator")
 
@@ -21,19 +34,97 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create directories if they don't exist
-os.makedirs("app/static/games", exist_ok=True)
-os.makedirs("app/static/game_logic", exist_ok=True)  # Directory to store JSON game logic
+# Content-addressed artifact store: sharded files under app/static (with popular
+# game logic kept parsed and serialized in memory) or packed segment files
+store = create_artifact_store(hot_set=create_logic_hot_set())
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Generation cache: prompt -> game logic and logic digest -> game code
+generation_cache = create_generation_cache()
+
+# Bounded executors so blocking generation and file I/O never stall the event loop
+executors = create_executors()
+
+# SQLite index of stored games: existence checks, popularity and /games listings
+catalog = create_game_catalog()
+
+pipeline = GenerationPipeline(store, generation_cache, executors, catalog)
+
+# Background eviction of old, idle and orphaned game artifacts
+collector = create_artifact_collector(store, catalog, executors, registry.key_for)
+
+# Asynchronous generation jobs served by a worker pool
+job_queue = create_job_queue(pipeline.generate)
+
+# Mount static files (precompressed bundles are served by Accept-Encoding).
+# Runtime, bundles and logic are content-addressed, so they never change once written
+app.mount(
+    "/static",
+    PrecompressedStaticFiles(directory="app/static", immutable_prefixes=("runtime/", "games/", "game_logic/")),
+    name="static",
+)
 
 # Templates
 templates = Jinja2Templates(directory="app/templates/html")
 
+# Part of the /play ETag, so editing the page template invalidates cached pages
+with open("app/templates/html/play.html", "rb") as f:
+    PLAY_TEMPLATE_DIGEST = hashlib.sha256(f.read()).hexdigest()
+
 class GamePrompt(BaseModel):
     prompt: str
 
+class GameBatch(BaseModel):
+    prompts: list[str]
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+@app.on_event("startup")
+async def publish_runtime():
+    """Write the shared game runtime that every game bundle builds on"""
+    await pipeline.publish_runtime()
+
+@app.on_event("startup")
+async def import_catalog():
+    """Catalogue games stored before the catalog was enabled (only while it is empty)"""
+    if catalog is not None and await executors.run_io(len, catalog) == 0:
+        added = await pipeline.import_catalog()
+        if added:
+            print(f"Imported {added} stored games into the catalog")
+
+@app.on_event("startup")
+async def start_collector():
+    if collector is not None:
+        await collector.start()
+
+@app.on_event("startup")
+async def warmup_model():
+    """Load Phi-2 in the background on startup; /ready reports when it is done"""
+    if config.MODEL_ENABLED and config.MODEL_FEW_SHOT_K > 0 and not config.MODEL_SERVER_SOCKET:
+        # Build the few-shot example index once up front (the model server has its own)
+        await executors.run_io(get_few_shot_index().refresh, True)
+    if config.MODEL_ENABLED and config.MODEL_WARMUP:
+        app.state.model_warmup = asyncio.create_task(executors.run_inference(get_engine().warmup))
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await job_queue.stop()
+    if collector is not None:
+        await collector.stop()
+    executors.shutdown()
+    if catalog is not None:
+        catalog.close()
+    segments = getattr(store, "segments", None)
+    if segments is not None:
+        segments.close()
+
+async def game_exists(game_id):
+    """Check a game is stored: one catalog lookup (which counts the play), else a stat"""
+    if catalog is not None:
+        return await executors.run_io(catalog.touch, game_id)
+    return await executors.run_io(store.has_bundle, game_id)
+
 @app.get("/", response_class=HTMLResponse)
 async def get_form(request: Request):
     """Render the form to enter a game prompt"""
@@ -43,39 +134,15 @@ async def get_form(request: Request):
 async def generate_game(prompt: str = Form(...)):
     """Generate a game based on the prompt"""
     try:
-        # Step 1: Generate game logic JSON using template-based approach (formerly Phi-2 model)
-        game_logic = generate_game_logic(prompt)
-        
-        if not game_logic:
-            return JSONResponse(
-                status_code=500,
-                content={"error": "Failed to generate game logic", "message": "Template selection failed"}
-            )
-        
-        # Create a unique game ID
-        game_id = str(hash(prompt))[:8]
-        
-        # Step 2: Save the game logic JSON to a file
-        json_path = f"app/static/game_logic/{game_id}.json"
-        with open(json_path, "w") as f:
-            json.dump(game_logic, f, indent=2)
-        
-        # Step 3: Convert game logic to Phaser.js code
-        game_code = generate_game_code(game_logic)
-        
-        # Step 4: Save the game code to a file
-        game_path = f"app/static/games/{game_id}.js"
-        with open(game_path, "w") as f:
-            f.write(game_code)
+        result = await pipeline.generate(prompt)
         
         # Return the game ID and other data as a properly formatted JSON
+        return JSONResponse(status_code=200, content=result)
+    
+    except GenerationError as e:
         return JSONResponse(
-            status_code=200,
-            content={
-                "game_id": game_id, 
-                "game_logic": game_logic,
-                "json_path": f"/static/game_logic/{game_id}.json"
-            }
+            status_code=500,
+            content={"error": "Failed to generate game logic", "message": str(e)}
         )
     
     except Exception as e:
@@ -85,53 +152,277 @@ async def generate_game(prompt: str = Form(...)):
             content={"error": str(e), "message": "Failed to generate game with template"}
         )
 
+@app.post("/generate/stream")
+async def generate_game_stream(prompt: str = Form(...)):
+    """Stream game logic tokens as Server-Sent Events as the model decodes them
+    
+    Emits "token" events with text deltas, an optional "fallback" event when the
+    model output is unusable, and a closing "done" event with the stored game.
+    """
+    async def events():
+        try:
+            async for event, data in pipeline.stream(prompt):
+                yield format_sse(event, data)
+        
+        except Exception as e:
+            yield format_sse("error", {"error": str(e), "message": "Failed to generate game"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate/batch")
+async def generate_game_batch(batch: GameBatch):
+    """Generate games for a list of prompts, streaming one NDJSON line per prompt
+    
+    Lines come in prompt order as each chunk is stored, followed by a summary
+    line with the counts and throughput.
+    """
+    if not batch.prompts or len(batch.prompts) > config.BATCH_MAX_PROMPTS:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Send between 1 and {config.BATCH_MAX_PROMPTS} prompts"}
+        )
+    
+    async def lines():
+        started = time.perf_counter()
+        summary = {"done": True, "prompts": len(batch.prompts), "created": 0, "deduplicated": 0, "errors": 0}
+        try:
+            async for result in pipeline.generate_batch(batch.prompts, config.BATCH_CHUNK_SIZE):
+                if "error" in result:
+                    summary["errors"] += 1
+                elif result["deduplicated"]:
+                    summary["deduplicated"] += 1
+                else:
+                    summary["created"] += 1
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            summary["error"] = str(e)
+        seconds = time.perf_counter() - started
+        summary["seconds"] = round(seconds, 3)
+        # Only newly created games count as generated; prompts_per_second covers all of them
+        summary["games_per_second"] = round(summary["created"] / seconds, 1)
+        summary["prompts_per_second"] = round(summary["prompts"] / seconds, 1)
+        yield json.dumps(summary) + "\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs", status_code=202)
+async def create_job(prompt: str = Form(...), priority: int = Form(0)):
+    """Queue a generation job and return its id immediately"""
+    try:
+        job, deduplicated = job_queue.submit(prompt, priority)
+    except QueueFullError as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(e), "message": "Too many pending generations, try again later"}
+        )
+    
+    return JSONResponse(status_code=202, content={
+        "job_id": job.id,
+        "status": job.status,
+        "deduplicated": deduplicated,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events"
+    })
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status and result of a generation job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return JSONResponse(content=job.to_dict())
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream job status and progress stages as Server-Sent Events"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    
+    async def events():
+        async for event, data in job.stream():
+            yield format_sse(event, data)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/play/{game_id}", response_class=HTMLResponse)
 async def play_game(request: Request, game_id: str):
     """Render the page to play a generated game"""
-    # Check if the game file exists
-    game_path = f"app/static/games/{game_id}.js"
-    if not os.path.exists(game_path):
+    # Check if the game exists
+    if not await game_exists(game_id):
         raise HTTPException(status_code=404, detail="Game not found")
     
-    # Check if the JSON file exists
-    json_path = f"app/static/game_logic/{game_id}.json"
-    game_logic = None
-    if os.path.exists(json_path):
-        with open(json_path, "r") as f:
-            try:
-                game_logic = json.load(f)
-            except json.JSONDecodeError:
-                game_logic = {"error": "Invalid game logic JSON"}
+    # The bundle URL follows from the store layout; only while flat files are
+    # left to migrate does resolving it need a stat
+    if store.legacy_fallback:
+        bundle_url = await executors.run_io(store.bundle_url, game_id)
+    else:
+        bundle_url = store.bundle_url(game_id)
+    
+    # The page only changes with the game, its URLs or the template
+    headers = {
+        "ETag": strong_etag(game_id, bundle_url, pipeline.runtime_url, PLAY_TEMPLATE_DIGEST),
+        "Cache-Control": f"public, max-age={config.HTTP_PLAY_MAX_AGE}",
+    }
+    response = not_modified(request, headers["ETag"], headers)
+    if response is not None:
+        return response
+    
+    # Load the JSON file if it exists
+    try:
+        game_logic = await executors.run_io(store.load_logic, game_id)
+    except json.JSONDecodeError:
+        game_logic = {"error": "Invalid game logic JSON"}
         
     return templates.TemplateResponse("play.html", {
         "request": request, 
         "game_id": game_id,
         "game_logic": game_logic,
-        "json_path": f"/static/game_logic/{game_id}.json"
-    })
+        "json_path": store.json_url(game_id),
+        "bundle_url": bundle_url,
+        "runtime_url": pipeline.runtime_url
+    }, headers=headers)
 
 @app.get("/game-logic/{game_id}")
-async def get_game_logic(game_id: str):
+async def get_game_logic(request: Request, game_id: str):
     """Get the game logic JSON for a specific game"""
-    json_path = f"app/static/game_logic/{game_id}.json"
+    if catalog is not None and not await executors.run_io(catalog.touch, game_id):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Game logic not found"}
+        )
     
-    if not os.path.exists(json_path):
+    # Game ids are logic digests, so the id itself is a strong validator and a
+    # revalidation is answered without loading the logic
+    headers = {"ETag": strong_etag(game_id), "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    response = not_modified(request, headers["ETag"], headers)
+    if response is not None:
+        # The catalog lookup above already found the game; without it, check it is stored
+        if catalog is not None or await executors.run_io(store.has_logic, game_id):
+            return response
         return JSONResponse(
             status_code=404,
             content={"error": "Game logic not found"}
         )
     
     try:
-        with open(json_path, "r") as f:
-            game_logic = json.load(f)
-        
-        return JSONResponse(content=game_logic)
-    
+        # Pre-serialized bytes, straight from the hot set when the game is popular
+        body = await executors.run_io(store.load_logic_bytes, game_id)
     except json.JSONDecodeError:
         return JSONResponse(
             status_code=500,
             content={"error": "Invalid JSON format"}
         )
+    
+    if body is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Game logic not found"}
+        )
+    
+    # A memoryview into a mapped segment with the packed store, sent without a copy
+    return SliceResponse(content=body, media_type="application/json", headers=headers)
+
+@app.get("/bundles/{game_id}.js")
+async def get_bundle(request: Request, game_id: str):
+    """Serve a game bundle from the store (the packed store's bundle URL)"""
+    accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+    for encoding in ("br", "gzip", None):
+        if encoding is None or encoding in accepted:
+            body = await executors.run_io(store.load_bundle, game_id, encoding)
+            if body is not None:
+                break
+    if body is None:
+        return JSONResponse(status_code=404, content={"error": "Game not found"})
+    
+    suffix = f".js{ENCODING_SUFFIXES[encoding]}" if encoding else ".js"
+    headers = {"ETag": strong_etag(game_id + suffix), "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+               "Vary": "Accept-Encoding"}
+    response = not_modified(request, headers["ETag"], headers)
+    if response is not None:
+        return response
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return SliceResponse(content=body, media_type="text/javascript; charset=utf-8", headers=headers)
+
+@app.get("/games")
+async def list_games(q: str = "", template: str = "", sort: str = "recent", limit: int = 20, cursor: str = ""):
+    """List stored games, newest or most played first, optionally filtered by template or text"""
+    if catalog is None:
+        return JSONResponse(status_code=404, content={"error": "Game catalog is disabled"})
+    if sort not in SORTS:
+        return JSONResponse(status_code=400, content={"error": f"sort must be one of: {', '.join(SORTS)}"})
+    if not 1 <= limit <= 100:
+        return JSONResponse(status_code=400, content={"error": "limit must be between 1 and 100"})
+    try:
+        games, next_cursor = await executors.run_io(catalog.list, q, template, sort, limit, cursor)
+    except InvalidCursorError:
+        return JSONResponse(status_code=400, content={"error": "Invalid cursor"})
+    for game in games:
+        game["play_url"] = f"/play/{game['game_id']}"
+    return JSONResponse(content={"games": games, "next_cursor": next_cursor})
+
+@app.get("/games/{game_id}")
+async def get_game(game_id: str):
+    """Get the catalog record of a stored game"""
+    if catalog is None:
+        return JSONResponse(status_code=404, content={"error": "Game catalog is disabled"})
+    game = await executors.run_io(catalog.get, game_id)
+    if game is None:
+        return JSONResponse(status_code=404, content={"error": "Game not found"})
+    game["play_url"] = f"/play/{game_id}"
+    return JSONResponse(content=game)
+
+@app.get("/ready")
+async def readiness():
+    """Report whether the service can generate games (model loaded, if enabled)"""
+    if not config.MODEL_ENABLED:
+        return JSONResponse(content={"ready": True, "mode": "templates"})
+    
+    # A remote engine's status is a socket round-trip, so keep it off the loop
+    status = await executors.run_io(get_engine().status)
+    return JSONResponse(
+        status_code=200 if status["ready"] else 503,
+        content={"ready": status["ready"], "mode": "model", "model": status}
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    """Report generation cache, coalescing, executor, job queue, template, hot set, segment, catalog, GC and model counters"""
+    metrics = {
+        "cache": generation_cache.stats(),
+        "coalescing": pipeline.stats(),
+        "executors": executors.stats(),
+        "jobs": job_queue.stats(),
+        "templates": template_stats(),
+    }
+    if store.hot_set is not None:
+        metrics["logic_hot_set"] = store.hot_set.stats()
+    if getattr(store, "segments", None) is not None:
+        metrics["segments"] = store.segments.stats()
+    if catalog is not None:
+        metrics["catalog"] = await executors.run_io(catalog.stats)
+    if collector is not None:
+        metrics["gc"] = collector.stats()
+    if config.MODEL_ENABLED:
+        metrics["model"] = {"engine": await executors.run_io(get_engine().status)}
+        if not config.MODEL_SERVER_SOCKET:
+            metrics["model"]["few_shot"] = get_few_shot_index().stats()
+        if config.MODEL_BATCHING:
+            metrics["model"]["batching"] = get_batcher().stats()
+    return JSONResponse(content=metrics)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,113 @@
+"""Move game artifacts from the flat directories into the sharded layout
+
+Usage:
+    python -m app.migrate_store --batch-size 500 --pause 0.05
+
+Safe to run while the server is up: the store finds files in either layout,
+each file is moved with an atomic rename, and batches are spaced out by the
+pause so the disk stays responsive. Files written meanwhile already go to the
+sharded layout. Re-running after an interruption picks up where it stopped.
+"""
+import argparse
+import os
+import time
+
+from app import config
+from app.store import ENCODING_SUFFIXES, GAME_LOGIC_DIR, GAMES_DIR, ArtifactStore, ShardedLayout, split_artifact_name
+
+
+def _flat_files(directory):
+    """Yield (game_id, suffix) for artifact files directly in directory"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                parts = split_artifact_name(entry.name)
+                if parts is not None:
+                    yield parts
+
+
+def _move(source, target):
+    """Rename source to target; returns "moved", "duplicate" or None if source is gone"""
+    if not os.path.exists(source):
+        return None
+    if os.path.exists(target):
+        # Content-addressed: the sharded copy is identical, drop the flat one
+        os.unlink(source)
+        return "duplicate"
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(source, target)
+    return "moved"
+
+
+def migrate_file(store, directory, game_id, suffix):
+    """Move one flat artifact (a bundle with its precompressed siblings) into its shard"""
+    if suffix == ".js" or suffix.startswith(".js."):
+        # Siblings before the bundle, so a bundle found in its shard is served compressed
+        suffixes = [".js" + s for s in ENCODING_SUFFIXES.values()] + [".js"]
+    else:
+        suffixes = [suffix]
+    results = []
+    for each in suffixes:
+        source = os.path.join(directory, game_id + each)
+        result = _move(source, store.layout.path(directory, game_id, each))
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def migrate(store, batch_size=500, pause=0.05, dry_run=False):
+    """Move every flat artifact into the store's layout; returns counts"""
+    if not store.layout.depth:
+        raise ValueError("The store layout is flat; set AI2D_STORE_SHARD_DEPTH to shard it")
+    started = time.perf_counter()
+    stats = {"files": 0, "moved": 0, "duplicate": 0, "batches": 0}
+    for directory in (store.logic_dir, store.games_dir):
+        # Rescan until nothing is left: a directory listing may miss entries
+        # while files are renamed out of it
+        while True:
+            pending = _flat_files(directory)
+            seen = 0
+            while True:
+                batch = [parts for _, parts in zip(range(batch_size), pending)]
+                if not batch:
+                    break
+                seen += len(batch)
+                stats["batches"] += 1
+                for game_id, suffix in batch:
+                    stats["files"] += 1
+                    if dry_run:
+                        continue
+                    for result in migrate_file(store, directory, game_id, suffix):
+                        stats[result] += 1
+                if not dry_run:
+                    print(f"{directory}: {stats['moved']} moved, {stats['duplicate']} duplicates")
+                if pause:
+                    time.sleep(pause)
+            if dry_run or not seen:
+                break
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move AI2D game artifacts into the sharded layout")
+    parser.add_argument("--logic-dir", default=GAME_LOGIC_DIR)
+    parser.add_argument("--games-dir", default=GAMES_DIR)
+    parser.add_argument("--depth", type=int, default=config.STORE_SHARD_DEPTH)
+    parser.add_argument("--width", type=int, default=config.STORE_SHARD_WIDTH)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between batches")
+    parser.add_argument("--dry-run", action="store_true", help="count the files without moving them")
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.logic_dir, args.games_dir, layout=ShardedLayout(args.depth, args.width))
+    stats = migrate(store, args.batch_size, args.pause, args.dry_run)
+    if args.dry_run:
+        print(f"{stats['files']} files to migrate")
+    else:
+        print(f"Done: {stats['moved']} files moved, {stats['duplicate']} duplicates removed "
+              f"in {stats['seconds']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
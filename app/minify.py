@@ -0,0 +1,167 @@
+# Whitespace and comment stripping for generated Phaser bundles.
+#
+# This is a scanner, not a parser: it copies strings, template literals and
+# regex literals verbatim, drops comments, and collapses whitespace to the
+# minimum that keeps the tokens apart. Newlines are kept where removing them
+# could change automatic semicolon insertion, so the output is always
+# equivalent to the input.
+
+_WHITESPACE = " \t\r\n\f\v\u00a0\ufeff"
+
+# After these characters a newline can never end a statement
+_JOIN_AFTER = set("{[(,;:=&|?")
+# Before these characters a newline can never start a statement
+_JOIN_BEFORE = set("}]),;.?:&|")
+
+# Tokens after which "/" starts a regex literal rather than a division
+_REGEX_AFTER_PUNCT = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_AFTER_WORDS = {"return", "typeof", "case", "do", "else", "in", "instanceof", "new", "delete", "void", "throw", "yield", "await"}
+
+
+def _is_word_char(c):
+    return c.isalnum() or c in "_$" or ord(c) > 127
+
+
+def _needs_space(a, b):
+    if _is_word_char(a) and _is_word_char(b):
+        return True
+    # a + +b, a - -b, x / /re/ and 1 .toString() must stay apart
+    if a in "+-" and b == a:
+        return True
+    if a == "/" and b in "/*":
+        return True
+    return a.isdigit() and b == "."
+
+
+def _read_quoted(source, i):
+    """Return the index just past the string literal starting at source[i]"""
+    quote = source[i]
+    i += 1
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        i += 1
+        if c == quote:
+            return i
+        if c == "\n":
+            break
+    raise ValueError("Unterminated string literal")
+
+
+def _read_template(source, i):
+    """Read template literal text from i; return (end, opened_substitution)"""
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == "\\":
+            i += 2
+        elif c == "`":
+            return i + 1, False
+        elif c == "$" and source.startswith("${", i):
+            return i + 2, True
+        else:
+            i += 1
+    raise ValueError("Unterminated template literal")
+
+
+def _read_regex(source, i):
+    """Return the index just past the regex literal (and flags) starting at source[i]"""
+    i += 1
+    n = len(source)
+    in_class = False
+    while i < n:
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "\n":
+            break
+        i += 1
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            while i < n and _is_word_char(source[i]):
+                i += 1
+            return i
+    raise ValueError("Unterminated regex literal")
+
+
+def minify_js(source):
+    """Strip comments and redundant whitespace from JavaScript source"""
+    out = []
+    prev = ""        # last emitted token, used for regex detection
+    pending = None   # whitespace seen since the last token: None, " " or "\n"
+    braces = []      # open brace counts of enclosing template substitutions
+    i = 0
+    n = len(source)
+
+    def emit(token):
+        nonlocal prev, pending
+        if pending and out:
+            a, b = out[-1][-1], token[0]
+            if pending == "\n" and not (a in _JOIN_AFTER or b in _JOIN_BEFORE):
+                out.append("\n")
+            elif _needs_space(a, b):
+                out.append(" ")
+        pending = None
+        out.append(token)
+        prev = token
+
+    while i < n:
+        c = source[i]
+        if c in _WHITESPACE:
+            start = i
+            while i < n and source[i] in _WHITESPACE:
+                i += 1
+            pending = "\n" if pending == "\n" or "\n" in source[start:i] else " "
+        elif source.startswith("//", i):
+            end = source.find("\n", i)
+            i = n if end == -1 else end
+            pending = pending or " "
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            if end == -1:
+                raise ValueError("Unterminated comment")
+            pending = "\n" if pending == "\n" or "\n" in source[i:end] else (pending or " ")
+            i = end + 2
+        elif c in "'\"":
+            end = _read_quoted(source, i)
+            emit(source[i:end])
+            i = end
+        elif c == "`":
+            end, opened = _read_template(source, i + 1)
+            emit(source[i:end])
+            i = end
+            if opened:
+                braces.append(0)
+        elif c == "}" and braces and braces[-1] == 0:
+            # Closes a ${...} substitution: resume the template literal text
+            braces.pop()
+            end, opened = _read_template(source, i + 1)
+            emit(source[i:end])
+            i = end
+            if opened:
+                braces.append(0)
+        elif c == "/" and (not prev or prev[-1] in _REGEX_AFTER_PUNCT or prev in _REGEX_AFTER_WORDS):
+            end = _read_regex(source, i)
+            emit(source[i:end])
+            i = end
+        elif _is_word_char(c):
+            start = i
+            while i < n and _is_word_char(source[i]):
+                i += 1
+            emit(source[start:i])
+        else:
+            if braces:
+                if c == "{":
+                    braces[-1] += 1
+                elif c == "}":
+                    braces[-1] -= 1
+            emit(c)
+            i += 1
+    return "".join(out)
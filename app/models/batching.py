@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+
+class BatchQueueFullError(Exception):
+    """Raised when too many prompts are already waiting for a batch"""
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class MicroBatcher:
+    """Collects items arriving within a short window and runs them as one batch
+
+    handler receives a list of items and must return a list of results in the same
+    order. Callers block on the Future returned by submit.
+    """
+
+    def __init__(self, handler, max_batch_size=8, max_wait_ms=20.0, max_queue=256, latency_window=2048):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.queue_latencies = deque(maxlen=latency_window)
+        self.requests = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="ai2d-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, item):
+        """Queue an item for the next batch and return a Future for its result"""
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except queue.Full:
+            self.rejected += 1
+            raise BatchQueueFullError(f"Batch queue is full ({self._queue.maxsize} prompts)")
+        self.requests += 1
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            self.batch_sizes[len(batch)] += 1
+            for _, _, enqueued in batch:
+                self.queue_latencies.append(started - enqueued)
+            try:
+                results = self.handler([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        latencies = sorted(self.queue_latencies)
+        batches = sum(self.batch_sizes.values())
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize(),
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "batches": batches,
+            "mean_batch_size": (sum(size * count for size, count in self.batch_sizes.items()) / batches)
+            if batches else None,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "queue_latency_ms": {
+                "p50": ms(_percentile(latencies, 0.50)),
+                "p90": ms(_percentile(latencies, 0.90)),
+                "p99": ms(_percentile(latencies, 0.99)),
+                "max": ms(latencies[-1] if latencies else None),
+            },
+        }
@@ -0,0 +1,117 @@
+"""Compare fp32 and int8 Phi-2 inference: latency, tokens/s, RSS and JSON validity
+
+Usage:
+    python -m app.models.benchmark_quant --model microsoft/phi-2 --runs 3
+
+Each mode runs in its own spawned process so RSS numbers are not mixed.
+"""
+import argparse
+import json
+import multiprocessing
+import time
+
+DEFAULT_PROMPTS = [
+    "Create a tic tac toe game",
+    "Create a snake game where you collect food",
+    "Create a pong game for 2 players",
+    "Create a breakout game with colorful bricks",
+    "Make a space shooter with asteroids",
+]
+
+
+def rss_mb():
+    """Resident set size of this process in MB (Linux), or None"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_mode(model_name, quantize, prompts, runs, max_new_tokens, trust_remote_code, cache_dir, constrained):
+    """Benchmark one engine configuration and return a result dict"""
+    from app.models.phi2_model import GAME_LOGIC_GRAMMAR, Phi2Engine, build_prompt, parse_game_logic
+
+    engine = Phi2Engine(
+        model_name=model_name,
+        quantize=quantize,
+        max_new_tokens=max_new_tokens,
+        trust_remote_code=trust_remote_code,
+        quantized_cache_dir=cache_dir,
+        prefix_cache_entries=0,
+    )
+    rss_before = rss_mb()
+    engine.load()
+    rss_loaded = rss_mb()
+
+    latencies = []
+    tokens = 0
+    valid = 0
+    total = 0
+    for _ in range(runs):
+        for prompt in prompts:
+            started = time.perf_counter()
+            text = engine.generate_texts([build_prompt(prompt)], grammar=GAME_LOGIC_GRAMMAR if constrained else None)[0]
+            latencies.append(time.perf_counter() - started)
+            tokens += len(engine.tokenizer(text, add_special_tokens=False)["input_ids"])
+            valid += parse_game_logic(text) is not None
+            total += 1
+
+    latencies.sort()
+    elapsed = sum(latencies)
+    return {
+        "mode": "fp32" if quantize == "none" else quantize,
+        "load_seconds": round(engine.load_seconds, 2),
+        "loaded_from_cache": engine.loaded_from_cache,
+        "rss_mb": round(rss_loaded, 1) if rss_loaded is not None else None,
+        "model_rss_mb": round(rss_loaded - rss_before, 1) if rss_loaded is not None else None,
+        "p50_latency_s": round(latencies[len(latencies) // 2], 3),
+        "max_latency_s": round(latencies[-1], 3),
+        "tokens_per_s": round(tokens / elapsed, 2) if elapsed else None,
+        "json_valid_rate": round(valid / total, 3) if total else None,
+    }
+
+
+def _worker(queue, *args):
+    try:
+        queue.put(run_mode(*args))
+    except Exception as e:
+        queue.put({"mode": args[1], "error": str(e)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="microsoft/phi-2")
+    parser.add_argument("--prompts", help="File with one prompt per line")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--cache-dir", default="model_cache")
+    parser.add_argument("--no-trust-remote-code", action="store_true")
+    parser.add_argument("--constrained", action="store_true", help="Use grammar-constrained decoding")
+    args = parser.parse_args()
+
+    prompts = DEFAULT_PROMPTS
+    if args.prompts:
+        with open(args.prompts) as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for quantize in ("none", "int8"):
+        queue = context.Queue()
+        process = context.Process(target=_worker, args=(
+            queue, args.model, quantize, prompts, args.runs, args.max_new_tokens,
+            not args.no_trust_remote_code, args.cache_dir, args.constrained,
+        ))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from collections import deque
+
+# Multi-keyword prompt classifier.
+#
+# All keywords of all labels are compiled into one Aho-Corasick automaton, so a
+# prompt is scanned once regardless of how many templates or keywords exist.
+# Matches only count on word boundaries ("tic" does not fire inside
+# "fantastic"), and each distinct keyword adds its weight to its label once.
+
+
+def _is_word_char(c):
+    return c.isalnum() or c == "_"
+
+
+class KeywordMatcher:
+    """Weighted keyword classifier built from {label: {keyword: weight}}"""
+
+    def __init__(self, table, saturation=2.0):
+        # A label needs at least this much weight for full confidence
+        self.saturation = saturation
+        self.labels = list(table)
+        self._goto = [{}]
+        self._fail = [0]
+        # Per node: (keyword length, label, weight, keyword) for every keyword ending there
+        self._out = [[]]
+        for label, keywords in table.items():
+            for keyword, weight in keywords.items():
+                self._add(" ".join(keyword.lower().split()), label, weight)
+        self._build()
+
+    def _add(self, keyword, label, weight):
+        node = 0
+        for c in keyword:
+            nxt = self._goto[node].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][c] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(keyword), label, weight, keyword))
+
+    def _build(self):
+        # Breadth-first fail links; outputs of the fail target are merged in so
+        # the scan never has to walk the fail chain to report matches
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(c, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def matches(self, text):
+        """Return {keyword: (label, weight)} for keywords found on word boundaries"""
+        text = " ".join(text.lower().split())
+        found = {}
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for end, c in enumerate(text):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            if not out[node]:
+                continue
+            after_ok = end + 1 == len(text) or not _is_word_char(text[end + 1])
+            if not after_ok:
+                continue
+            for length, label, weight, keyword in out[node]:
+                start = end - length + 1
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    found[keyword] = (label, weight)
+        return found
+
+    def scores(self, text):
+        """Return {label: total weight} for every label with a match"""
+        scores = {}
+        for label, weight in self.matches(text).values():
+            scores[label] = scores.get(label, 0) + weight
+        return scores
+
+    def classify(self, text, default=None):
+        """Return (label, confidence) for the best-scoring label
+
+        Confidence is the best label's share of all matched weight, scaled down
+        when that weight is below `saturation`. Ties go to the label listed
+        first. With no match the default label is returned with confidence 0.
+        """
+        scores = self.scores(text)
+        if not scores:
+            return default, 0.0
+        best = max(self.labels, key=lambda label: scores.get(label, 0))
+        share = scores[best] / sum(scores.values())
+        return best, round(share * min(1.0, scores[best] / self.saturation), 3)
@@ -0,0 +1,108 @@
+from multiprocessing.connection import Client
+
+
+def authkey_path(address):
+    """File the model server writes its generated auth key to, next to its socket"""
+    return address + ".key"
+
+
+def read_authkey(address):
+    with open(authkey_path(address), "rb") as f:
+        return f.read().strip()
+
+
+class RemoteError(Exception):
+    """Raised when the model server reports a failure"""
+
+
+class RemoteStreamer:
+    """Reads streamed text chunks from the model server (same interface as TokenStreamer)"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.text = ""
+        self.error = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop reading; the server stops generating once it can no longer send"""
+        self.cancelled = True
+
+    def next_chunk(self, timeout=None):
+        """Block for the next text chunk; returns None once generation has ended"""
+        if self._conn is None:
+            return None
+        if self.cancelled:
+            self._conn.close()
+            self._conn = None
+            return None
+        try:
+            message = self._conn.recv()
+        except EOFError:
+            message = {"end": True, "error": "Model server closed the connection"}
+        if "chunk" in message:
+            self.text += message["chunk"]
+            return message["chunk"]
+        if message.get("error"):
+            self.error = RemoteError(message["error"])
+        self._conn.close()
+        self._conn = None
+        return None
+
+    def __iter__(self):
+        while True:
+            chunk = self.next_chunk()
+            if chunk is None:
+                return
+            yield chunk
+
+
+class RemoteEngine:
+    """Phi2Engine stand-in that forwards inference to the model server over a Unix socket"""
+
+    def __init__(self, address, authkey=""):
+        self.address = address
+        # Empty: use the key the server generated, re-read on each connect so server restarts are picked up
+        self.authkey = authkey.encode("utf-8") if isinstance(authkey, str) else authkey
+
+    def _connect(self):
+        return Client(self.address, family="AF_UNIX", authkey=self.authkey or read_authkey(self.address))
+
+    def _call(self, op, **kwargs):
+        with self._connect() as conn:
+            conn.send(dict(kwargs, op=op))
+            reply = conn.recv()
+        if not reply.get("ok"):
+            raise RemoteError(reply.get("error", "Model server error"))
+        return reply.get("result")
+
+    @property
+    def ready(self):
+        try:
+            return bool(self._call("status")["ready"])
+        except (OSError, EOFError, RemoteError):
+            return False
+
+    def load(self):
+        self._call("load")
+
+    def warmup(self):
+        self._call("load")
+
+    def generate_logic(self, prompt):
+        return self._call("generate_logic", prompt=prompt)
+
+    def generate_logic_batch(self, prompts):
+        return self._call("generate_logic_batch", prompts=list(prompts))
+
+    def stream_logic(self, prompt):
+        conn = self._connect()
+        conn.send({"op": "stream_logic", "prompt": prompt})
+        return RemoteStreamer(conn)
+
+    def status(self):
+        try:
+            status = self._call("status")
+        except (OSError, EOFError, RemoteError) as e:
+            return {"ready": False, "server": self.address, "error": str(e)}
+        return dict(status, server=self.address)
@@ -0,0 +1,357 @@
+import json
+
+# Character-level grammar for constrained JSON decoding.
+#
+# A (restricted) JSON schema is compiled into a fixed sequence of segments: literal
+# text (braces, keys and separators) and value slots (enum strings, bounded
+# strings, "#rrggbb" colors, bounded integers and arrays of those). Decoding state
+# is (segment index, segment data), so checking whether a candidate token keeps the
+# output a valid prefix is a short walk over its characters.
+
+# Phaser key names the generated games can bind
+KEY_NAMES = ("UP", "DOWN", "LEFT", "RIGHT", "SPACE") + tuple(chr(code) for code in range(ord("A"), ord("Z") + 1))
+
+
+def _keys_schema(min_items, max_items):
+    return {"type": "array", "items": {"enum": list(KEY_NAMES)}, "minItems": min_items, "maxItems": max_items}
+
+
+def game_logic_schema(game_types):
+    """JSON schema for model-generated game logic (all properties required, in order)
+
+    Besides the required keys it covers every field the game generators read,
+    so model games get their own board size, symbols, keys and colors.
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "gameType": {"enum": list(game_types)},
+            "name": {"type": "string", "minLength": 1, "maxLength": 40},
+            "description": {"type": "string", "minLength": 1, "maxLength": 160},
+            "board": {
+                "type": "object",
+                "properties": {
+                    "size": {"type": "integer", "minimum": 3, "maximum": 8},
+                },
+            },
+            "players": {
+                "type": "object",
+                "properties": {
+                    "symbols": {
+                        "type": "array",
+                        "items": {"type": "string", "minLength": 1, "maxLength": 3},
+                        "minItems": 2,
+                        "maxItems": 2,
+                    },
+                },
+            },
+            "controls": {
+                "type": "object",
+                "properties": {
+                    "keys": _keys_schema(2, 4),
+                    "player1": _keys_schema(2, 2),
+                    "player2": _keys_schema(2, 2),
+                },
+            },
+            "rules": {
+                "type": "object",
+                "properties": {
+                    "winCondition": {"type": "string", "minLength": 1, "maxLength": 120},
+                },
+            },
+            "assets": {
+                "type": "object",
+                "properties": {
+                    "background": {"type": "string", "format": "color"},
+                    "bricks": {"type": "integer", "minimum": 1, "maximum": 8},
+                    "collectibles": {"type": "integer", "minimum": 1, "maximum": 50},
+                },
+            },
+        },
+    }
+
+
+_DONE = object()
+# The slot ended just before this character, which belongs to the next segment
+_PASS = object()
+
+
+class Literal:
+    def __init__(self, text):
+        self.text = text
+        self.initial = 0
+        self.max_length = len(text)
+
+    def step(self, offset, char):
+        if char != self.text[offset]:
+            return None
+        offset += 1
+        return _DONE if offset == len(self.text) else offset
+
+
+class StringSlot:
+    """A JSON string of bounded length; quotes, backslashes and control characters are excluded"""
+
+    def __init__(self, min_length=1, max_length=64):
+        self.min_length = min_length
+        self.max_length_chars = max_length
+        self.initial = -1
+        self.max_length = max_length + 2
+
+    def step(self, length, char):
+        if length < 0:
+            return 0 if char == '"' else None
+        if char == '"':
+            return _DONE if length >= self.min_length else None
+        if char == "\\" or ord(char) < 0x20 or length >= self.max_length_chars:
+            return None
+        return length + 1
+
+
+class EnumSlot:
+    """A JSON string restricted to one of a fixed set of values"""
+
+    def __init__(self, values):
+        self.values = tuple(values)
+        self.initial = None
+        self.max_length = max(len(value) for value in self.values) + 2
+
+    def step(self, content, char):
+        if content is None:
+            return "" if char == '"' else None
+        if char == '"':
+            return _DONE if content in self.values else None
+        content += char
+        return content if any(value.startswith(content) for value in self.values) else None
+
+
+class ColorSlot:
+    """A JSON string holding a "#rrggbb" hex color"""
+
+    initial = 0
+    max_length = 9
+
+    def step(self, length, char):
+        if length == 0:
+            return 1 if char == '"' else None
+        if length == 1:
+            return 2 if char == "#" else None
+        if length < 8:
+            return length + 1 if char in "0123456789abcdefABCDEF" else None
+        return _DONE if char == '"' else None
+
+
+class IntegerSlot:
+    """A non-negative JSON integer in [minimum, maximum], ended by the next non-digit"""
+
+    def __init__(self, minimum=0, maximum=99):
+        if minimum < 0:
+            raise ValueError("IntegerSlot only supports non-negative ranges")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.initial = ""
+        self.max_length = len(str(maximum))
+
+    def _reachable(self, value):
+        """True if value, or value followed by more digits, can land in range"""
+        low = high = value
+        while low <= self.maximum:
+            if high >= self.minimum:
+                return True
+            low, high = low * 10, high * 10 + 9
+        return False
+
+    def step(self, digits, char):
+        if char in "0123456789":
+            if digits == "0":
+                return None
+            digits += char
+            return digits if self._reachable(int(digits)) else None
+        if digits and self.minimum <= int(digits) <= self.maximum:
+            return _PASS
+        return None
+
+
+class ArraySlot:
+    """A JSON array of min_items to max_items values, separated by ", " """
+
+    def __init__(self, item, min_items=1, max_items=4):
+        self.item = item
+        self.min_items = min_items
+        self.max_items = max_items
+        self.initial = ("[", 0, None)
+        self.max_length = 2 + max_items * item.max_length + 2 * (max_items - 1)
+
+    def step(self, data, char):
+        expect, count, item_data = data
+        if expect == "[":
+            return ("first", 0, self.item.initial) if char == "[" else None
+        if expect == "first" and char == "]" and self.min_items == 0:
+            return _DONE
+        if expect in ("first", "value"):
+            item_data = self.item.step(item_data, char)
+            if item_data is None:
+                return None
+            if item_data is _DONE:
+                return ("next", count + 1, None)
+            if item_data is not _PASS:
+                return ("value", count, item_data)
+            # The item ended on this character; it must be a separator
+            expect, count = "next", count + 1
+        if expect == "next":
+            if char == "," and count < self.max_items:
+                return (" ", count, None)
+            if char == "]" and count >= self.min_items:
+                return _DONE
+            return None
+        return ("value", count, self.item.initial) if char == " " else None
+
+
+def _slot(schema):
+    if "enum" in schema:
+        return EnumSlot(schema["enum"])
+    if schema.get("type") == "string" and schema.get("format") == "color":
+        return ColorSlot()
+    if schema.get("type") == "string":
+        return StringSlot(schema.get("minLength", 1), schema.get("maxLength", 64))
+    if schema.get("type") == "integer":
+        return IntegerSlot(schema.get("minimum", 0), schema.get("maximum", 99))
+    if schema.get("type") == "array":
+        return ArraySlot(_slot(schema["items"]), schema.get("minItems", 1), schema.get("maxItems", 4))
+    raise ValueError(f"Unsupported schema: {schema!r}")
+
+
+def _compile(schema, segments):
+    if schema.get("type") == "object":
+        segments.append(Literal("{"))
+        for i, (key, value_schema) in enumerate(schema["properties"].items()):
+            segments.append(Literal(("" if i == 0 else ", ") + json.dumps(key) + ": "))
+            _compile(value_schema, segments)
+        segments.append(Literal("}"))
+    else:
+        segments.append(_slot(schema))
+
+
+def _merge_literals(segments):
+    merged = []
+    for segment in segments:
+        if isinstance(segment, Literal) and merged and isinstance(merged[-1], Literal):
+            merged[-1] = Literal(merged[-1].text + segment.text)
+        else:
+            merged.append(segment)
+    return merged
+
+
+class JsonGrammar:
+    """Prefix recognizer for the JSON documents described by a schema"""
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.max_length = sum(segment.max_length for segment in segments)
+
+    @classmethod
+    def from_schema(cls, schema):
+        segments = []
+        _compile(schema, segments)
+        return cls(_merge_literals(segments))
+
+    @property
+    def initial(self):
+        return (0, self.segments[0].initial)
+
+    def is_complete(self, state):
+        return state is not None and state[0] == len(self.segments)
+
+    def advance(self, state, text):
+        """Return the state after consuming text, or None if text breaks the grammar"""
+        index, data = state
+        for char in text:
+            # Whitespace is allowed only before the opening brace
+            if index == 0 and data == self.segments[0].initial and char.isspace():
+                continue
+            while True:
+                if index == len(self.segments):
+                    return None
+                data = self.segments[index].step(data, char)
+                if data is None:
+                    return None
+                if data is not _DONE and data is not _PASS:
+                    break
+                # An integer slot ends on the following character, which is fed to the next segment
+                passed = data is _PASS
+                index += 1
+                data = self.segments[index].initial if index < len(self.segments) else None
+                if not passed:
+                    break
+        return (index, data)
+
+    def accepts(self, text):
+        """True if text is exactly one complete document"""
+        return self.is_complete(self.advance(self.initial, text))
+
+
+def token_strings(tokenizer):
+    """Decode every vocabulary id once; unusable tokens map to None"""
+    strings = []
+    for token_id in range(len(tokenizer)):
+        text = tokenizer.decode([token_id])
+        # Empty strings and partial UTF-8 sequences cannot be checked character by character
+        strings.append(text if text and "\ufffd" not in text else None)
+    return strings
+
+
+class JsonGrammarLogitsProcessor:
+    """transformers logits processor allowing only tokens that keep output grammatical
+
+    Candidates are checked in descending score order and only the best
+    max_allowed valid tokens survive, so each step checks a handful of tokens
+    rather than the whole vocabulary. Once the object is closed only EOS is allowed.
+    """
+
+    def __init__(self, grammar, strings, eos_token_id, prompt_length, max_allowed=1, search_limit=4096):
+        self.grammar = grammar
+        self.strings = strings
+        self.eos_token_id = eos_token_id
+        self.prompt_length = prompt_length
+        self.max_allowed = max_allowed
+        self.search_limit = search_limit
+        self._states = {}
+
+    def _state(self, row, generated):
+        consumed, state = self._states.get(row, (0, self.grammar.initial))
+        for token_id in generated[consumed:]:
+            if state is None or self.grammar.is_complete(state):
+                break
+            text = self.strings[token_id] if token_id < len(self.strings) else None
+            state = self.grammar.advance(state, text) if text is not None else None
+        self._states[row] = (len(generated), state)
+        return state
+
+    def _allowed(self, state, order):
+        allowed = []
+        for token_id in order:
+            text = self.strings[token_id] if token_id < len(self.strings) else None
+            if text is not None and self.grammar.advance(state, text) is not None:
+                allowed.append(token_id)
+                if len(allowed) >= self.max_allowed:
+                    break
+        return allowed
+
+    def __call__(self, input_ids, scores):
+        import torch
+
+        masked = torch.full_like(scores, float("-inf"))
+        for row in range(input_ids.shape[0]):
+            state = self._state(row, input_ids[row, self.prompt_length:].tolist())
+            if state is None or self.grammar.is_complete(state):
+                masked[row, self.eos_token_id] = 0.0
+                continue
+            order = torch.argsort(scores[row], descending=True).tolist()
+            allowed = self._allowed(state, order[:self.search_limit]) or self._allowed(
+                state, order[self.search_limit:]
+            )
+            if not allowed:
+                masked[row, self.eos_token_id] = 0.0
+                continue
+            masked[row, allowed] = scores[row, allowed]
+        return masked
@@ -0,0 +1,125 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+def prefix_key(token_ids):
+    """Hash a sequence of prefix token ids"""
+    return hashlib.sha1(",".join(map(str, token_ids)).encode("ascii")).hexdigest()
+
+
+def to_legacy(past_key_values):
+    """Normalize model cache output to the immutable tuple-of-tuples layout"""
+    if hasattr(past_key_values, "to_legacy_cache"):
+        return past_key_values.to_legacy_cache()
+    return past_key_values
+
+
+def expand_past(past_key_values, batch_size):
+    """Broadcast a batch-1 cache to batch_size rows without copying"""
+    if batch_size == 1:
+        return past_key_values
+    return tuple(
+        tuple(tensor.expand(batch_size, *tensor.shape[1:]) for tensor in layer)
+        for layer in past_key_values
+    )
+
+
+class PrefixKVCache:
+    """Bounded LRU of past_key_values for shared prompt prefixes, keyed by token hash
+
+    Stored caches are never mutated: generation concatenates onto them, producing
+    new tensors, so one entry can seed any number of requests.
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            past = self._entries.get(key)
+            if past is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return past
+
+    def put(self, key, past_key_values):
+        with self._lock:
+            self._entries[key] = past_key_values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, model, prefix_ids):
+        """Return (past_key_values, hit) for a (1, n) tensor of prefix token ids"""
+        import torch
+
+        key = prefix_key(prefix_ids[0].tolist())
+        past = self.get(key)
+        if past is not None:
+            return past, True
+        with torch.inference_mode():
+            past = to_legacy(model(input_ids=prefix_ids, use_cache=True).past_key_values)
+        self.put(key, past)
+        return past, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class FirstTokenTimer:
+    """Logits processor that records when the first new token's logits are ready"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at = None
+
+    def __call__(self, input_ids, scores):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        return scores
+
+    @property
+    def seconds(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+
+class TTFTStats:
+    """Time-to-first-token samples, split by prefix cache hit and miss"""
+
+    def __init__(self, window=1024):
+        self.samples = {"cached": deque(maxlen=window), "uncached": deque(maxlen=window)}
+
+    def record(self, seconds, cached):
+        if seconds is not None:
+            self.samples["cached" if cached else "uncached"].append(seconds)
+
+    def stats(self):
+        report = {}
+        for name, samples in self.samples.items():
+            values = sorted(samples)
+            report[name] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else None,
+                "p50_ms": round(values[len(values) // 2] * 1000, 3) if values else None,
+            }
+        return report
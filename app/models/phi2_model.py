@@ -1,12 +1,23 @@
 import json
+import threading
+import time
 
-# Comment out the actual model loading
-# print("Loading Phi-2 model...")
-# from transformers import pipeline
-# pipe = pipeline("text-generation", model="microsoft/phi-2")
-# print("Phi-2 model loaded successfully!")
+from app import config
+from app.models.batching import MicroBatcher
+from app.models.retrieval import FewShotIndex, format_examples
+from app.models.quantization import QUANTIZE_MODES, checkpoint_fingerprint, load_or_quantize
+from app.models.streaming import TokenStreamer
+from app.models.client import RemoteEngine
+from app.models.classifier import KeywordMatcher
+from app.models.kv_cache import FirstTokenTimer, PrefixKVCache, TTFTStats, expand_past
+from app.models.constrained import JsonGrammar, JsonGrammarLogitsProcessor, game_logic_schema, token_strings
 
-print("Using template-based game generation (Phi-2 model simulation)")
+# The Phi-2 model is loaded lazily by Phi2Engine (see get_engine) so that importing
+# this module never pulls multi-GB weights into every worker process
+if config.MODEL_ENABLED:
+    print(f"Using Phi-2 game generation ({config.MODEL_NAME}) with template fallback")
+else:
+    print("Using template-based game generation (Phi-2 model simulation)")
 
 # Template game logics
 GAME_TEMPLATES = {
@@ -89,23 +100,456 @@ GAME_TEMPLATES = {
     }
 }
 
+# Weighted prompt keywords for each GAME_TEMPLATES entry. Kept out of the
+# templates themselves so they never end up in the served game logic.
+TEMPLATE_KEYWORDS = {
+    "tic": {
+        "tic tac toe": 3, "tic-tac-toe": 3, "tictactoe": 3, "noughts and crosses": 3,
+        "tic": 1, "tac": 1, "toe": 1,
+    },
+    "snake": {"snake": 2, "snakes": 2, "serpent": 1},
+    "pong": {"pong": 2, "ping pong": 1, "paddle": 1, "paddles": 1},
+    "breakout": {"breakout": 2, "arkanoid": 2, "brick": 1, "bricks": 1},
+}
+
+# Used when no keyword matches
+DEFAULT_TEMPLATE = "tic"
+
+TEMPLATE_MATCHER = KeywordMatcher(TEMPLATE_KEYWORDS)
+
+# Keys every generated game logic object must contain
+REQUIRED_KEYS = ("gameType", "name", "description", "rules", "assets")
+
+GAME_TYPES = sorted({template["gameType"] for template in GAME_TEMPLATES.values()})
+
+# Grammar used by constrained decoding: required keys, gameType enum, bounded strings,
+# plus the board, players, controls and assets fields the game generators read
+GAME_LOGIC_GRAMMAR = JsonGrammar.from_schema(game_logic_schema(GAME_TYPES))
+
+INSTRUCTION = (
+    "Instruct: Convert the game request into a single JSON object describing the game logic. "
+    f"Use the keys {', '.join(REQUIRED_KEYS)}. "
+    f"gameType must be one of {', '.join(GAME_TYPES)}. "
+    "rules and assets are JSON objects. "
+    "board.size, players.symbols, controls.keys and assets.background (a #rrggbb color) "
+    "customize the game; keys are Phaser key names such as UP or W. Output only the JSON object.\n"
+)
+
+
+def build_prefix(examples=()):
+    """The shared part of the model input: instructions plus few-shot examples"""
+    return f"{INSTRUCTION}{format_examples(examples)}"
+
+
+def build_request(prompt):
+    """The per-request part of the model input"""
+    return f"Request: {prompt.strip()}\nOutput: "
+
+
+def build_prompt(prompt, examples=()):
+    """Build the model input for a game request, with optional few-shot examples"""
+    return build_prefix(examples) + build_request(prompt)
+
+
+def parse_game_logic(text):
+    """Extract and validate the first JSON object in model output, or return None"""
+    start = text.find("{")
+    if start < 0:
+        return None
+    try:
+        game_logic, _ = json.JSONDecoder().raw_decode(text[start:])
+    except json.JSONDecodeError:
+        return None
+    return game_logic if is_valid_game_logic(game_logic) else None
+
+
+def is_valid_game_logic(game_logic):
+    """Check that game logic has the required keys and a known gameType"""
+    return (
+        isinstance(game_logic, dict)
+        and all(key in game_logic for key in REQUIRED_KEYS)
+        and game_logic["gameType"] in GAME_TYPES
+        and isinstance(game_logic["rules"], dict)
+        and isinstance(game_logic["assets"], dict)
+    )
+
+
+class Phi2Engine:
+    """Lazily loaded causal LM that turns prompts into game logic JSON"""
+
+    DTYPES = ("float32", "bfloat16", "float16")
+
+    def __init__(self, model_name="microsoft/phi-2", dtype="float32", device="cpu", num_threads=0,
+                 max_new_tokens=256, trust_remote_code=True, constrained=True, prefix_cache_entries=4,
+                 quantize="none", quantized_cache_dir="model_cache"):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}, expected one of {', '.join(self.DTYPES)}")
+        if quantize not in QUANTIZE_MODES:
+            raise ValueError(f"Unsupported quantize mode {quantize!r}, expected one of {', '.join(QUANTIZE_MODES)}")
+        if quantize == "int8" and (dtype != "float32" or device != "cpu"):
+            raise ValueError("int8 quantization needs dtype float32 on the cpu device")
+        self.model_name = model_name
+        self.dtype = dtype
+        self.device = device
+        self.num_threads = num_threads
+        self.max_new_tokens = max_new_tokens
+        self.trust_remote_code = trust_remote_code
+        self.constrained = constrained
+        self.quantize = quantize
+        self.quantized_cache_dir = quantized_cache_dir
+        self.loaded_from_cache = False
+        # past_key_values of shared prompt prefixes; 0 entries disables reuse
+        self.prefix_cache = PrefixKVCache(prefix_cache_entries) if prefix_cache_entries > 0 else None
+        self.ttft = TTFTStats()
+        self.model = None
+        self.tokenizer = None
+        self.load_seconds = None
+        self.error = None
+        self._token_strings = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.model is not None
+
+    def load(self):
+        """Load the tokenizer and model once; safe to call from several threads"""
+        if self.model is not None:
+            return
+        with self._lock:
+            if self.model is not None:
+                return
+            started = time.perf_counter()
+            try:
+                import torch
+                from transformers import AutoModelForCausalLM, AutoTokenizer
+
+                if self.num_threads:
+                    torch.set_num_threads(self.num_threads)
+                print(f"Loading Phi-2 model from {self.model_name}...")
+                tokenizer = AutoTokenizer.from_pretrained(
+                    self.model_name, trust_remote_code=self.trust_remote_code
+                )
+                if tokenizer.pad_token is None:
+                    tokenizer.pad_token = tokenizer.eos_token
+                # Left padding keeps every prompt in a batch flush against its generated tokens
+                tokenizer.padding_side = "left"
+
+                def load_pretrained():
+                    return AutoModelForCausalLM.from_pretrained(
+                        self.model_name,
+                        torch_dtype=getattr(torch, self.dtype),
+                        trust_remote_code=self.trust_remote_code,
+                        low_cpu_mem_usage=True,
+                    )
+
+                if self.quantize == "int8":
+                    from transformers import AutoConfig
+                    from transformers.modeling_utils import no_init_weights
+
+                    model_config = AutoConfig.from_pretrained(
+                        self.model_name, trust_remote_code=self.trust_remote_code
+                    )
+
+                    def build_empty():
+                        # Random init is wasted work: every weight comes from the cache
+                        with no_init_weights():
+                            return AutoModelForCausalLM.from_config(
+                                model_config,
+                                torch_dtype=getattr(torch, self.dtype),
+                                trust_remote_code=self.trust_remote_code,
+                            )
+
+                    model, self.loaded_from_cache = load_or_quantize(
+                        self.model_name, load_pretrained, build_empty, self.quantized_cache_dir,
+                        checkpoint_fingerprint(self.model_name, model_config),
+                    )
+                else:
+                    model = load_pretrained()
+                model.to(self.device)
+                model.eval()
+            except Exception as e:
+                self.error = str(e)
+                raise
+            self.tokenizer = tokenizer
+            self.model = model
+            self.error = None
+            self.load_seconds = time.perf_counter() - started
+            print(f"Phi-2 model loaded successfully in {self.load_seconds:.1f}s!")
+
+    def warmup(self):
+        """Load the model and run one short generation to prime kernels and caches"""
+        self.load()
+        get_few_shot_index().refresh(force=True)
+        # Seeds the prefix KV cache with the instruction block and a popular example set
+        self.generate_texts(
+            [build_request("tic tac toe")],
+            max_new_tokens=1,
+            prefixes=[build_prefix(few_shot_examples("tic tac toe"))],
+        )
+
+    def generate_text(self, text, max_new_tokens=None):
+        """Greedy-decode a continuation of text and return only the new text"""
+        return self.generate_texts([text], max_new_tokens)[0]
+
+    def token_strings(self):
+        """Decoded text of every vocabulary token, computed once per engine"""
+        if self._token_strings is None:
+            self._token_strings = token_strings(self.tokenizer)
+        return self._token_strings
+
+    def generate_texts(self, texts, max_new_tokens=None, grammar=None, prefixes=None, streamer=None):
+        """Greedy-decode a padded batch of texts in one generate call
+
+        With prefixes, each text is the part following its prefix. Prefix attention
+        state is reused from the prefix KV cache, and texts sharing a prefix are
+        decoded together. With a grammar, only tokens that keep each output a valid
+        prefix of the grammar are allowed and decoding stops as soon as the
+        document closes.
+        """
+        self.load()
+        if prefixes is None:
+            inputs = self.tokenizer(texts, return_tensors="pt", padding=True).to(self.device)
+            return self._generate(inputs, None, False, max_new_tokens, grammar, streamer=streamer)
+        if self.prefix_cache is None:
+            full_texts = [prefix + text for prefix, text in zip(prefixes, texts)]
+            return self.generate_texts(full_texts, max_new_tokens, grammar, streamer=streamer)
+
+        results = [None] * len(texts)
+        groups = {}
+        for i, prefix in enumerate(prefixes):
+            groups.setdefault(prefix, []).append(i)
+        for prefix, rows in groups.items():
+            outputs = self._generate_with_prefix(prefix, [texts[i] for i in rows], max_new_tokens, grammar, streamer)
+            for i, output in zip(rows, outputs):
+                results[i] = output
+        return results
+
+    def _generate_with_prefix(self, prefix, texts, max_new_tokens, grammar, streamer=None):
+        import torch
+
+        prefix_ids = self.tokenizer(prefix, return_tensors="pt")["input_ids"].to(self.device)
+        started = time.perf_counter()
+        past, hit = self.prefix_cache.get_or_compute(self.model, prefix_ids)
+        suffix = self.tokenizer(texts, return_tensors="pt", padding=True, add_special_tokens=False).to(self.device)
+        batch_size = suffix["input_ids"].shape[0]
+        # Padding sits between the shared prefix and each request; the mask hides it
+        inputs = {
+            "input_ids": torch.cat([prefix_ids.expand(batch_size, -1), suffix["input_ids"]], dim=1),
+            "attention_mask": torch.cat(
+                [torch.ones_like(prefix_ids).expand(batch_size, -1), suffix["attention_mask"]], dim=1
+            ),
+        }
+        return self._generate(inputs, expand_past(past, batch_size), hit, max_new_tokens, grammar, started,
+                              streamer=streamer)
+
+    def _generate(self, inputs, past_key_values, cached, max_new_tokens, grammar, started=None, streamer=None):
+        import torch
+        from transformers import LogitsProcessorList
+
+        max_new_tokens = max_new_tokens or self.max_new_tokens
+        timer = FirstTokenTimer()
+        if started is not None:
+            timer.started = started
+        logits_processor = LogitsProcessorList([timer])
+        if grammar is not None:
+            logits_processor.append(JsonGrammarLogitsProcessor(
+                grammar, self.token_strings(), self.tokenizer.eos_token_id, inputs["input_ids"].shape[1]
+            ))
+            # Every character is at least one token, so the grammar bounds the output length
+            max_new_tokens = min(max_new_tokens, grammar.max_length + 1)
+        extra = {"past_key_values": past_key_values} if past_key_values is not None else {}
+        with torch.inference_mode():
+            output = self.model.generate(
+                **inputs,
+                **extra,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id,
+                logits_processor=logits_processor,
+                streamer=streamer,
+            )
+        self.ttft.record(timer.seconds, cached)
+        new_tokens = output[:, inputs["input_ids"].shape[1]:]
+        return self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+
+    def generate_logic(self, prompt):
+        """Generate game logic for a prompt, or None if the output is not valid"""
+        return self.generate_logic_batch([prompt])[0]
+
+    def generate_logic_batch(self, prompts):
+        """Generate game logic for several prompts at once (None where output is invalid)"""
+        grammar = GAME_LOGIC_GRAMMAR if self.constrained else None
+        texts = self.generate_texts(
+            [build_request(prompt) for prompt in prompts],
+            grammar=grammar,
+            prefixes=[build_prefix(few_shot_examples(prompt)) for prompt in prompts],
+        )
+        return [parse_game_logic(text) for text in texts]
+
+    def stream_logic(self, prompt):
+        """Start generating game logic in a background thread and return a TokenStreamer
+
+        Iterating the streamer yields decoded text as soon as each token is produced;
+        the streamer's error attribute is set if generation failed.
+        """
+        self.load()
+        streamer = TokenStreamer(self.tokenizer)
+        grammar = GAME_LOGIC_GRAMMAR if self.constrained else None
+
+        def run():
+            try:
+                self.generate_texts(
+                    [build_request(prompt)],
+                    grammar=grammar,
+                    prefixes=[build_prefix(few_shot_examples(prompt))],
+                    streamer=streamer,
+                )
+            except Exception as e:
+                streamer.fail(e)
+
+        threading.Thread(target=run, name="ai2d-stream", daemon=True).start()
+        return streamer
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "model": self.model_name,
+            "dtype": self.dtype,
+            "device": self.device,
+            "num_threads": self.num_threads,
+            "constrained": self.constrained,
+            "quantize": self.quantize,
+            "loaded_from_cache": self.loaded_from_cache,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+            "prefix_cache": self.prefix_cache.stats() if self.prefix_cache is not None else None,
+            "time_to_first_token": self.ttft.stats(),
+        }
+
+
+_engine = None
+_batcher = None
+_few_shot_index = None
+_engine_lock = threading.Lock()
+
+
+def create_engine():
+    """Build a local Phi2Engine from config"""
+    return Phi2Engine(
+        model_name=config.MODEL_NAME,
+        dtype=config.MODEL_DTYPE,
+        device=config.MODEL_DEVICE,
+        num_threads=config.MODEL_NUM_THREADS,
+        max_new_tokens=config.MODEL_MAX_NEW_TOKENS,
+        trust_remote_code=config.MODEL_TRUST_REMOTE_CODE,
+        constrained=config.MODEL_CONSTRAINED_DECODING,
+        prefix_cache_entries=config.MODEL_PREFIX_CACHE_ENTRIES,
+        quantize=config.MODEL_QUANTIZE,
+        quantized_cache_dir=config.MODEL_QUANTIZED_CACHE_DIR,
+    )
+
+
+def get_engine():
+    """Return the process-wide engine, creating it from config on first use
+
+    With AI2D_MODEL_SERVER_SOCKET set this is a RemoteEngine talking to the model
+    server process instead of a local copy of the model.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if config.MODEL_SERVER_SOCKET:
+                    _engine = RemoteEngine(config.MODEL_SERVER_SOCKET, config.MODEL_SERVER_AUTHKEY)
+                else:
+                    _engine = create_engine()
+    return _engine
+
+
+def set_engine(engine):
+    """Install the process-wide engine (used by the model server)"""
+    global _engine
+    with _engine_lock:
+        _engine = engine
+
+
+def get_batcher():
+    """Return the process-wide micro-batcher feeding prompts to the engine"""
+    global _batcher
+    if _batcher is None:
+        with _engine_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    lambda prompts: get_engine().generate_logic_batch(prompts),
+                    max_batch_size=config.MODEL_BATCH_SIZE,
+                    max_wait_ms=config.MODEL_BATCH_WAIT_MS,
+                    max_queue=config.MODEL_BATCH_QUEUE,
+                )
+    return _batcher
+
+
+def get_few_shot_index():
+    """Return the process-wide few-shot example index over phi2.json"""
+    global _few_shot_index
+    if _few_shot_index is None:
+        with _engine_lock:
+            if _few_shot_index is None:
+                _few_shot_index = FewShotIndex(
+                    config.MODEL_FEW_SHOT_PATH, check_interval=config.MODEL_FEW_SHOT_CHECK_SECONDS
+                )
+    return _few_shot_index
+
+
+def few_shot_examples(prompt):
+    """Top-k curated examples most similar to the prompt"""
+    if config.MODEL_FEW_SHOT_K <= 0:
+        return []
+    return get_few_shot_index().search(prompt, config.MODEL_FEW_SHOT_K)
+
+
+def model_game_logic(prompt):
+    """Generate game logic with the engine, through the micro-batcher when enabled"""
+    if config.MODEL_BATCHING:
+        return get_batcher().submit(prompt).result()
+    return get_engine().generate_logic(prompt)
+
+
+def classify_prompt(prompt):
+    """Return (template key, confidence) for a prompt"""
+    return TEMPLATE_MATCHER.classify(prompt, default=DEFAULT_TEMPLATE)
+
+
+def template_shortcut(prompt):
+    """Template game logic for a prompt that clearly matches one, or None if it should go to Phi-2"""
+    if not config.TEMPLATE_MIN_CONFIDENCE:
+        return None
+    template, confidence = classify_prompt(prompt)
+    if confidence < config.TEMPLATE_MIN_CONFIDENCE:
+        return None
+    print(f"Prompt clearly matches template {template} ({confidence}), skipping Phi-2")
+    return GAME_TEMPLATES[template]
+
+
 def generate_game_logic(prompt):
+    """Generate game logic JSON from a text prompt with Phi-2, falling back to templates"""
+    if config.MODEL_ENABLED:
+        game_logic = template_shortcut(prompt)
+        if game_logic is not None:
+            return game_logic
+        try:
+            game_logic = model_game_logic(prompt)
+            if game_logic:
+                return game_logic
+            print(f"Phi-2 output was not valid game logic for prompt: {prompt}")
+        except Exception as e:
+            print(f"Phi-2 generation failed, using templates: {e}")
+    return generate_template_game_logic(prompt)
+
+
+def generate_template_game_logic(prompt):
     """Generate game logic JSON from a text prompt using templates instead of Phi-2 model"""
-    
-    prompt_lower = prompt.lower()
-    
-    # Select template based on keywords in prompt
-    if "tic" in prompt_lower or "tac" in prompt_lower or "toe" in prompt_lower:
-        template = "tic"
-    elif "snake" in prompt_lower:
-        template = "snake"
-    elif "pong" in prompt_lower or "paddle" in prompt_lower:
-        template = "pong"
-    elif "breakout" in prompt_lower or "brick" in prompt_lower or "arkanoid" in prompt_lower:
-        template = "breakout"
-    else:
-        # Default to tic-tac-toe if no match
-        template = "tic"
-    
-    print(f"Using template: {template} for prompt: {prompt}")
-    return GAME_TEMPLATES[template] 
\ No newline at end of file
+    template, confidence = classify_prompt(prompt)
+    print(f"Using template: {template} (confidence {confidence}) for prompt: {prompt}")
+    return GAME_TEMPLATES[template]
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import tempfile
+
+# Dynamic int8 quantization of nn.Linear layers for CPU inference.
+#
+# Quantizing a 2.7B model takes a while, so the quantized weights are saved to
+# disk once. Later startups build the model skeleton from its config, quantize
+# it empty and load the saved weights into it (weights_only, so the cache file
+# cannot run code), skipping both the fp32 weight load and the re-quantization.
+# weights_only rejects quantized tensors and the qint8 dtype, so each int8
+# Linear is saved as plain tensors (int8 values, scale, zero point, bias) and
+# repacked on load. The cache key covers the exact checkpoint, so a new
+# revision or a changed local checkpoint is quantized afresh.
+
+QUANTIZE_MODES = ("none", "int8")
+
+# Weight files whose size and mtime identify a local checkpoint
+_WEIGHT_SUFFIXES = (".safetensors", ".bin", ".pt", ".pth")
+
+
+def checkpoint_fingerprint(model_name, model_config):
+    """Identify a checkpoint: its config, its hub commit and, for local paths, its weight files"""
+    h = hashlib.sha256(model_config.to_json_string(use_diff=False).encode("utf-8"))
+    h.update(f"commit={getattr(model_config, '_commit_hash', None)}".encode("utf-8"))
+    if os.path.isdir(model_name):
+        for name in sorted(os.listdir(model_name)):
+            if name.endswith(_WEIGHT_SUFFIXES):
+                st = os.stat(os.path.join(model_name, name))
+                h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def quantized_cache_path(cache_dir, model_name, fingerprint):
+    """Cache file for a model's int8 weights, keyed by checkpoint and library versions"""
+    import torch
+    import transformers
+
+    key = f"{model_name}|{fingerprint}|torch={torch.__version__}|transformers={transformers.__version__}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name.strip("/"))[-64:]
+    return os.path.join(cache_dir, f"{safe_name}-int8-{digest}.pt")
+
+
+def quantize_int8(model):
+    """Apply dynamic int8 quantization to every nn.Linear of an fp32 model"""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _int8_linears(model):
+    import torch
+
+    for name, module in model.named_modules():
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+            yield name, module
+
+
+def pack_state_dict(model):
+    """Split an int8 model's weights into plain tensors that weights_only can load"""
+    import torch
+
+    linears = {}
+    for name, module in _int8_linears(model):
+        weight, bias = module._weight_bias()
+        entry = {"int8": weight.int_repr()}
+        if weight.qscheme() in (torch.per_tensor_affine, torch.per_tensor_symmetric):
+            entry["scale"] = weight.q_scale()
+            entry["zero_point"] = weight.q_zero_point()
+        else:
+            entry["scale"] = weight.q_per_channel_scales()
+            entry["zero_point"] = weight.q_per_channel_zero_points()
+            entry["axis"] = weight.q_per_channel_axis()
+        if bias is not None:
+            entry["bias"] = bias.detach()
+        linears[name] = entry
+    state = {key: value for key, value in model.state_dict().items() if "._packed_params." not in f".{key}"}
+    return {"linears": linears, "state": state}
+
+
+def unpack_state_dict(model, packed):
+    """Load weights saved by pack_state_dict into a quantized model of the same architecture"""
+    import torch
+
+    state = dict(packed["state"])
+    for name, module in _int8_linears(model):
+        entry = packed["linears"][name]
+        if "axis" in entry:
+            weight = torch._make_per_channel_quantized_tensor(
+                entry["int8"], entry["scale"], entry["zero_point"], entry["axis"])
+        else:
+            weight = torch._make_per_tensor_quantized_tensor(entry["int8"], entry["scale"], entry["zero_point"])
+        prefix = f"{name}._packed_params." if name else "_packed_params."
+        state[prefix + "_packed_params"] = (weight, entry.get("bias"))
+        state[prefix + "dtype"] = torch.qint8
+    # Module versions decide how quantized layers read their entries
+    state = type(model.state_dict())(state)
+    state._metadata = model.state_dict()._metadata
+    model.load_state_dict(state)
+
+
+def load_or_quantize(model_name, load_fp32, build_empty, cache_dir, fingerprint):
+    """Return (int8 model, loaded_from_cache)
+
+    load_fp32 returns the pretrained fp32 model and is only called when no
+    cached weights exist; build_empty returns the same architecture without
+    loading weights, to receive the cached int8 weights.
+    """
+    import torch
+
+    path = quantized_cache_path(cache_dir, model_name, fingerprint)
+    if os.path.exists(path):
+        try:
+            packed = torch.load(path, map_location="cpu", weights_only=True)
+            model = quantize_int8(build_empty())
+            unpack_state_dict(model, packed)
+            model.eval()
+            return model, True
+        except Exception as e:
+            print(f"Ignoring unreadable quantized model cache {path}: {e}")
+
+    model = quantize_int8(load_fp32())
+    model.eval()
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp-", suffix=".pt")
+    os.close(fd)
+    try:
+        torch.save(pack_state_dict(model), tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        # A failed cache write only costs the next startup a re-quantization
+        print(f"Could not cache quantized model to {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return model, False
@@ -0,0 +1,138 @@
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from app.store import canonical_json
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def example_text(example):
+    """Flatten a phi2.json game spec into text for similarity search"""
+    parts = []
+    for value in example.values():
+        if isinstance(value, list):
+            parts.extend(str(item) for item in value)
+        else:
+            parts.append(str(value))
+    return " ".join(parts).replace("_", " ").lower()
+
+
+class FewShotIndex:
+    """TF-IDF index over hashed word and character n-grams of curated game specs
+
+    Rows are L2-normalized, so a prompt's top-k examples are a single
+    matrix-vector product. The source file is re-read when its mtime changes and
+    only new or edited examples are re-featurized.
+    """
+
+    def __init__(self, path, dim=4096, char_ngrams=(3, 4, 5), check_interval=5.0):
+        self.path = path
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._features = {}
+        # (examples, idf, normalized matrix) swapped in as one tuple
+        self._index = ([], np.ones(dim, dtype=np.float32), np.zeros((0, dim), dtype=np.float32))
+        self.builds = 0
+        self.featurized = 0
+
+    def _bucket(self, feature):
+        return zlib.crc32(feature.encode("utf-8")) % self.dim
+
+    def term_frequencies(self, text):
+        """Hashed bag of words plus character n-grams as a dense vector"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        text = text.lower()
+        for word in _WORD.findall(text):
+            vector[self._bucket("w:" + word)] += 1.0
+        padded = f" {' '.join(_WORD.findall(text))} "
+        for n in self.char_ngrams:
+            for i in range(len(padded) - n + 1):
+                vector[self._bucket(padded[i:i + n])] += 1.0
+        # Sublinear tf keeps long specs from dominating
+        np.log1p(vector, out=vector)
+        return vector
+
+    def refresh(self, force=False):
+        """Rebuild the index if the examples file changed since the last build"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return False
+            if not force and mtime == self._mtime:
+                return False
+            with open(self.path, "r") as f:
+                examples = json.load(f)
+            self._build(examples)
+            self._mtime = mtime
+            return True
+
+    def _build(self, examples):
+        features = {}
+        rows = []
+        for example in examples:
+            key = canonical_json(example)
+            vector = self._features.get(key)
+            if vector is None:
+                vector = self.term_frequencies(example_text(example))
+                self.featurized += 1
+            features[key] = vector
+            rows.append(vector)
+        self._features = features
+
+        tf = np.vstack(rows) if rows else np.zeros((0, self.dim), dtype=np.float32)
+        document_frequency = (tf > 0).sum(axis=0)
+        idf = (np.log((1.0 + len(rows)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        matrix = tf * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+        self._index = (list(examples), idf, matrix)
+        self.builds += 1
+
+    def search(self, prompt, k=2):
+        """Return the k examples most similar to prompt, best first"""
+        self.refresh()
+        examples, idf, matrix = self._index
+        if k <= 0 or not examples:
+            return []
+        query = self.term_frequencies(prompt) * idf
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return []
+        scores = matrix @ (query / norm)
+        k = min(k, len(examples))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [examples[i] for i in top]
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "examples": len(self._index[0]),
+            "builds": self.builds,
+            "featurized": self.featurized,
+        }
+
+
+def format_examples(examples):
+    """Render retrieved examples as compact few-shot blocks for the prompt"""
+    blocks = []
+    for example in examples:
+        name = str(example.get("game_type", "game")).replace("_", " ")
+        blocks.append(f"Example request: {name}\nExample spec: {json.dumps(example, separators=(', ', ': '))}\n")
+    return "".join(blocks)
+
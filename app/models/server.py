@@ -0,0 +1,173 @@
+"""Local inference server that owns the Phi-2 model for all HTTP workers
+
+Usage:
+    python -m app.models.server --socket /tmp/ai2d-model.sock --replicas 2
+
+Then start uvicorn with AI2D_MODEL_ENABLED=1 AI2D_MODEL_SERVER_SOCKET=/tmp/ai2d-model.sock.
+The socket is only accessible to the user running the server, and requests
+must present the auth key: AI2D_MODEL_SERVER_AUTHKEY, or a random key written
+to <socket>.key (mode 0600) for clients running as the same user.
+The weights are loaded once in the parent and replicas are forked afterwards, so
+they share the weight pages copy-on-write instead of each holding a copy.
+"""
+import argparse
+import gc
+import os
+import secrets
+import signal
+import threading
+from multiprocessing.connection import Listener
+
+from app import config
+from app.models import phi2_model
+from app.models.client import authkey_path
+
+# Requests that run inference, and so hold one of the replica's inference slots
+INFERENCE_OPS = ("load", "generate_logic", "generate_logic_batch", "stream_logic")
+
+
+def handle(conn, engine, slots):
+    """Serve requests from one client connection until it closes"""
+    with conn:
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                return
+            op = request.get("op")
+            if op in INFERENCE_OPS:
+                with slots:
+                    if op == "stream_logic":
+                        stream(conn, engine, request["prompt"])
+                        continue
+                    reply = call(engine, op, request)
+            else:
+                reply = call(engine, op, request)
+            try:
+                conn.send(reply)
+            except OSError:
+                return
+
+
+def call(engine, op, request):
+    """Run one request/reply op; returns the reply message"""
+    try:
+        if op == "status":
+            result = dict(engine.status(), pid=os.getpid())
+        elif op == "load":
+            engine.load()
+            result = None
+        elif op == "generate_logic":
+            result = phi2_model.model_game_logic(request["prompt"])
+        elif op == "generate_logic_batch":
+            result = engine.generate_logic_batch(request["prompts"])
+        else:
+            raise ValueError(f"Unknown op {op!r}")
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "result": result}
+
+
+def stream(conn, engine, prompt):
+    streamer = None
+    try:
+        streamer = engine.stream_logic(prompt)
+        for chunk in streamer:
+            conn.send({"chunk": chunk})
+        conn.send({"end": True, "error": str(streamer.error) if streamer.error else None})
+    except Exception as e:
+        try:
+            conn.send({"end": True, "error": str(e)})
+        except OSError:
+            pass
+    finally:
+        # A client that went away must not keep the model decoding for nobody
+        if streamer is not None:
+            streamer.cancel()
+
+
+def serve_forever(listener, engine, max_concurrency=None):
+    """Accept connections on a (possibly shared) listener, one thread per connection
+
+    At most max_concurrency (default AI2D_MODEL_WORKERS) requests run inference
+    at once in this process; the others wait for a slot.
+    """
+    slots = threading.BoundedSemaphore(max_concurrency or config.MODEL_WORKERS)
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:
+            return
+        threading.Thread(target=handle, args=(conn, engine, slots), daemon=True).start()
+
+
+def server_authkey(socket, authkey=""):
+    """The configured auth key, or a new random one written to the socket's key file (mode 0600)"""
+    if authkey:
+        return authkey.encode("utf-8")
+    key = secrets.token_hex(32).encode("ascii")
+    path = authkey_path(socket)
+    if os.path.exists(path):
+        os.unlink(path)
+    # O_EXCL: never write the key into a file someone else created in the meantime
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def create_listener(socket, authkey):
+    """Listen on a Unix socket only the current user can connect to"""
+    if os.path.exists(socket):
+        os.unlink(socket)
+    # Created with mode 0600 from the start, rather than chmod-ed after bind
+    umask = os.umask(0o177)
+    try:
+        return Listener(socket, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(umask)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI2D Phi-2 model server")
+    parser.add_argument("--socket", default=config.MODEL_SERVER_SOCKET or "/tmp/ai2d-model.sock")
+    parser.add_argument("--replicas", type=int, default=config.MODEL_SERVER_REPLICAS)
+    parser.add_argument("--authkey", default=config.MODEL_SERVER_AUTHKEY)
+    args = parser.parse_args()
+
+    # Always a local engine here, whatever AI2D_MODEL_SERVER_SOCKET says
+    engine = phi2_model.create_engine()
+    phi2_model.set_engine(engine)
+    engine.load()
+    phi2_model.get_few_shot_index().refresh(force=True)
+
+    listener = create_listener(args.socket, server_authkey(args.socket, args.authkey))
+    print(f"Model server listening on {args.socket} with {args.replicas} replica(s)")
+
+    # Keep the loaded objects out of the GC's reach so collections in the
+    # replicas do not touch (and un-share) their pages
+    gc.freeze()
+    children = []
+    for _ in range(max(0, args.replicas - 1)):
+        pid = os.fork()
+        if pid == 0:
+            # Inference thread pools are created per process, after the fork
+            serve_forever(listener, engine)
+            os._exit(0)
+        children.append(pid)
+
+    try:
+        serve_forever(listener, engine)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        listener.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import queue
+
+_END = object()
+
+
+class StreamCancelled(Exception):
+    """Raised from put() to stop generate() once the reader has gone away"""
+
+
+class TokenStreamer:
+    """transformers streamer that hands decoded text to another thread token by token
+
+    Unlike TextIteratorStreamer, text is released after every token instead of at
+    word boundaries, so the first bytes go out one decode step after prefill.
+    Only incomplete multi-byte characters are held back.
+    """
+
+    def __init__(self, tokenizer, skip_prompt=True):
+        self.tokenizer = tokenizer
+        self.skip_prompt = skip_prompt
+        self.error = None
+        self.text = ""
+        self.cancelled = False
+        self._queue = queue.Queue()
+        self._token_ids = []
+        self._prompt_skipped = False
+
+    def put(self, value):
+        if self.cancelled:
+            raise StreamCancelled("Stream cancelled by its reader")
+        # generate() first passes the prompt ids, then one new token per step
+        if len(value.shape) > 1:
+            value = value[0]
+        if self.skip_prompt and not self._prompt_skipped:
+            self._prompt_skipped = True
+            return
+        self._token_ids.extend(value.tolist())
+        text = self.tokenizer.decode(self._token_ids, skip_special_tokens=True)
+        if text.endswith("\ufffd"):
+            return
+        delta = text[len(self.text):]
+        self.text = text
+        if delta:
+            self._queue.put(delta)
+
+    def end(self):
+        self._queue.put(_END)
+
+    def fail(self, error):
+        self.error = error
+        self._queue.put(_END)
+
+    def cancel(self):
+        """Stop generation at its next token and end the stream"""
+        self.cancelled = True
+        self._queue.put(_END)
+
+    def next_chunk(self, timeout=None):
+        """Block for the next text chunk; returns None once generation has ended"""
+        chunk = self._queue.get(timeout=timeout)
+        return None if chunk is _END else chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.next_chunk()
+            if chunk is None:
+                return
+            yield chunk
@@ -0,0 +1,36 @@
+import threading
+
+import pytest
+
+from app.models.batching import MicroBatcher
+
+
+def test_concurrent_items_share_a_batch():
+    release = threading.Event()
+    batches = []
+
+    def handler(items):
+        release.wait(1)
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(4)]
+    release.set()
+    assert [future.result(timeout=2) for future in futures] == [0, 2, 4, 6]
+    assert sum(len(batch) for batch in batches) == 4
+    stats = batcher.stats()
+    assert stats["requests"] == 4
+    assert sum(size * count for size, count in stats["batch_size_histogram"].items()) == 4
+    assert stats["queue_latency_ms"]["p99"] is not None
+
+
+def test_handler_errors_reach_every_caller():
+    def handler(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(handler, max_batch_size=2, max_wait_ms=10)
+    futures = [batcher.submit(i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(ValueError, match="boom"):
+            future.result(timeout=2)
@@ -0,0 +1,37 @@
+from app.models.classifier import KeywordMatcher
+from app.models.phi2_model import GAME_TEMPLATES, TEMPLATE_KEYWORDS, classify_prompt, generate_template_game_logic
+
+
+def test_every_template_has_keywords():
+    assert set(TEMPLATE_KEYWORDS) == set(GAME_TEMPLATES)
+
+
+def test_keywords_need_word_boundaries():
+    matcher = KeywordMatcher({"tic": {"tic": 1}, "snake": {"snake": 2}})
+    assert matcher.scores("a fantastic game") == {}
+    assert matcher.scores("tic, tac") == {"tic": 1}
+    assert matcher.scores("rattlesnake") == {}
+
+
+def test_overlapping_and_multi_word_keywords():
+    matcher = KeywordMatcher({"a": {"he": 1, "she": 2, "hers": 4}, "b": {"ping pong": 3, "pong": 1}})
+    assert matcher.scores("she and hers") == {"a": 6}
+    assert matcher.scores("Ping   Pong!") == {"b": 4}
+    assert matcher.scores("ping") == {}
+
+
+def test_confidence_and_ties():
+    matcher = KeywordMatcher({"x": {"one": 1}, "y": {"two": 2, "uno": 1}})
+    assert matcher.classify("nothing", default="x") == ("x", 0.0)
+    assert matcher.classify("two") == ("y", 1.0)
+    assert matcher.classify("one") == ("x", 0.5)
+    # Equal scores go to the label listed first
+    assert matcher.classify("one uno")[0] == "x"
+
+
+def test_template_selection():
+    assert classify_prompt("Make a fantastic snake game")[0] == "snake"
+    assert classify_prompt("Tic-Tac-Toe please") == ("tic", 1.0)
+    assert classify_prompt("breakout with a paddle")[0] == "breakout"
+    assert classify_prompt("a racing game") == ("tic", 0.0)
+    assert generate_template_game_logic("pong for two")["name"] == "Pong"
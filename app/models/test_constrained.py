@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from app.models.constrained import JsonGrammar, JsonGrammarLogitsProcessor, game_logic_schema
+from app.models.phi2_model import GAME_TYPES, is_valid_game_logic
+from app.templates.game_generator import generate_game_code
+
+GRAMMAR = JsonGrammar.from_schema(game_logic_schema(GAME_TYPES))
+
+VALID = (
+    '{"gameType": "continuous", "name": "Snake", "description": "Eat food and grow", '
+    '"board": {"size": 3}, "players": {"symbols": ["X", "O"]}, '
+    '"controls": {"keys": ["W", "S", "A", "D"], "player1": ["W", "S"], "player2": ["UP", "DOWN"]}, '
+    '"rules": {"winCondition": "Score as much as possible"}, '
+    '"assets": {"background": "#228b22", "bricks": 5, "collectibles": 10}}'
+)
+
+
+def test_grammar_accepts_schema_document():
+    assert GRAMMAR.accepts(VALID)
+    assert GRAMMAR.accepts("  " + VALID)
+    assert is_valid_game_logic(json.loads(VALID))
+
+
+def test_grammar_rejects_unknown_game_type_and_long_strings():
+    assert GRAMMAR.advance(GRAMMAR.initial, '{"gameType": "puz') is None
+    assert GRAMMAR.advance(GRAMMAR.initial, '{"gameType": "continuous", "name": "' + "x" * 41) is None
+    assert GRAMMAR.advance(GRAMMAR.initial, '{"gameType": "continuous", "name": ""') is None
+
+
+def test_grammar_bounds_integers_arrays_and_colors():
+    board = '{"gameType": "turnBased", "name": "Go", "description": "Stones", "board": {"size": '
+    assert GRAMMAR.advance(GRAMMAR.initial, board + "8}") is not None
+    for bad in ("9", "1", "03", "-4", "4.5", "}"):
+        assert GRAMMAR.advance(GRAMMAR.initial, board + bad + "}") is None
+    players = board + '4}, "players": {"symbols": '
+    assert GRAMMAR.advance(GRAMMAR.initial, players + '["A", "B"]}') is not None
+    assert GRAMMAR.advance(GRAMMAR.initial, players + '["A"]') is None
+    assert GRAMMAR.advance(GRAMMAR.initial, players + '["A", "B", "C"') is None
+    assert GRAMMAR.advance(GRAMMAR.initial, players + '["ABCD"') is None
+    keys = players + '["A", "B"]}, "controls": {"keys": '
+    assert GRAMMAR.advance(GRAMMAR.initial, keys + '["LEFT", "RIGHT"], ') is not None
+    assert GRAMMAR.advance(GRAMMAR.initial, keys + '["ESC"') is None
+    colors = VALID[:VALID.index('"#') + 1]
+    assert GRAMMAR.advance(GRAMMAR.initial, colors + '#A0b1C2"') is not None
+    assert GRAMMAR.advance(GRAMMAR.initial, colors + 'green"') is None
+    assert GRAMMAR.advance(GRAMMAR.initial, colors + '#12345"') is None
+
+
+def generated_params(game_logic):
+    """params of the AI2D.run(game, params) bundle generated for game_logic"""
+    code = generate_game_code(game_logic)
+    return json.loads("[" + code[len("AI2D.run("):-len(");\n")] + "]")[1]
+
+
+def test_grammar_documents_drive_the_generators():
+    game_logic = json.loads(VALID)
+    params = generated_params(game_logic)
+    assert params["keys"] == {"up": "W", "down": "S", "left": "A", "right": "D"}
+    assert params["background"] == "#228b22"
+
+    game_logic.update(name="Pong", rules={"winCondition": "First to 7 points"})
+    params = generated_params(game_logic)
+    assert params["player1_keys"] == {"up": "W", "down": "S"} and params["score_to_win"] == 7
+
+
+def test_unsupported_schemas_are_rejected():
+    with pytest.raises(ValueError, match="Unsupported schema"):
+        JsonGrammar.from_schema({"type": "number"})
+    with pytest.raises(ValueError, match="non-negative"):
+        JsonGrammar.from_schema({"type": "integer", "minimum": -1})
+
+
+def test_grammar_rejects_text_after_the_object_closes():
+    assert GRAMMAR.advance(GRAMMAR.initial, VALID + " ") is None
+
+
+def test_grammar_prefix_states_are_incremental():
+    state = GRAMMAR.initial
+    for char in VALID:
+        state = GRAMMAR.advance(state, char)
+        assert state is not None
+    assert GRAMMAR.is_complete(state)
+
+
+def test_logits_processor_forces_grammar_and_eos():
+    torch = pytest.importorskip("torch")
+    strings = ['{"gameType": "', "realtime", "puzzle", '"', "<eos>"]
+    processor = JsonGrammarLogitsProcessor(GRAMMAR, strings, eos_token_id=4, prompt_length=1)
+    scores = torch.tensor([[0.0, 0.0, 5.0, 0.0, 1.0]])
+    # First step: only the opening literal fits, whatever the model prefers
+    first = processor(torch.tensor([[9]]), scores.clone())
+    assert int(first.argmax()) == 0
+    # After the opening literal, "puzzle" is masked out and "realtime" wins
+    second = processor(torch.tensor([[9, 0]]), scores.clone())
+    assert int(second.argmax()) == 1
@@ -0,0 +1,137 @@
+import os
+import string
+
+import pytest
+
+from app.models import phi2_model
+from app.models.phi2_model import Phi2Engine, parse_game_logic
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+
+def build_tiny_model(path):
+    """Save a randomly initialized, character-level causal LM to path (no download)"""
+    from tokenizers import Tokenizer, decoders, models
+
+    vocab = {char: i for i, char in enumerate(sorted(set(string.printable)))}
+    vocab["<unk>"] = len(vocab)
+    vocab["<eos>"] = len(vocab)
+    tokenizer = Tokenizer(models.BPE(vocab=vocab, merges=[], unk_token="<unk>"))
+    tokenizer.decoder = decoders.Fuse()
+    fast_tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, unk_token="<unk>", eos_token="<eos>", pad_token="<eos>"
+    )
+    fast_tokenizer.save_pretrained(path)
+
+    torch.manual_seed(0)
+    model_config = transformers.GPT2Config(
+        vocab_size=len(vocab), n_positions=4096, n_embd=32, n_layer=2, n_head=2,
+        eos_token_id=vocab["<eos>"], pad_token_id=vocab["<eos>"],
+    )
+    transformers.GPT2LMHeadModel(model_config).save_pretrained(path)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def tiny_model_path(tmp_path_factory):
+    return build_tiny_model(tmp_path_factory.mktemp("tiny-lm"))
+
+
+def test_engine_loads_lazily(tiny_model_path):
+    engine = Phi2Engine(model_name=tiny_model_path, trust_remote_code=False, max_new_tokens=8)
+    assert not engine.ready
+    text = engine.generate_text("Request: snake\nOutput: ")
+    assert engine.ready
+    assert isinstance(text, str)
+    assert engine.status()["load_seconds"] is not None
+
+
+def test_engine_thread_and_dtype_config(tiny_model_path):
+    engine = Phi2Engine(model_name=tiny_model_path, trust_remote_code=False, num_threads=1, dtype="bfloat16")
+    engine.warmup()
+    assert torch.get_num_threads() == 1
+    assert next(engine.model.parameters()).dtype == torch.bfloat16
+
+
+def test_engine_rejects_unknown_dtype():
+    with pytest.raises(ValueError):
+        Phi2Engine(dtype="int4")
+
+
+def test_generate_game_logic_falls_back_to_templates(tiny_model_path, monkeypatch):
+    engine = Phi2Engine(model_name=tiny_model_path, trust_remote_code=False, max_new_tokens=8)
+    monkeypatch.setattr(phi2_model.config, "MODEL_ENABLED", True)
+    monkeypatch.setattr(phi2_model, "_engine", engine)
+    # A random model will not emit valid game logic, so the template path answers
+    assert phi2_model.generate_game_logic("a snake game")["name"] == "Snake"
+
+
+def test_parse_game_logic_validates_schema():
+    valid = '{"gameType": "continuous", "name": "Snake", "description": "d", "rules": {}, "assets": {}}'
+    assert parse_game_logic("Output: " + valid + " trailing")["name"] == "Snake"
+    assert parse_game_logic('{"gameType": "puzzle", "name": "x"}') is None
+    assert parse_game_logic("no json here") is None
+
+
+def test_prefix_cache_reuses_state_and_matches_uncached_output(tiny_model_path):
+    prefix, request = "Instruct: make game JSON.\n", "Request: pong\nOutput: "
+    cached = Phi2Engine(model_name=tiny_model_path, trust_remote_code=False, max_new_tokens=6)
+    uncached = Phi2Engine(model_name=tiny_model_path, trust_remote_code=False, max_new_tokens=6,
+                          prefix_cache_entries=0)
+
+    first = cached.generate_texts([request], prefixes=[prefix])
+    second = cached.generate_texts([request], prefixes=[prefix])
+    batch = cached.generate_texts([request, "Request: snake\nOutput: "], prefixes=[prefix, prefix])
+    baseline = uncached.generate_texts([request], prefixes=[prefix])
+
+    assert first == second == baseline
+    assert len(batch) == 2
+    stats = cached.status()
+    assert stats["prefix_cache"] == {"entries": 1, "max_entries": 4, "hits": 2, "misses": 1, "evictions": 0}
+    assert stats["time_to_first_token"]["cached"]["count"] == 2
+    assert stats["time_to_first_token"]["uncached"]["count"] == 1
+
+
+def test_int8_engine_caches_quantized_weights(tiny_model_path, tmp_path):
+    cache_dir = str(tmp_path / "quantized")
+    first = Phi2Engine(model_name=tiny_model_path, trust_remote_code=False, max_new_tokens=4,
+                       quantize="int8", quantized_cache_dir=cache_dir)
+    first.load()
+    assert not first.loaded_from_cache
+    # GPT-2 blocks use Conv1D, so only the lm_head Linear is quantized in the tiny model
+    assert any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in first.model.modules())
+
+    second = Phi2Engine(model_name=tiny_model_path, trust_remote_code=False, max_new_tokens=4,
+                        quantize="int8", quantized_cache_dir=cache_dir)
+    assert isinstance(second.generate_text("Request: pong\nOutput: "), str)
+    assert second.loaded_from_cache
+    # Only weights are cached: the file loads without unpickling arbitrary objects
+    (cache_file,) = [name for name in os.listdir(cache_dir) if name.endswith(".pt")]
+    packed = torch.load(os.path.join(cache_dir, cache_file), weights_only=True)
+    assert packed["linears"]["lm_head"]["int8"].dtype == torch.int8
+    assert torch.equal(second.model.lm_head.weight().int_repr(), first.model.lm_head.weight().int_repr())
+    torch.manual_seed(0)
+    expected = first.generate_text("Request: pong\nOutput: ")
+    torch.manual_seed(0)
+    assert second.generate_text("Request: pong\nOutput: ") == expected
+
+
+def test_int8_cache_is_keyed_by_checkpoint(tmp_path_factory, tmp_path):
+    model_path = build_tiny_model(tmp_path_factory.mktemp("tiny-lm-changing"))
+    cache_dir = str(tmp_path / "quantized")
+    Phi2Engine(model_name=model_path, trust_remote_code=False, quantize="int8", quantized_cache_dir=cache_dir).load()
+    # Same name, new weights: the old cache entry must not be used
+    for name in os.listdir(model_path):
+        if name.endswith((".safetensors", ".bin")):
+            st = os.stat(os.path.join(model_path, name))
+            os.utime(os.path.join(model_path, name), ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    engine = Phi2Engine(model_name=model_path, trust_remote_code=False, quantize="int8", quantized_cache_dir=cache_dir)
+    engine.load()
+    assert not engine.loaded_from_cache
+    assert len([name for name in os.listdir(cache_dir) if name.endswith(".pt")]) == 2
+
+
+def test_int8_requires_float32_cpu():
+    with pytest.raises(ValueError):
+        Phi2Engine(quantize="int8", dtype="bfloat16")
@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.models.retrieval import FewShotIndex
+
+EXAMPLES = [
+    {"game_type": "tic_tac_toe", "mechanics": ["place mark", "turn-based"]},
+    {"game_type": "snake_game", "main_character": "snake", "mechanics": ["move", "eat", "grow"]},
+    {"game_type": "pong", "main_character": "paddle", "mechanics": ["bounce ball"]},
+]
+
+
+def write_examples(path, examples, mtime):
+    path.write_text(json.dumps(examples))
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_search_returns_most_similar_examples_first(tmp_path):
+    path = tmp_path / "phi2.json"
+    write_examples(path, EXAMPLES, 1_000_000_000)
+    index = FewShotIndex(str(path))
+    assert index.search("make a snake game", k=1)[0]["game_type"] == "snake_game"
+    assert [e["game_type"] for e in index.search("tic tac toe", k=2)][0] == "tic_tac_toe"
+    assert len(index.search("pong", k=10)) == 3
+
+
+def test_rebuild_only_featurizes_changed_examples(tmp_path):
+    path = tmp_path / "phi2.json"
+    write_examples(path, EXAMPLES, 1_000_000_000)
+    index = FewShotIndex(str(path), check_interval=0)
+    index.refresh()
+    assert index.featurized == 3
+
+    write_examples(path, EXAMPLES + [{"game_type": "tetris", "mechanics": ["falling blocks"]}], 2_000_000_000)
+    assert index.search("falling blocks", k=1)[0]["game_type"] == "tetris"
+    assert index.featurized == 4
+    assert index.builds == 2
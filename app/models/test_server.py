@@ -0,0 +1,134 @@
+import os
+import threading
+from multiprocessing.connection import Listener
+
+import pytest
+
+from app.models import server
+from app.models.client import RemoteEngine, RemoteError
+
+
+class FakeEngine:
+    def __init__(self):
+        self.loaded = False
+
+    def status(self):
+        return {"ready": self.loaded}
+
+    def load(self):
+        self.loaded = True
+
+    def generate_logic(self, prompt):
+        if prompt == "fail":
+            raise RuntimeError("model exploded")
+        return {"name": prompt}
+
+    def generate_logic_batch(self, prompts):
+        return [self.generate_logic(prompt) for prompt in prompts]
+
+    def stream_logic(self, prompt):
+        self.streamer = FakeStreamer(list(prompt))
+        return self.streamer
+
+
+class FakeStreamer(list):
+    error = None
+    cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def start_server(tmp_path, monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(server.phi2_model, "model_game_logic", engine.generate_logic)
+    path = str(tmp_path / "model.sock")
+    listener = Listener(path, family="AF_UNIX", authkey=b"test")
+    threading.Thread(target=server.serve_forever, args=(listener, engine), daemon=True).start()
+    return RemoteEngine(path, "test"), listener
+
+
+def test_remote_engine_round_trips(tmp_path, monkeypatch):
+    remote, listener = start_server(tmp_path, monkeypatch)
+    try:
+        assert remote.ready is False
+        remote.load()
+        assert remote.status()["ready"] is True
+        assert remote.status()["pid"] == os.getpid()
+        assert remote.generate_logic("snake") == {"name": "snake"}
+        assert remote.generate_logic_batch(["a", "b"]) == [{"name": "a"}, {"name": "b"}]
+    finally:
+        listener.close()
+
+
+def test_remote_errors_and_streaming(tmp_path, monkeypatch):
+    remote, listener = start_server(tmp_path, monkeypatch)
+    try:
+        with pytest.raises(RemoteError, match="model exploded"):
+            remote.generate_logic("fail")
+
+        streamer = remote.stream_logic("abc")
+        assert list(streamer) == ["a", "b", "c"]
+        assert streamer.text == "abc"
+        assert streamer.error is None
+
+        # A cancelled stream stops reading and drops the connection
+        streamer = remote.stream_logic("abcdef")
+        assert streamer.next_chunk() == "a"
+        streamer.cancel()
+        assert streamer.next_chunk() is None and list(streamer) == []
+    finally:
+        listener.close()
+
+
+def test_unreachable_server_is_not_ready(tmp_path):
+    remote = RemoteEngine(str(tmp_path / "missing.sock"))
+    assert remote.ready is False
+    assert remote.status()["ready"] is False
+
+
+def test_generated_authkey_and_private_socket(tmp_path):
+    path = str(tmp_path / "model.sock")
+    key = server.server_authkey(path)
+    assert os.stat(path + ".key").st_mode & 0o777 == 0o600
+    listener = server.create_listener(path, key)
+    try:
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        threading.Thread(target=server.serve_forever, args=(listener, FakeEngine()), daemon=True).start()
+        # No key configured: the client reads the generated one
+        assert RemoteEngine(path).status()["ready"] is False
+        assert server.server_authkey(path, "explicit") == b"explicit"
+    finally:
+        listener.close()
+
+
+def test_inference_is_capped_per_replica(tmp_path, monkeypatch):
+    engine = FakeEngine()
+    running, peak, lock, release = [0], [0], threading.Lock(), threading.Event()
+
+    def slow_logic(prompt):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+        return {"name": prompt}
+
+    monkeypatch.setattr(server.phi2_model, "model_game_logic", slow_logic)
+    path = str(tmp_path / "model.sock")
+    listener = Listener(path, family="AF_UNIX", authkey=b"test")
+    threading.Thread(target=server.serve_forever, args=(listener, engine, 2), daemon=True).start()
+    remote = RemoteEngine(path, "test")
+    try:
+        callers = [threading.Thread(target=remote.generate_logic, args=(str(i),)) for i in range(5)]
+        for caller in callers:
+            caller.start()
+        # Status requests do not wait for an inference slot
+        assert remote.status()["ready"] is False
+        threading.Timer(0.3, release.set).start()
+        for caller in callers:
+            caller.join(5)
+        assert peak[0] == 2
+    finally:
+        listener.close()
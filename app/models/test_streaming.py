@@ -0,0 +1,45 @@
+import pytest
+
+from app.models.streaming import StreamCancelled, TokenStreamer
+
+
+class FakeIds(list):
+    @property
+    def shape(self):
+        return (len(self),)
+
+    def tolist(self):
+        return list(self)
+
+
+class CharTokenizer:
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(i) for i in ids)
+
+
+def test_streamer_skips_prompt_and_yields_each_token():
+    streamer = TokenStreamer(CharTokenizer())
+    streamer.put(FakeIds([ord("p"), ord("q")]))
+    for char in '{"a"}':
+        streamer.put(FakeIds([ord(char)]))
+    streamer.end()
+    assert list(streamer) == ["{", '"', "a", '"', "}"]
+    assert streamer.text == '{"a"}'
+
+
+def test_streamer_reports_failure():
+    streamer = TokenStreamer(CharTokenizer())
+    streamer.fail(RuntimeError("boom"))
+    assert list(streamer) == []
+    assert str(streamer.error) == "boom"
+
+
+def test_cancel_ends_the_stream_and_stops_generation():
+    streamer = TokenStreamer(CharTokenizer())
+    streamer.put(FakeIds([ord("p")]))
+    streamer.put(FakeIds([ord("{")]))
+    streamer.cancel()
+    # generate() is stopped by the next token it hands over
+    with pytest.raises(StreamCancelled):
+        streamer.put(FakeIds([ord("}")]))
+    assert list(streamer) == ["{"]
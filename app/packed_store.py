@@ -0,0 +1,385 @@
+import fcntl
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+from starlette.responses import Response
+
+from app import config
+from app.hot_set import logic_response_bytes
+from app.store import ENCODING_SUFFIXES, ArtifactStore, ShardedLayout, split_artifact_name
+
+# Record: magic, kind, key length, payload length, CRC-32 of key + payload,
+# write time; followed by the key and the payload
+_HEADER = struct.Struct("<2sBHIId")
+_MAGIC = b"AP"
+_PUT = 1
+_DELETE = 2
+
+_SEGMENT_RE = re.compile(r"^segment-(\d{8})\.dat$")
+
+
+def _segment_name(number):
+    return f"segment-{number:08d}.dat"
+
+
+class _Segment:
+    """One segment file and a read-only map of it, grown as the file is appended to"""
+
+    def __init__(self, number, path):
+        self.number = number
+        self.path = path
+        self.size = os.path.getsize(path) if os.path.exists(path) else 0
+        self.dead = 0
+        self._map = None
+
+    def view(self, offset, length):
+        """Zero-copy memoryview of length bytes at offset"""
+        if self._map is None or len(self._map) < offset + length:
+            with open(self.path, "rb") as f:
+                # The old map stays alive for as long as views into it are in use
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._map)[offset:offset + length]
+
+    def release(self):
+        # Dropped rather than closed: responses may still be sending views into it
+        self._map = None
+
+
+class SegmentStore:
+    """Append-only key/value store packing many small payloads into segment files
+
+    Each put appends a record to the active segment; an in-memory index maps
+    keys to (segment, offset, length, time) and is rebuilt by scanning record
+    headers on open. Deletes append a tombstone. The active segment rotates at
+    max_segment_bytes, and a sealed segment whose dead records reach
+    compact_ratio of its size is compacted: its live records are appended to
+    the active segment and the file is removed. Appends take an flock, but the
+    index is per process, so one process should own a segment directory.
+    """
+
+    def __init__(self, directory, max_segment_bytes=64 * 1024 * 1024, compact_ratio=0.5, fsync=True):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.compact_ratio = compact_ratio
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._index = {}
+        self._segments = {}
+        self.reads = 0
+        self.compactions = 0
+        self.bytes_compacted = 0
+        os.makedirs(directory, exist_ok=True)
+        numbers = sorted(int(m.group(1)) for m in map(_SEGMENT_RE.match, os.listdir(directory)) if m)
+        for number in numbers:
+            self._load_segment(number)
+        self._active = self._segments[numbers[-1]] if numbers else self._new_segment(1)
+        self._fd = os.open(self._active.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _new_segment(self, number):
+        segment = _Segment(number, os.path.join(self.directory, _segment_name(number)))
+        open(segment.path, "ab").close()
+        self._segments[number] = segment
+        return segment
+
+    def _load_segment(self, number):
+        segment = _Segment(number, os.path.join(self.directory, _segment_name(number)))
+        self._segments[number] = segment
+        if not segment.size:
+            return
+        with open(segment.path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                magic, kind, key_length, length, crc, written = _HEADER.unpack_from(data, offset)
+                end = offset + _HEADER.size + key_length + length
+                if magic != _MAGIC or end > len(data) or zlib.crc32(data[offset + _HEADER.size:end]) != crc:
+                    break
+                key = data[offset + _HEADER.size:offset + _HEADER.size + key_length].decode("utf-8")
+                self._apply(segment, key, kind, offset, end - offset, written)
+                offset = end
+        finally:
+            data.close()
+        if offset < segment.size:
+            # A torn write at the tail (a crash mid-append): drop it
+            print(f"Truncating {segment.path} at {offset} of {segment.size} bytes")
+            os.truncate(segment.path, offset)
+            segment.size = offset
+
+    def _apply(self, segment, key, kind, offset, record_length, written):
+        previous = self._index.pop(key, None)
+        if previous is not None:
+            self._segments[previous[0]].dead += previous[3]
+        if kind == _PUT:
+            key_length = len(key.encode("utf-8"))
+            payload_offset = offset + _HEADER.size + key_length
+            payload_length = record_length - _HEADER.size - key_length
+            self._index[key] = (segment.number, payload_offset, payload_length, record_length, written)
+        else:
+            segment.dead += record_length
+
+    @staticmethod
+    def _record(key, payload, kind, written):
+        key_bytes = key.encode("utf-8")
+        crc = zlib.crc32(key_bytes + payload)
+        return _HEADER.pack(_MAGIC, kind, len(key_bytes), len(payload), crc, written) + key_bytes + payload
+
+    def _append(self, records):
+        """Append (key, payload, kind, written) records in one write, rotating first if they do not fit
+
+        written is None for new records; compaction passes the original time.
+        """
+        now = time.time()
+        records = [(key, payload, kind, now if written is None else written) for key, payload, kind, written in records]
+        data = [self._record(*record) for record in records]
+        total = sum(len(record) for record in data)
+        if self._active.size and self._active.size + total > self.max_segment_bytes:
+            self._rotate()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            os.write(self._fd, b"".join(data))
+            if self.fsync:
+                os.fsync(self._fd)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        offset = self._active.size
+        for (key, _, kind, written), record in zip(records, data):
+            self._apply(self._active, key, kind, offset, len(record), written)
+            offset += len(record)
+        self._active.size = offset
+
+    def _rotate(self):
+        os.close(self._fd)
+        self._active = self._new_segment(self._active.number + 1)
+        self._fd = os.open(self._active.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def put_many(self, items):
+        """Store (key, payload) pairs that are not stored yet, in one append; returns the number written"""
+        with self._lock:
+            records = [(key, bytes(payload), _PUT, None) for key, payload in items if key not in self._index]
+            if records:
+                self._append(records)
+            return len(records)
+
+    def put(self, key, payload):
+        return self.put_many([(key, payload)]) == 1
+
+    def get(self, key):
+        """Memoryview of a stored payload (backed by the segment's mmap), or None"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            self.reads += 1
+            return self._segments[entry[0]].view(entry[1], entry[2])
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def size(self, key):
+        entry = self._index.get(key)
+        return entry[2] if entry is not None else 0
+
+    def written_at(self, key):
+        entry = self._index.get(key)
+        return entry[4] if entry is not None else None
+
+    def keys(self):
+        with self._lock:
+            return list(self._index)
+
+    def delete_many(self, keys):
+        """Remove keys by appending tombstones; returns the payload bytes released"""
+        with self._lock:
+            keys = [key for key in keys if key in self._index]
+            released = sum(self._index[key][2] for key in keys)
+            if keys:
+                self._append([(key, b"", _DELETE, None) for key in keys])
+            return released
+
+    def compact_one(self):
+        """Compact the sealed segment with the most dead space, if one is over the ratio
+
+        Returns the bytes reclaimed, or None when no segment needs compacting.
+        """
+        with self._lock:
+            candidates = [
+                segment for segment in self._segments.values()
+                if segment is not self._active and segment.size
+                and segment.dead / segment.size >= self.compact_ratio
+            ]
+            if not candidates:
+                return None
+            segment = max(candidates, key=lambda s: s.dead / s.size)
+            live = [(key, entry) for key, entry in self._index.items() if entry[0] == segment.number]
+            records = [(key, bytes(segment.view(entry[1], entry[2])), _PUT, entry[4]) for key, entry in live]
+            oldest = segment.number == min(self._segments)
+            if not oldest:
+                # Tombstones must outlive every older segment that may still hold the put they cancel
+                records += self._tombstones(segment)
+            for key, _ in live:
+                del self._index[key]
+            if records:
+                self._append(records)
+            segment.release()
+            del self._segments[segment.number]
+            os.unlink(segment.path)
+            reclaimed = segment.size - sum(
+                _HEADER.size + len(key.encode("utf-8")) + len(payload) for key, payload, _, _ in records
+            )
+            self.compactions += 1
+            self.bytes_compacted += reclaimed
+            return reclaimed
+
+    def _tombstones(self, segment):
+        tombstones = []
+        with open(segment.path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            _, kind, key_length, length, _, written = _HEADER.unpack_from(data, offset)
+            if kind == _DELETE:
+                key = data[offset + _HEADER.size:offset + _HEADER.size + key_length].decode("utf-8")
+                if key not in self._index:
+                    tombstones.append((key, b"", _DELETE, written))
+            offset += _HEADER.size + key_length + length
+        return tombstones
+
+    def stats(self):
+        with self._lock:
+            total = sum(segment.size for segment in self._segments.values())
+            dead = sum(segment.dead for segment in self._segments.values())
+            return {
+                "directory": self.directory,
+                "segments": len(self._segments),
+                "records": len(self._index),
+                "bytes": total,
+                "dead_bytes": dead,
+                "reads": self.reads,
+                "compactions": self.compactions,
+                "bytes_compacted": self.bytes_compacted,
+            }
+
+    def close(self):
+        with self._lock:
+            os.close(self._fd)
+            for segment in self._segments.values():
+                segment.release()
+
+
+class SliceResponse(Response):
+    """Response whose body may be a memoryview, sent without copying it"""
+
+    def render(self, content):
+        if isinstance(content, memoryview):
+            return content
+        return super().render(content)
+
+
+class PackedArtifactStore(ArtifactStore):
+    """ArtifactStore keeping game logic and bundles in a SegmentStore
+
+    Payloads are packed into large segment files instead of two small files
+    per game; logic is stored in its compact response form, so /game-logic
+    and /bundles serve slices of the mapped segments as they are. The shared
+    runtime is still written to the runtime directory for StaticFiles.
+    """
+
+    def __init__(self, segments, runtime_dir=None):
+        self.segments = segments
+        self.runtime_dir = runtime_dir or os.path.join("app", "static", "runtime")
+        os.makedirs(self.runtime_dir, exist_ok=True)
+        self.logic_dir = self.games_dir = segments.directory
+        self.hot_set = None
+        self.layout = ShardedLayout(0)
+        self.legacy_fallback = False
+
+    def json_url(self, game_id):
+        return f"/game-logic/{game_id}"
+
+    def bundle_url(self, game_id):
+        return f"/bundles/{game_id}.js"
+
+    def has_logic(self, game_id):
+        return f"{game_id}.json" in self.segments
+
+    def has_bundle(self, game_id):
+        return f"{game_id}.js" in self.segments
+
+    def _bundle_keys(self, game_id):
+        return [f"{game_id}.js"] + [f"{game_id}.js{suffix}" for suffix in ENCODING_SUFFIXES.values()]
+
+    def artifact_sizes(self, game_id):
+        return (
+            self.segments.size(f"{game_id}.json"),
+            sum(self.segments.size(key) for key in self._bundle_keys(game_id)),
+        )
+
+    def created_time(self, game_id):
+        return self.segments.written_at(f"{game_id}.json")
+
+    def delete_game(self, game_id):
+        return self.segments.delete_many(self._bundle_keys(game_id) + [f"{game_id}.json"])
+
+    def put_logic(self, game_id, game_logic):
+        self.segments.put(f"{game_id}.json", logic_response_bytes(game_logic))
+        return self.json_url(game_id)
+
+    def _bundle_items(self, game_id, game_code, encoded):
+        # Siblings first, as with files, so a stored bundle always has them
+        items = [(f"{game_id}.js{ENCODING_SUFFIXES[encoding]}", body) for encoding, body in (encoded or {}).items()]
+        items.append((f"{game_id}.js", game_code.encode("utf-8")))
+        return items
+
+    def put_bundle(self, game_id, game_code, encoded=None):
+        self.segments.put_many(self._bundle_items(game_id, game_code, encoded))
+        return self.bundle_url(game_id)
+
+    def put_games(self, games):
+        # Every game in one append (and one fsync)
+        items = []
+        for game_id, game_logic, game_code, encoded in games:
+            items.append((f"{game_id}.json", logic_response_bytes(game_logic)))
+            items += self._bundle_items(game_id, game_code, encoded)
+        self.segments.put_many(items)
+
+    def logic_ids(self):
+        for key in self.segments.keys():
+            parts = split_artifact_name(key)
+            if parts is not None and parts[1] == ".json":
+                yield parts[0]
+
+    def load_logic(self, game_id):
+        body = self.segments.get(f"{game_id}.json")
+        # json.loads takes bytes but not a memoryview
+        return json.loads(bytes(body)) if body is not None else None
+
+    def load_logic_bytes(self, game_id):
+        return self.segments.get(f"{game_id}.json")
+
+    def load_bundle(self, game_id, encoding=None):
+        suffix = ENCODING_SUFFIXES[encoding] if encoding else ""
+        return self.segments.get(f"{game_id}.js{suffix}")
+
+    def compact(self):
+        return self.segments.compact_one()
+
+
+def create_artifact_store(hot_set=None):
+    """Build the artifact store selected by AI2D_STORE_BACKEND ("files" or "packed")"""
+    if config.STORE_BACKEND == "packed":
+        segments = SegmentStore(
+            config.STORE_SEGMENT_DIR,
+            max_segment_bytes=config.STORE_SEGMENT_MAX_BYTES,
+            compact_ratio=config.STORE_SEGMENT_COMPACT_RATIO,
+        )
+        return PackedArtifactStore(segments)
+    if config.STORE_BACKEND != "files":
+        raise ValueError(f"Unknown AI2D_STORE_BACKEND {config.STORE_BACKEND!r} (expected files or packed)")
+    return ArtifactStore(hot_set=hot_set, layout=ShardedLayout(config.STORE_SHARD_DEPTH, config.STORE_SHARD_WIDTH))
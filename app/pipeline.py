@@ -0,0 +1,301 @@
+import asyncio
+import json
+
+from app import config
+from app.batch import build_artifacts, store_games
+from app.bundles import BundleStats, build_bundle
+from app.cache import normalize_prompt
+from app.models.phi2_model import (
+    generate_game_logic, generate_template_game_logic, get_engine, parse_game_logic, template_shortcut
+)
+from app.singleflight import SingleFlight
+from app.store import GAME_ID_LENGTH
+from app.templates.game_generator import RUNTIME_CODE, registry, runtime_name
+from app.templates.registry import UnknownGeneratorError
+
+
+# Progress stages reported by GenerationPipeline.generate, in order
+STAGES = ("logic_generated", "json_persisted", "code_generated", "bundle_written")
+
+
+def _no_progress(stage):
+    pass
+
+
+class GenerationError(Exception):
+    """Raised when a prompt cannot be turned into game logic"""
+
+
+def _require_generator(game_logic):
+    # Checked before anything is cached or stored, so unplayable logic never is
+    try:
+        registry.resolve(game_logic)
+    except UnknownGeneratorError as e:
+        raise GenerationError(str(e)) from e
+
+
+class GenerationPipeline:
+    """Prompt -> game logic -> stored JSON -> Phaser.js code -> stored bundle"""
+
+    def __init__(self, store, cache, executors, catalog=None):
+        self.store = store
+        # Optional GameCatalog recording every stored game
+        self.catalog = catalog
+        self.cache = cache
+        self.executors = executors
+        self.logic_flight = SingleFlight()
+        self.artifact_flight = SingleFlight()
+        self.bundle_stats = BundleStats()
+        self.runtime_url = store.runtime_url(runtime_name())
+
+    async def publish_runtime(self):
+        """Write the shared game runtime to the store; returns its URL"""
+        name = runtime_name()
+        bundle = await self.executors.run_cpu(
+            build_bundle, RUNTIME_CODE, config.BUNDLE_MINIFY, config.BUNDLE_PRECOMPRESS
+        )
+        await self.executors.run_io(self.store.put_runtime, name, bundle["code"], bundle["encoded"])
+        self.runtime_url = self.store.runtime_url(name)
+        return self.runtime_url
+
+    async def _cached(self, fn, *args):
+        # In-memory lookups are cheap enough to run inline; SQLite lookups are not
+        if self.cache.persistent:
+            return await self.executors.run_io(fn, *args)
+        return fn(*args)
+
+    async def generate(self, prompt, progress=None):
+        """Run the full pipeline for a prompt and return the response payload
+
+        progress, if given, is called with each stage name from STAGES as it completes.
+        """
+        progress = progress or _no_progress
+        await self._check_templates()
+
+        # Step 1: Generate game logic JSON using template-based approach (formerly Phi-2 model)
+        # Concurrent requests for the same normalized prompt share one generation
+        (game_logic, digest), _ = await self.logic_flight.do(
+            normalize_prompt(prompt), self._generate_logic, prompt
+        )
+        progress("logic_generated")
+
+        return await self._store_game(prompt, game_logic, digest, progress)
+
+    async def stream(self, prompt):
+        """Generate a game for a prompt, yielding (event, data) pairs as the model decodes
+
+        "token" events carry text deltas, a "fallback" event says why the model
+        output was replaced by a template, and the closing "done" event carries
+        the stored game. Prompts that generate() would not send to the model
+        (template mode, cached prompts, clear template matches) give a single
+        token event holding the whole logic JSON.
+        """
+        await self._check_templates()
+        if (not config.MODEL_ENABLED or await self.lookup_logic(prompt) is not None
+                or await self.executors.run_cpu(template_shortcut, prompt) is not None):
+            result = await self.generate(prompt)
+            yield "token", {"text": json.dumps(result["game_logic"])}
+            yield "done", result
+            return
+
+        async with self.executors.inference_slot():
+            streamer = await self.executors.run_io(get_engine().stream_logic, prompt)
+            try:
+                async for chunk in self._stream_chunks(streamer):
+                    yield "token", {"text": chunk}
+            finally:
+                # Also reached when the client disconnects: stop decoding before the slot is freed
+                streamer.cancel()
+
+        game_logic = parse_game_logic(streamer.text) if streamer.error is None else None
+        if game_logic is None:
+            reason = str(streamer.error) if streamer.error else "Model output was not valid game logic"
+            yield "fallback", {"reason": reason}
+            game_logic = await self.executors.run_cpu(generate_template_game_logic, prompt)
+        yield "done", await self.generate_from_logic(prompt, game_logic)
+
+    async def _stream_chunks(self, streamer):
+        # One I/O thread drains the streamer into an asyncio queue, instead of
+        # an executor hop per token
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+
+        def pump():
+            try:
+                for chunk in streamer:
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        pumping = asyncio.ensure_future(self.executors.run_io(pump))
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            yield chunk
+        await pumping
+
+    async def generate_batch(self, prompts, chunk_size=64):
+        """Generate games for many prompts, yielding one result dict per prompt in order
+
+        Each chunk has its logic generated concurrently (cached and coalesced
+        as in generate), is deduplicated by logic digest against earlier
+        prompts and the store, and only the new games are built, each in one
+        CPU pool call, then written to the store and catalog in one bulk
+        write. Results have "deduplicated" set for games that already
+        existed, or "error" for prompts that failed.
+        """
+        await self._check_templates()
+        seen = set()
+        for start in range(0, len(prompts), chunk_size):
+            chunk = prompts[start:start + chunk_size]
+            generated = await asyncio.gather(
+                *(self.logic_flight.do(normalize_prompt(prompt), self._generate_logic, prompt) for prompt in chunk),
+                return_exceptions=True,
+            )
+            games = {}
+            for prompt, outcome in zip(chunk, generated):
+                if not isinstance(outcome, BaseException):
+                    (game_logic, digest), _ = outcome
+                    if digest not in seen and digest not in games:
+                        games[digest] = {"prompt": prompt, "digest": digest, "game_logic": game_logic}
+            stored = await self.executors.run_io(self._stored_digests, list(games))
+            new = [game for digest, game in games.items() if digest not in stored]
+            built = await asyncio.gather(*(self._build_bundle(game["digest"], game["game_logic"]) for game in new))
+            for game, (code, encoded) in zip(new, built):
+                game["code"], game["encoded"] = code, encoded
+            if new:
+                await self.executors.run_io(store_games, self.store, self.catalog, new)
+            created = {game["digest"] for game in new}
+
+            for offset, (prompt, outcome) in enumerate(zip(chunk, generated)):
+                result = {"index": start + offset, "prompt": prompt}
+                if isinstance(outcome, BaseException):
+                    result["error"] = str(outcome)
+                else:
+                    digest = outcome[0][1]
+                    game_id = digest[:GAME_ID_LENGTH]
+                    result.update({
+                        "game_id": game_id,
+                        "json_path": self.store.json_url(game_id),
+                        "deduplicated": digest not in created or digest in seen,
+                    })
+                    seen.add(digest)
+                yield result
+
+    def _stored_digests(self, digests):
+        """The logic digests whose games are already in the store"""
+        return {digest for digest in digests if self.store.has_game(digest[:GAME_ID_LENGTH])}
+
+    async def _check_templates(self):
+        # Drop cached results if the game templates changed; the check is rate
+        # limited, so most requests skip it without an executor hop
+        if self.cache.template_check_due():
+            await self.executors.run_io(self.cache.check_templates)
+
+    async def lookup_logic(self, prompt):
+        """Return cached game logic for a prompt, or None"""
+        cached = await self._cached(self.cache.get_logic, prompt)
+        return cached[0] if cached is not None else None
+
+    async def generate_from_logic(self, prompt, game_logic, progress=None):
+        """Cache and store game logic produced elsewhere (e.g. streamed from the model)"""
+        progress = progress or _no_progress
+        _require_generator(game_logic)
+        digest = await self._cached(self.cache.put_logic, prompt, game_logic)
+        progress("logic_generated")
+        return await self._store_game(prompt, game_logic, digest, progress)
+
+    async def _store_game(self, prompt, game_logic, digest, progress):
+        # Derive a stable, content-addressed game ID from the normalized logic
+        game_id = digest[:GAME_ID_LENGTH]
+
+        # Concurrent requests for the same logic share one set of artifact writes
+        _, shared = await self.artifact_flight.do(
+            digest, self._build_artifacts, prompt, game_id, digest, game_logic, progress
+        )
+        if shared:
+            for stage in STAGES[1:]:
+                progress(stage)
+
+        return {
+            "game_id": game_id,
+            "game_logic": game_logic,
+            "json_path": self.store.json_url(game_id),
+        }
+
+    async def _generate_logic(self, prompt):
+        cached = await self._cached(self.cache.get_logic, prompt)
+        if cached is not None:
+            return cached
+        # Model inference runs on threads sharing this process's engine; templates use the CPU pool
+        run = self.executors.run_inference if config.MODEL_ENABLED else self.executors.run_cpu
+        game_logic = await run(generate_game_logic, prompt)
+        if not game_logic:
+            raise GenerationError("Template selection failed")
+        _require_generator(game_logic)
+        digest = await self._cached(self.cache.put_logic, prompt, game_logic)
+        return game_logic, digest
+
+    async def _build_artifacts(self, prompt, game_id, digest, game_logic, progress):
+        # Identical logic was already generated: serve it straight from the store
+        if await self.executors.run_io(self.store.has_game, game_id):
+            await self._catalog(prompt, game_id, digest, game_logic)
+            for stage in STAGES[1:]:
+                progress(stage)
+            return
+
+        # Step 2: Save the game logic JSON to the store
+        await self.executors.run_io(self.store.put_logic, game_id, game_logic)
+        progress("json_persisted")
+
+        # Step 3: Convert game logic to Phaser.js code
+        game_code, encoded = await self._build_bundle(digest, game_logic)
+        progress("code_generated")
+
+        # Step 4: Save the game code (and its precompressed copies) to the store
+        await self.executors.run_io(self.store.put_bundle, game_id, game_code, encoded)
+        await self._catalog(prompt, game_id, digest, game_logic)
+        progress("bundle_written")
+
+    async def _build_bundle(self, digest, game_logic):
+        """(bundle code, encoded copies) for game logic, shared by single and batch generation
+
+        Code is only generated on a code cache miss; minifying and compressing
+        run in the same CPU pool call.
+        """
+        cached = await self._cached(self.cache.get_code, digest)
+        game_code, code, encoded, stats = await self.executors.run_cpu(build_artifacts, game_logic, cached)
+        if cached is None:
+            await self._cached(self.cache.put_code, digest, game_code)
+        if stats is not None:
+            # Sizes and timings are reported through /metrics
+            self.bundle_stats.record(stats)
+        return code, encoded
+
+    async def _catalog(self, prompt, game_id, digest, game_logic):
+        # Added once both files are stored, so a catalogued game is always playable
+        if self.catalog is None:
+            return
+        logic_bytes, bundle_bytes = await self.executors.run_io(self.store.artifact_sizes, game_id)
+        await self.executors.run_io(
+            self.catalog.add, game_id, digest,
+            template=registry.key_for(game_logic),
+            name=game_logic.get("name"),
+            prompt=prompt,
+            logic_bytes=logic_bytes,
+            bundle_bytes=bundle_bytes,
+        )
+
+    async def import_catalog(self):
+        """Catalogue games stored before the catalog existed; returns the number added"""
+        if self.catalog is None:
+            return 0
+        return await self.executors.run_io(self.catalog.import_store, self.store, registry.key_for)
+
+    def stats(self):
+        return {
+            "logic_flight": self.logic_flight.stats(),
+            "artifact_flight": self.artifact_flight.stats(),
+            "bundles": self.bundle_stats.stats(),
+        }
@@ -0,0 +1,42 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight execution"""
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs), sharing the run with concurrent callers of key
+
+        Returns (result, shared) where shared is True if this caller joined a run
+        started by another caller.
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # shield: one caller being cancelled must not cancel the shared run
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self):
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
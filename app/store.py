@@ -0,0 +1,336 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from app.hot_set import logic_response_bytes
+
+GAME_LOGIC_DIR = "app/static/game_logic"
+GAMES_DIR = "app/static/games"
+
+# Number of hex digits of the logic digest used as the public game id
+GAME_ID_LENGTH = 16
+
+# File suffix of each precompressed bundle sibling ({game_id}.js.gz, ...)
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def canonical_json(game_logic):
+    """Serialize game logic to a stable, whitespace-free JSON string"""
+    return json.dumps(game_logic, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def logic_digest(game_logic):
+    """Return the SHA-256 hex digest of the normalized game logic"""
+    return hashlib.sha256(canonical_json(game_logic).encode("utf-8")).hexdigest()
+
+
+def game_id_for(game_logic):
+    """Derive the stable, content-addressed game id for a game logic dict"""
+    return logic_digest(game_logic)[:GAME_ID_LENGTH]
+
+
+def atomic_write(path, data):
+    """Write data to path via a temp file in the same directory plus rename"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _put_once(path, data, encoded=None):
+    """Write data (and its precompressed siblings) to path unless it exists"""
+    if not os.path.exists(path):
+        for encoding, body in (encoded or {}).items():
+            atomic_write(path + ENCODING_SUFFIXES[encoding], body)
+        atomic_write(path, data)
+    return path
+
+
+def split_artifact_name(name):
+    """Return (game_id, suffix) for an artifact file name, or None for other files"""
+    for suffix in [".js" + s for s in ENCODING_SUFFIXES.values()] + [".js", ".json"]:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)], suffix
+    return None
+
+
+def iter_files(directory):
+    """Yield a DirEntry for every file under directory, walking shard subdirectories"""
+    try:
+        with os.scandir(directory) as entries:
+            subdirs = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    yield entry
+    except FileNotFoundError:
+        return
+    for subdir in subdirs:
+        yield from iter_files(subdir)
+
+
+def _has_flat_artifacts(directory):
+    """True if directory holds artifact files directly (stops at the first one)"""
+    with os.scandir(directory) as entries:
+        return any(entry.is_file() and split_artifact_name(entry.name) for entry in entries)
+
+
+class ShardedLayout:
+    """Fans artifact files out into nested directories: ab/cd/<game_id>.js
+
+    Shard names are taken from the SHA-256 of the game id, so they spread evenly
+    for every id format. depth levels of width hex digits each; depth 0 is flat.
+    """
+
+    def __init__(self, depth=2, width=2):
+        if depth < 0 or width < 1 or depth * width > 64:
+            raise ValueError(f"Invalid shard layout: depth {depth}, width {width}")
+        self.depth = depth
+        self.width = width
+
+    def shards(self, game_id):
+        """Directory names between the store root and the file"""
+        if not self.depth:
+            return []
+        digest = hashlib.sha256(game_id.encode("utf-8")).hexdigest()
+        return [digest[i * self.width:(i + 1) * self.width] for i in range(self.depth)]
+
+    def path(self, directory, game_id, suffix):
+        return os.path.join(directory, *self.shards(game_id), game_id + suffix)
+
+    def url_path(self, game_id, suffix):
+        return "/".join(self.shards(game_id) + [game_id + suffix])
+
+
+class ArtifactStore:
+    """Content-addressed store for game logic JSON and Phaser.js bundles
+
+    Files are written under a ShardedLayout. Files still in the flat layout
+    (before app.migrate_store has moved them) are found too, so the store keeps
+    working while a migration runs.
+    """
+
+    def __init__(self, logic_dir=GAME_LOGIC_DIR, games_dir=GAMES_DIR, runtime_dir=None, hot_set=None, layout=None):
+        self.logic_dir = logic_dir
+        self.games_dir = games_dir
+        # Shared game runtime, next to the games directory by default
+        self.runtime_dir = runtime_dir or os.path.join(os.path.dirname(games_dir), "runtime")
+        os.makedirs(self.logic_dir, exist_ok=True)
+        os.makedirs(self.games_dir, exist_ok=True)
+        os.makedirs(self.runtime_dir, exist_ok=True)
+        # Optional LogicHotSet serving load_logic from memory
+        self.hot_set = hot_set
+        self.layout = layout or ShardedLayout()
+        # Only look for flat files while some are left to migrate
+        self.legacy_fallback = self.layout.depth > 0 and (
+            _has_flat_artifacts(self.logic_dir) or _has_flat_artifacts(self.games_dir)
+        )
+
+    def json_path(self, game_id):
+        """Where the logic JSON is written"""
+        return self.layout.path(self.logic_dir, game_id, ".json")
+
+    def js_path(self, game_id):
+        """Where the bundle is written"""
+        return self.layout.path(self.games_dir, game_id, ".js")
+
+    def _find(self, path, legacy_path):
+        # The sharded path is checked first. If neither exists the sharded path is
+        # returned anyway: a file moved by a running migration is there by now
+        if os.path.exists(path):
+            return path, True
+        if self.legacy_fallback:
+            if os.path.exists(legacy_path):
+                return legacy_path, True
+            # Files only move flat -> sharded, so one renamed between the two
+            # checks above is at the sharded path now; without this re-check the
+            # GC would take a live game for an orphan and delete it
+            if os.path.exists(path):
+                return path, True
+        return path, False
+
+    def find_logic(self, game_id):
+        """Path of the stored logic JSON in either layout, or None"""
+        path, found = self._find(self.json_path(game_id), os.path.join(self.logic_dir, f"{game_id}.json"))
+        return path if found else None
+
+    def find_bundle(self, game_id):
+        """Path of the stored bundle in either layout, or None"""
+        path, found = self._find(self.js_path(game_id), os.path.join(self.games_dir, f"{game_id}.js"))
+        return path if found else None
+
+    def _url(self, prefix, directory, path):
+        return f"{prefix}/" + os.path.relpath(path, directory).replace(os.sep, "/")
+
+    def json_url(self, game_id):
+        if self.legacy_fallback:
+            path = self.find_logic(game_id) or self.json_path(game_id)
+            return self._url("/static/game_logic", self.logic_dir, path)
+        # No flat files left: the URL follows from the layout without touching the disk
+        return "/static/game_logic/" + self.layout.url_path(game_id, ".json")
+
+    def bundle_url(self, game_id):
+        if self.legacy_fallback:
+            path = self.find_bundle(game_id) or self.js_path(game_id)
+            return self._url("/static/games", self.games_dir, path)
+        return "/static/games/" + self.layout.url_path(game_id, ".js")
+
+    def has_logic(self, game_id):
+        return self.find_logic(game_id) is not None
+
+    def has_bundle(self, game_id):
+        return self.find_bundle(game_id) is not None
+
+    def has_game(self, game_id):
+        """True when both the logic JSON and the bundle are stored"""
+        return self.has_logic(game_id) and self.has_bundle(game_id)
+
+    def bundle_paths(self, game_id):
+        """The bundle and its precompressed siblings"""
+        path = self.find_bundle(game_id) or self.js_path(game_id)
+        return [path] + [path + suffix for suffix in ENCODING_SUFFIXES.values()]
+
+    def artifact_sizes(self, game_id):
+        """Return (logic_bytes, bundle_bytes) on disk; bundle bytes include precompressed copies"""
+        sizes = [0, 0]
+        logic_path = self.find_logic(game_id) or self.json_path(game_id)
+        for i, paths in enumerate(([logic_path], self.bundle_paths(game_id))):
+            for path in paths:
+                try:
+                    sizes[i] += os.path.getsize(path)
+                except FileNotFoundError:
+                    pass
+        return tuple(sizes)
+
+    def delete_game(self, game_id):
+        """Remove a game's bundle (with its siblings) and logic; returns the bytes freed"""
+        freed = 0
+        paths = self.bundle_paths(game_id) + [self.json_path(game_id)]
+        if self.legacy_fallback:
+            paths += [os.path.join(self.games_dir, os.path.basename(path)) for path in paths[:-1]]
+            paths.append(os.path.join(self.logic_dir, f"{game_id}.json"))
+        # Bundle first: a game without a bundle is already unplayable
+        for path in dict.fromkeys(paths):
+            try:
+                freed += os.path.getsize(path)
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        if self.hot_set is not None:
+            self.hot_set.invalidate(game_id)
+        return freed
+
+    def put_logic(self, game_id, game_logic):
+        """Store the game logic JSON unless an identical copy already exists"""
+        path = self.find_logic(game_id)
+        if path is None:
+            path = self.json_path(game_id)
+            atomic_write(path, json.dumps(game_logic, indent=2))
+            if self.hot_set is not None:
+                self.hot_set.invalidate(game_id)
+        return path
+
+    def put_bundle(self, game_id, game_code, encoded=None):
+        """Store the Phaser.js bundle unless one already exists for this id
+
+        encoded maps content encodings to precompressed copies of the bundle;
+        they are written first so they are in place once the bundle appears.
+        """
+        return self.find_bundle(game_id) or _put_once(self.js_path(game_id), game_code, encoded)
+
+    def put_games(self, games):
+        """Store many (game_id, game_logic, game_code, encoded) games, logic before each bundle"""
+        for game_id, game_logic, game_code, encoded in games:
+            self.put_logic(game_id, game_logic)
+            self.put_bundle(game_id, game_code, encoded)
+
+    def created_time(self, game_id):
+        """When the game's logic was stored, or None"""
+        path = self.find_logic(game_id)
+        try:
+            return os.path.getmtime(path) if path is not None else None
+        except FileNotFoundError:
+            return None
+
+    def load_bundle(self, game_id, encoding=None):
+        """Bytes of the bundle (or its precompressed copy for encoding), or None"""
+        path = self.find_bundle(game_id)
+        if path is None:
+            return None
+        if encoding:
+            path += ENCODING_SUFFIXES[encoding]
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def compact(self):
+        """Reclaim space held by deleted games; returns bytes reclaimed or None if nothing to do
+
+        Deleting a file already frees its space, so there is nothing to compact here.
+        """
+        return None
+
+    def logic_ids(self):
+        """Yield the id of every stored logic JSON, in either layout"""
+        for entry in iter_files(self.logic_dir):
+            parts = split_artifact_name(entry.name)
+            if parts is not None and parts[1] == ".json":
+                yield parts[0]
+
+    def runtime_path(self, name):
+        return os.path.join(self.runtime_dir, name)
+
+    def runtime_url(self, name):
+        return f"/static/runtime/{name}"
+
+    def put_runtime(self, name, code, encoded=None):
+        """Store the shared game runtime under its content-hashed file name"""
+        return _put_once(self.runtime_path(name), code, encoded)
+
+    def load_logic(self, game_id):
+        """Load stored game logic, or None if it is missing"""
+        entry = self._load(game_id)
+        if self.hot_set is not None:
+            return entry.logic if entry is not None else None
+        return entry
+
+    def load_logic_bytes(self, game_id):
+        """Stored game logic serialized as a compact JSON response body, or None"""
+        entry = self._load(game_id)
+        if self.hot_set is not None:
+            return entry.body if entry is not None else None
+        return logic_response_bytes(entry) if entry is not None else None
+
+    def _load(self, game_id):
+        # A hot set entry, or the parsed logic without a hot set
+        if self.hot_set is not None:
+            # Hits skip the file system; the path is only resolved on a miss or re-check
+            return self.hot_set.load(game_id, lambda: self.find_logic(game_id))
+        path = self.find_logic(game_id)
+        if path is None:
+            return None
+        for candidate in dict.fromkeys((path, self.json_path(game_id))):
+            try:
+                with open(candidate, "r") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                # Moved by a migration between the lookup and the read
+                pass
+        return None
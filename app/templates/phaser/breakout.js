@@ -0,0 +1,229 @@
+const config = AI2D.config({
+    width: 800,
+    height: 600,
+    backgroundColor: params.background,
+    physics: true,
+    create: create,
+    update: update
+});
+
+const gameState = {
+    gameOver: false,
+    lives: 3,
+    score: 0,
+    ballOnPaddle: true,
+    brickInfo: {
+        width: 70,
+        height: 25,
+        count: {
+            row: params.brick_rows,
+            col: 8
+        },
+        offset: {
+            top: 100,
+            left: 120
+        },
+        padding: 10
+    }
+};
+
+const game = AI2D.start(config);
+
+function create() {
+    // Score and lives text
+    gameState.scoreText = AI2D.scoreText(this);
+    gameState.livesText = this.add.text(this.sys.game.config.width - 16, 16, 'Lives: ' + gameState.lives, { fontSize: '24px', fill: '#fff' });
+    gameState.livesText.setOrigin(1, 0);
+
+    // Create paddle
+    gameState.paddle = this.physics.add.sprite(400, 550, null);
+    gameState.paddle.body.setSize(100, 20);
+    gameState.paddle.body.immovable = true;
+    gameState.paddle.setCollideWorldBounds(true);
+
+    // Draw paddle
+    gameState.paddleGraphics = this.add.graphics({ name: 'paddleGraphics' });
+    gameState.paddleGraphics.fillStyle(0xffffff, 1);
+    gameState.paddleGraphics.fillRect(gameState.paddle.x - 50, gameState.paddle.y - 10, 100, 20);
+
+    // Create ball
+    gameState.ball = this.physics.add.sprite(400, 530, null);
+    gameState.ball.body.setSize(20, 20);
+    gameState.ball.body.bounce.set(1);
+    gameState.ball.body.collideWorldBounds = true;
+    gameState.ball.setCollideWorldBounds(true);
+
+    // Add world bounds event except for bottom
+    gameState.ball.body.onWorldBounds = true;
+    this.physics.world.on('worldbounds', function(body, up, down, left, right) {
+        if (down) {
+            lostBall.call(this);
+        }
+    }, this);
+
+    // Draw ball
+    gameState.ballGraphics = this.add.graphics({ name: 'ballGraphics' });
+    gameState.ballGraphics.fillStyle(0xffffff, 1);
+    gameState.ballGraphics.fillCircle(gameState.ball.x, gameState.ball.y, 10);
+
+    // Create bricks
+    gameState.bricks = this.physics.add.staticGroup();
+    gameState.brickGraphics = this.add.graphics({ name: 'brickGraphics' });
+
+    const brickColors = [0xff0000, 0xff7f00, 0xffff00, 0x00ff00, 0x0000ff];
+
+    for (let y = 0; y < gameState.brickInfo.count.row; y++) {
+        for (let x = 0; x < gameState.brickInfo.count.col; x++) {
+            const brickX = gameState.brickInfo.offset.left + x * (gameState.brickInfo.width + gameState.brickInfo.padding);
+            const brickY = gameState.brickInfo.offset.top + y * (gameState.brickInfo.height + gameState.brickInfo.padding);
+
+            const brick = gameState.bricks.create(brickX, brickY, null);
+            brick.body.setSize(gameState.brickInfo.width, gameState.brickInfo.height);
+            brick.setData('color', brickColors[y % brickColors.length]);
+
+            // Draw brick
+            gameState.brickGraphics.fillStyle(brickColors[y % brickColors.length], 1);
+            gameState.brickGraphics.fillRect(
+                brickX - gameState.brickInfo.width/2,
+                brickY - gameState.brickInfo.height/2,
+                gameState.brickInfo.width,
+                gameState.brickInfo.height
+            );
+        }
+    }
+
+    // Set up collisions
+    this.physics.add.collider(gameState.ball, gameState.bricks, hitBrick, null, this);
+    this.physics.add.collider(gameState.ball, gameState.paddle, hitPaddle, null, this);
+
+    // Controls
+    gameState.cursors = this.input.keyboard.addKeys(params.keys);
+
+    // Game over text
+    gameState.gameOverText = AI2D.banner(this, 400, 300);
+
+    // Spacebar to start
+    this.input.keyboard.on('keydown-SPACE', function() {
+        if (gameState.ballOnPaddle) {
+            gameState.ball.setVelocity(-75, -300);
+            gameState.ballOnPaddle = false;
+        }
+    }, this);
+
+    // Display instructions
+    const instructions = this.add.text(400, 450, params.instructions,
+        { fontSize: '18px', fill: '#fff', align: 'center' }
+    );
+    instructions.setOrigin(0.5);
+}
+
+function update() {
+    if (gameState.gameOver) {
+        return;
+    }
+
+    // Move paddle with cursor keys
+    if (gameState.cursors.left.isDown) {
+        gameState.paddle.x -= 7;
+        if (gameState.ballOnPaddle) {
+            gameState.ball.x -= 7;
+        }
+    } else if (gameState.cursors.right.isDown) {
+        gameState.paddle.x += 7;
+        if (gameState.ballOnPaddle) {
+            gameState.ball.x += 7;
+        }
+    }
+
+    // Keep paddle on screen
+    gameState.paddle.x = Phaser.Math.Clamp(gameState.paddle.x, 50, config.width - 50);
+
+    // Redraw paddle
+    gameState.paddleGraphics.clear();
+    gameState.paddleGraphics.fillStyle(0xffffff, 1);
+    gameState.paddleGraphics.fillRect(gameState.paddle.x - 50, gameState.paddle.y - 10, 100, 20);
+
+    // Redraw ball at new position
+    gameState.ballGraphics.clear();
+    gameState.ballGraphics.fillStyle(0xffffff, 1);
+    gameState.ballGraphics.fillCircle(gameState.ball.x, gameState.ball.y, 10);
+
+    if (gameState.ballOnPaddle) {
+        gameState.ball.setPosition(gameState.paddle.x, gameState.paddle.y - 20);
+    }
+}
+
+function hitBrick(ball, brick) {
+    brick.disableBody(true, true);
+
+    // Remove brick from graphics
+    const brickX = brick.x;
+    const brickY = brick.y;
+    const color = brick.getData('color');
+
+    // Redraw bricks (clear and redraw all remaining bricks)
+    updateBrickGraphics.call(this);
+
+    gameState.score += 10;
+    gameState.scoreText.setText('Score: ' + gameState.score);
+
+    // Check if all bricks are gone
+    if (gameState.bricks.countActive() === 0) {
+        gameWin.call(this);
+    }
+}
+
+function updateBrickGraphics() {
+    // Clear and redraw all bricks
+    gameState.brickGraphics.clear();
+
+    gameState.bricks.getChildren().forEach(function(brick) {
+        if (brick.active) {
+            gameState.brickGraphics.fillStyle(brick.getData('color'), 1);
+            gameState.brickGraphics.fillRect(
+                brick.x - gameState.brickInfo.width/2,
+                brick.y - gameState.brickInfo.height/2,
+                gameState.brickInfo.width,
+                gameState.brickInfo.height
+            );
+        }
+    });
+}
+
+function hitPaddle(ball, paddle) {
+    // Calculate relative position of ball on paddle (-1 to 1)
+    const diff = ball.x - paddle.x;
+
+    if (diff < 0) {
+        // Left side of paddle
+        ball.body.setVelocityX(10 * diff);
+    } else if (diff > 0) {
+        // Right side of paddle
+        ball.body.setVelocityX(10 * diff);
+    } else {
+        // Center of paddle
+        ball.body.setVelocityX(2 + Math.random() * 8);
+    }
+}
+
+function lostBall() {
+    gameState.lives--;
+    gameState.livesText.setText('Lives: ' + gameState.lives);
+
+    if (gameState.lives === 0) {
+        gameOver.call(this);
+    } else {
+        gameState.ballOnPaddle = true;
+        gameState.ball.setVelocity(0, 0);
+    }
+}
+
+function gameOver() {
+    gameState.ball.setVelocity(0, 0);
+    AI2D.endGame(this, gameState, 'GAME OVER');
+}
+
+function gameWin() {
+    gameState.ball.setVelocity(0, 0);
+    AI2D.endGame(this, gameState, 'YOU WIN!');
+}
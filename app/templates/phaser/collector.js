@@ -0,0 +1,132 @@
+const config = AI2D.config({
+    width: 800,
+    height: 600,
+    backgroundColor: params.background,
+    physics: true,
+    create: create,
+    update: update
+});
+
+const gameState = {
+    score: 0,
+    gameOver: false,
+    totalItems: params.total_items,
+    collectedItems: 0,
+    playerSpeed: 200
+};
+
+const game = AI2D.start(config);
+
+function create() {
+    // Score text
+    gameState.scoreText = AI2D.scoreText(this);
+
+    // Create player
+    gameState.player = this.physics.add.sprite(400, 300, null);
+    gameState.player.body.setSize(32, 32);
+
+    // Draw player
+    const playerGraphics = this.add.graphics();
+    playerGraphics.fillStyle(0xffff00, 1);
+    playerGraphics.fillCircle(gameState.player.x, gameState.player.y, 16);
+    playerGraphics.setName('playerGraphics');
+
+    // Create items
+    gameState.items = this.physics.add.group();
+
+    // Create obstacles
+    gameState.obstacles = this.physics.add.staticGroup();
+
+    // Create random items
+    for (let i = 0; i < gameState.totalItems; i++) {
+        const x = Phaser.Math.Between(50, config.width - 50);
+        const y = Phaser.Math.Between(50, config.height - 50);
+
+        const item = gameState.items.create(x, y, null);
+        item.body.setSize(24, 24);
+
+        // Draw item
+        const itemGraphics = this.add.graphics();
+        itemGraphics.fillStyle(0x00ff00, 1);
+        itemGraphics.fillRect(x - 12, y - 12, 24, 24);
+    }
+
+    // Create random obstacles
+    for (let i = 0; i < 5; i++) {
+        const x = Phaser.Math.Between(100, config.width - 100);
+        const y = Phaser.Math.Between(100, config.height - 100);
+        const width = Phaser.Math.Between(50, 100);
+        const height = Phaser.Math.Between(20, 60);
+
+        const obstacle = gameState.obstacles.create(x, y, null);
+        obstacle.body.setSize(width, height);
+
+        // Draw obstacle
+        const obstacleGraphics = this.add.graphics();
+        obstacleGraphics.fillStyle(0xff0000, 1);
+        obstacleGraphics.fillRect(x - width/2, y - height/2, width, height);
+    }
+
+    // Set up collisions
+    this.physics.add.overlap(gameState.player, gameState.items, collectItem, null, this);
+    this.physics.add.collider(gameState.player, gameState.obstacles, hitObstacle, null, this);
+
+    // Controls
+    gameState.cursors = this.input.keyboard.addKeys(params.keys);
+
+    // Game over text
+    gameState.gameOverText = AI2D.banner(this, 400, 300);
+}
+
+function update() {
+    if (gameState.gameOver) {
+        return;
+    }
+
+    // Player movement
+    gameState.player.setVelocity(0);
+
+    if (gameState.cursors.left.isDown) {
+        gameState.player.setVelocityX(-gameState.playerSpeed);
+    } else if (gameState.cursors.right.isDown) {
+        gameState.player.setVelocityX(gameState.playerSpeed);
+    }
+
+    if (gameState.cursors.up.isDown) {
+        gameState.player.setVelocityY(-gameState.playerSpeed);
+    } else if (gameState.cursors.down.isDown) {
+        gameState.player.setVelocityY(gameState.playerSpeed);
+    }
+
+    // Update player graphics position
+    this.children.getByName('playerGraphics')?.destroy();
+    const playerGraphics = this.add.graphics({ name: 'playerGraphics' });
+    playerGraphics.fillStyle(0xffff00, 1);
+    playerGraphics.fillCircle(gameState.player.x, gameState.player.y, 16);
+}
+
+function collectItem(player, item) {
+    item.disableBody(true, true);
+
+    // Update score
+    gameState.score += 10;
+    gameState.scoreText.setText('Score: ' + gameState.score);
+
+    // Update collected items counter
+    gameState.collectedItems++;
+
+    // Check win condition
+    if (gameState.collectedItems >= gameState.totalItems) {
+        gameWin.call(this);
+    }
+}
+
+function hitObstacle(player, obstacle) {
+    this.physics.pause();
+    AI2D.endGame(this, gameState, 'GAME OVER');
+}
+
+function gameWin() {
+    this.physics.pause();
+    AI2D.endGame(this, gameState, 'YOU WIN!');
+}
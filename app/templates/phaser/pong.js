@@ -0,0 +1,195 @@
+const config = AI2D.config({
+    width: 800,
+    height: 600,
+    backgroundColor: params.background,
+    physics: true,
+    create: create,
+    update: update
+});
+
+const gameState = {
+    player1Score: 0,
+    player2Score: 0,
+    gameOver: false,
+    paddleSpeed: 5,
+    scoreToWin: params.score_to_win
+};
+
+const game = AI2D.start(config);
+
+function create() {
+    // Add center line
+    const centerLine = this.add.graphics();
+    centerLine.lineStyle(2, 0xffffff, 1);
+    centerLine.beginPath();
+    centerLine.moveTo(400, 0);
+    centerLine.lineTo(400, 600);
+    centerLine.strokePath();
+
+    // Create paddles
+    gameState.player1 = this.physics.add.sprite(50, 300, null);
+    gameState.player1.body.setSize(15, 100);
+    gameState.player1.body.immovable = true;
+    gameState.player1.setCollideWorldBounds(true);
+
+    gameState.player2 = this.physics.add.sprite(750, 300, null);
+    gameState.player2.body.setSize(15, 100);
+    gameState.player2.body.immovable = true;
+    gameState.player2.setCollideWorldBounds(true);
+
+    // Draw paddles
+    gameState.paddlesGraphics = this.add.graphics({ name: 'paddlesGraphics' });
+    updatePaddles();
+
+    // Create ball
+    gameState.ball = this.physics.add.sprite(400, 300, null);
+    gameState.ball.body.setSize(10, 10);
+    gameState.ball.body.bounce.set(1);
+    gameState.ball.setCollideWorldBounds(true);
+
+    // Draw ball
+    gameState.ballGraphics = this.add.graphics({ name: 'ballGraphics' });
+    updateBall();
+
+    // Set initial ball velocity with delay
+    launchBall.call(this);
+
+    // Set up collisions
+    this.physics.add.collider(gameState.ball, gameState.player1, hitPaddle, null, this);
+    this.physics.add.collider(gameState.ball, gameState.player2, hitPaddle, null, this);
+
+    // Add world bounds event for top and bottom
+    gameState.ball.body.onWorldBounds = true;
+
+    // Score
+    gameState.player1Score = 0;
+    gameState.player2Score = 0;
+    gameState.scoreText1 = this.add.text(200, 50, '0', { fontSize: '64px', fill: '#fff' }).setOrigin(0.5);
+    gameState.scoreText2 = this.add.text(600, 50, '0', { fontSize: '64px', fill: '#fff' }).setOrigin(0.5);
+
+    // Controls
+    gameState.player1Keys = this.input.keyboard.addKeys(params.player1_keys);
+    gameState.player2Keys = this.input.keyboard.addKeys(params.player2_keys);
+
+    // Game over text
+    gameState.gameOverText = AI2D.banner(this, 400, 300);
+
+    // Instructions
+    const instructions = this.add.text(400, 550, params.instructions,
+        { fontSize: '16px', fill: '#fff' }
+    ).setOrigin(0.5);
+}
+
+function update() {
+    if (gameState.gameOver) {
+        return;
+    }
+
+    // Update paddle positions
+    // Player 1 controls
+    if (gameState.player1Keys.up.isDown) {
+        gameState.player1.y -= gameState.paddleSpeed;
+    } else if (gameState.player1Keys.down.isDown) {
+        gameState.player1.y += gameState.paddleSpeed;
+    }
+
+    // Player 2 controls
+    if (gameState.player2Keys.up.isDown) {
+        gameState.player2.y -= gameState.paddleSpeed;
+    } else if (gameState.player2Keys.down.isDown) {
+        gameState.player2.y += gameState.paddleSpeed;
+    }
+
+    // Update graphics
+    updatePaddles();
+    updateBall();
+
+    // Check for scoring
+    checkBallBounds.call(this);
+}
+
+function updatePaddles() {
+    gameState.paddlesGraphics.clear();
+    gameState.paddlesGraphics.fillStyle(0xffffff, 1);
+    gameState.paddlesGraphics.fillRect(gameState.player1.x - 7.5, gameState.player1.y - 50, 15, 100);
+    gameState.paddlesGraphics.fillRect(gameState.player2.x - 7.5, gameState.player2.y - 50, 15, 100);
+}
+
+function updateBall() {
+    gameState.ballGraphics.clear();
+    gameState.ballGraphics.fillStyle(0xffffff, 1);
+    gameState.ballGraphics.fillRect(gameState.ball.x - 5, gameState.ball.y - 5, 10, 10);
+}
+
+function checkBallBounds() {
+    // Check for scoring
+    if (gameState.ball.x < 0) {
+        // Player 2 scores
+        gameState.player2Score++;
+        gameState.scoreText2.setText(gameState.player2Score);
+        resetBall.call(this);
+        checkWinCondition.call(this);
+    } else if (gameState.ball.x > config.width) {
+        // Player 1 scores
+        gameState.player1Score++;
+        gameState.scoreText1.setText(gameState.player1Score);
+        resetBall.call(this);
+        checkWinCondition.call(this);
+    }
+}
+
+function checkWinCondition() {
+    if (gameState.player1Score >= gameState.scoreToWin) {
+        gameOver.call(this, 'PLAYER 1 WINS');
+    } else if (gameState.player2Score >= gameState.scoreToWin) {
+        gameOver.call(this, 'PLAYER 2 WINS');
+    }
+}
+
+function gameOver(text) {
+    this.physics.pause();
+    AI2D.endGame(this, gameState, text);
+}
+
+function hitPaddle(ball, paddle) {
+    // Increase horizontal velocity when hit
+    let velocityX = Math.abs(ball.body.velocity.x);
+    velocityX = Math.min(velocityX + 20, 600); // Cap maximum speed
+
+    // Calculate vertical angle based on where ball hit the paddle
+    let diff = 0;
+    if (paddle === gameState.player1) {
+        // Right direction if hit player 1
+        ball.body.setVelocityX(velocityX);
+        diff = ball.y - paddle.y;
+    } else {
+        // Left direction if hit player 2
+        ball.body.setVelocityX(-velocityX);
+        diff = ball.y - paddle.y;
+    }
+
+    // Change vertical velocity based on where the ball hit the paddle
+    // Middle of paddle = low angle, edges = high angle
+    // Scale from -300 to 300 based on position
+    const scaleFactor = 6;
+    ball.body.setVelocityY(diff * scaleFactor);
+}
+
+function resetBall() {
+    gameState.ball.setPosition(400, 300);
+    launchBall.call(this);
+}
+
+function launchBall() {
+    // Reset velocity
+    gameState.ball.body.setVelocity(0);
+
+    // Random direction with slight delay
+    this.time.delayedCall(1000, function() {
+        // Random direction (left or right)
+        const velocityX = (Math.random() > 0.5 ? 1 : -1) * 300;
+        // Random angle for Y velocity (-100 to 100)
+        const velocityY = (Math.random() - 0.5) * 200;
+        gameState.ball.body.setVelocity(velocityX, velocityY);
+    }, [], this);
+}
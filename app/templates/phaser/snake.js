@@ -0,0 +1,201 @@
+const config = AI2D.config({
+    width: 640,
+    height: 480,
+    backgroundColor: params.background,
+    physics: true,
+    create: create,
+    update: update
+});
+
+const gameState = {
+    snake: null,
+    food: null,
+    cursors: null,
+    speed: 100,
+    lastMoveTime: 0,
+    direction: { x: 1, y: 0 },
+    nextDirection: { x: 1, y: 0 },
+    snakeBody: [],
+    gridSize: 20,
+    score: 0,
+    gameOver: false
+};
+
+const game = AI2D.start(config);
+
+function create() {
+    // Create snake head
+    gameState.snake = this.add.rectangle(10 * gameState.gridSize, 10 * gameState.gridSize, gameState.gridSize, gameState.gridSize, 0x00ff00);
+    gameState.snakeBody = [];
+
+    // Create initial body segments (start with 2 segments)
+    for (let i = 0; i < 2; i++) {
+        const segment = this.add.rectangle(
+            gameState.snake.x - ((i + 1) * gameState.gridSize),
+            gameState.snake.y,
+            gameState.gridSize,
+            gameState.gridSize,
+            0x008800
+        );
+        gameState.snakeBody.push(segment);
+    }
+
+    // Create food
+    gameState.food = this.add.rectangle(300, 300, gameState.gridSize, gameState.gridSize, 0xff0000);
+
+    // Set up random food position
+    placeFood.call(this);
+
+    // Set up keyboard control
+    gameState.cursors = this.input.keyboard.addKeys(params.keys);
+
+    // Score text
+    gameState.scoreText = AI2D.scoreText(this, '#000');
+
+    // Game over text
+    gameState.gameOverText = AI2D.banner(this, 320, 240, 'Game Over!\nPress R to restart', { fontSize: '32px', fill: '#000' });
+
+    // Restart key
+    this.input.keyboard.on('keydown-R', function () {
+        this.scene.restart();
+    }, this);
+}
+
+function update(time) {
+    // Game over check
+    if (gameState.gameOver) return;
+
+    // Handle input for direction change
+    if (gameState.cursors.left.isDown && gameState.direction.x !== 1) {
+        gameState.nextDirection = { x: -1, y: 0 };
+    } else if (gameState.cursors.right.isDown && gameState.direction.x !== -1) {
+        gameState.nextDirection = { x: 1, y: 0 };
+    } else if (gameState.cursors.up.isDown && gameState.direction.y !== 1) {
+        gameState.nextDirection = { x: 0, y: -1 };
+    } else if (gameState.cursors.down.isDown && gameState.direction.y !== -1) {
+        gameState.nextDirection = { x: 0, y: 1 };
+    }
+
+    // Move snake based on tick
+    if (time >= gameState.lastMoveTime + gameState.speed) {
+        gameState.lastMoveTime = time;
+        moveSnake.call(this);
+    }
+}
+
+function moveSnake() {
+    // Update direction
+    gameState.direction = gameState.nextDirection;
+
+    // Calculate new position
+    const snakeX = gameState.snake.x + gameState.direction.x * gameState.gridSize;
+    const snakeY = gameState.snake.y + gameState.direction.y * gameState.gridSize;
+
+    // Move body segments
+    for (let i = gameState.snakeBody.length - 1; i > 0; i--) {
+        gameState.snakeBody[i].x = gameState.snakeBody[i-1].x;
+        gameState.snakeBody[i].y = gameState.snakeBody[i-1].y;
+    }
+
+    // If there's at least one body segment, move it to head's position
+    if (gameState.snakeBody.length > 0) {
+        gameState.snakeBody[0].x = gameState.snake.x;
+        gameState.snakeBody[0].y = gameState.snake.y;
+    }
+
+    // Move head
+    gameState.snake.x = snakeX;
+    gameState.snake.y = snakeY;
+
+    // Check collisions
+    checkCollision.call(this);
+    checkFoodCollision.call(this);
+}
+
+function checkCollision() {
+    // Check wall collision
+    if (gameState.snake.x < 0 ||
+        gameState.snake.x >= config.width ||
+        gameState.snake.y < 0 ||
+        gameState.snake.y >= config.height) {
+        gameOver.call(this);
+        return;
+    }
+
+    // Check self collision
+    for (let i = 0; i < gameState.snakeBody.length; i++) {
+        if (gameState.snake.x === gameState.snakeBody[i].x &&
+            gameState.snake.y === gameState.snakeBody[i].y) {
+            gameOver.call(this);
+            return;
+        }
+    }
+}
+
+function checkFoodCollision() {
+    if (gameState.snake.x === gameState.food.x &&
+        gameState.snake.y === gameState.food.y) {
+        // Grow snake
+        const lastSegment = gameState.snakeBody.length > 0
+            ? gameState.snakeBody[gameState.snakeBody.length - 1]
+            : gameState.snake;
+
+        const newSegment = this.add.rectangle(
+            lastSegment.x,
+            lastSegment.y,
+            gameState.gridSize,
+            gameState.gridSize,
+            0x008800
+        );
+        gameState.snakeBody.push(newSegment);
+
+        // Update score
+        gameState.score += 10;
+        gameState.scoreText.setText(`Score: ${gameState.score}`);
+
+        // Place new food
+        placeFood.call(this);
+
+        // Increase speed slightly
+        gameState.speed = Math.max(50, gameState.speed - 1);
+    }
+}
+
+function placeFood() {
+    const gridWidth = Math.floor(config.width / gameState.gridSize);
+    const gridHeight = Math.floor(config.height / gameState.gridSize);
+
+    let foodX, foodY;
+    let validPosition = false;
+
+    // Keep generating positions until a valid one is found
+    while (!validPosition) {
+        foodX = Math.floor(Math.random() * gridWidth) * gameState.gridSize;
+        foodY = Math.floor(Math.random() * gridHeight) * gameState.gridSize;
+
+        validPosition = true;
+
+        // Check if food is on snake head
+        if (foodX === gameState.snake.x && foodY === gameState.snake.y) {
+            validPosition = false;
+            continue;
+        }
+
+        // Check if food is on snake body
+        for (let i = 0; i < gameState.snakeBody.length; i++) {
+            if (foodX === gameState.snakeBody[i].x && foodY === gameState.snakeBody[i].y) {
+                validPosition = false;
+                break;
+            }
+        }
+    }
+
+    // Set food position
+    gameState.food.x = foodX;
+    gameState.food.y = foodY;
+}
+
+function gameOver() {
+    gameState.gameOver = true;
+    gameState.gameOverText.visible = true;
+}
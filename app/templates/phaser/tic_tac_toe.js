@@ -0,0 +1,235 @@
+const config = AI2D.config({
+    width: 600,
+    height: 600,
+    backgroundColor: params.background,
+    create: create
+});
+
+const BOARD_SIZE = params.size;
+const SYMBOLS = params.symbols;
+
+const gameState = {
+    board: [],
+    currentPlayer: 0,
+    gameOver: false,
+    winningLine: null,
+    cellSize: params.cell_size,
+    gridOffset: params.grid_offset
+};
+
+const game = AI2D.start(config);
+
+function create() {
+    const self = this;
+
+    // Reset state (the scene is restarted by the reset button)
+    gameState.board = [];
+    for (let row = 0; row < BOARD_SIZE; row++) {
+        gameState.board.push(new Array(BOARD_SIZE).fill(''));
+    }
+    gameState.currentPlayer = 0;
+    gameState.gameOver = false;
+
+    // Create game title
+    this.add.text(300, 50, params.title, { fontSize: '40px', fontWeight: 'bold', fill: '#333' }).setOrigin(0.5);
+
+    // Draw grid with better styling
+    const graphics = this.add.graphics();
+    const gridEnd = gameState.gridOffset + BOARD_SIZE * gameState.cellSize;
+
+    // Background for the grid
+    graphics.fillStyle(0xffffff, 1);
+    graphics.fillRoundedRect(gameState.gridOffset - 15, gameState.gridOffset - 15, gridEnd - gameState.gridOffset + 30, gridEnd - gameState.gridOffset + 30, 10);
+
+    // Grid lines
+    graphics.lineStyle(3, 0x333333, 1);
+    for (let i = 1; i < BOARD_SIZE; i++) {
+        const pos = gameState.gridOffset + i * gameState.cellSize;
+
+        // Vertical line
+        graphics.beginPath();
+        graphics.moveTo(pos, gameState.gridOffset);
+        graphics.lineTo(pos, gridEnd);
+        graphics.closePath();
+        graphics.strokePath();
+
+        // Horizontal line
+        graphics.beginPath();
+        graphics.moveTo(gameState.gridOffset, pos);
+        graphics.lineTo(gridEnd, pos);
+        graphics.closePath();
+        graphics.strokePath();
+    }
+
+    // Player turn text
+    gameState.turnText = this.add.text(300, 530, `Player ${SYMBOLS[0]} turn`, { fontSize: '28px', fill: '#333' }).setOrigin(0.5);
+
+    // Create clickable cells
+    for (let row = 0; row < BOARD_SIZE; row++) {
+        for (let col = 0; col < BOARD_SIZE; col++) {
+            const cellX = gameState.gridOffset + col * gameState.cellSize + gameState.cellSize/2;
+            const cellY = gameState.gridOffset + row * gameState.cellSize + gameState.cellSize/2;
+
+            const cell = this.add.rectangle(cellX, cellY, gameState.cellSize - 10, gameState.cellSize - 10, 0xffffff, 0);
+            cell.setInteractive();
+            cell.row = row;
+            cell.col = col;
+
+            cell.on('pointerover', function() {
+                if (gameState.board[this.row][this.col] === '' && !gameState.gameOver) {
+                    this.setStrokeStyle(2, 0x0000ff);
+                }
+            });
+
+            cell.on('pointerout', function() {
+                this.setStrokeStyle(0);
+            });
+
+            cell.on('pointerdown', function() {
+                if (gameState.board[this.row][this.col] === '' && !gameState.gameOver) {
+                    const symbol = SYMBOLS[gameState.currentPlayer];
+
+                    // Place marker
+                    gameState.board[this.row][this.col] = symbol;
+
+                    // Draw the first player's marker as a cross, the second as a circle
+                    if (gameState.currentPlayer === 0) {
+                        drawX(self, cellX, cellY);
+                    } else {
+                        drawO(self, cellX, cellY);
+                    }
+
+                    // Check for win
+                    if (checkWin(self, this.row, this.col, symbol)) {
+                        gameState.turnText.setText(`Player ${symbol} wins!`);
+                        gameState.gameOver = true;
+                    } else if (checkDraw()) {
+                        gameState.turnText.setText('Game Draw!');
+                        gameState.gameOver = true;
+                    } else {
+                        // Switch player
+                        gameState.currentPlayer = 1 - gameState.currentPlayer;
+                        gameState.turnText.setText(`Player ${SYMBOLS[gameState.currentPlayer]} turn`);
+                    }
+                }
+            });
+        }
+    }
+
+    // Add reset button
+    const resetButton = this.add.text(520, 50, 'Reset', {
+        fontSize: '24px',
+        fill: '#fff',
+        backgroundColor: '#4CAF50',
+        padding: { left: 15, right: 15, top: 10, bottom: 10 }
+    }).setOrigin(0.5).setInteractive();
+
+    resetButton.on('pointerover', function() {
+        this.setBackgroundColor('#45a049');
+    });
+
+    resetButton.on('pointerout', function() {
+        this.setBackgroundColor('#4CAF50');
+    });
+
+    resetButton.on('pointerdown', function() {
+        self.scene.restart();
+    });
+}
+
+function drawX(scene, x, y) {
+    const size = gameState.cellSize * 0.3;
+
+    // Draw the X with line graphics
+    const graphics = scene.add.graphics();
+    graphics.lineStyle(8, 0xFF0000, 1);
+
+    // First diagonal
+    graphics.beginPath();
+    graphics.moveTo(x - size, y - size);
+    graphics.lineTo(x + size, y + size);
+    graphics.closePath();
+    graphics.strokePath();
+
+    // Second diagonal
+    graphics.beginPath();
+    graphics.moveTo(x + size, y - size);
+    graphics.lineTo(x - size, y + size);
+    graphics.closePath();
+    graphics.strokePath();
+}
+
+function drawO(scene, x, y) {
+    const size = gameState.cellSize * 0.3;
+
+    // Draw the O with circle graphics
+    const graphics = scene.add.graphics();
+    graphics.lineStyle(8, 0x0000FF, 1);
+    graphics.strokeCircle(x, y, size);
+}
+
+function lineComplete(symbol, startRow, startCol, stepRow, stepCol) {
+    for (let i = 0; i < BOARD_SIZE; i++) {
+        if (gameState.board[startRow + i * stepRow][startCol + i * stepCol] !== symbol) {
+            return false;
+        }
+    }
+    return true;
+}
+
+function checkWin(scene, row, col, symbol) {
+    const last = BOARD_SIZE - 1;
+
+    // Check row
+    if (lineComplete(symbol, row, 0, 0, 1)) {
+        drawWinningLine(scene, 0, row, last, row);
+        return true;
+    }
+
+    // Check column
+    if (lineComplete(symbol, 0, col, 1, 0)) {
+        drawWinningLine(scene, col, 0, col, last);
+        return true;
+    }
+
+    // Check diagonals
+    if (row === col && lineComplete(symbol, 0, 0, 1, 1)) {
+        drawWinningLine(scene, 0, 0, last, last);
+        return true;
+    }
+
+    if (row + col === last && lineComplete(symbol, 0, last, 1, -1)) {
+        drawWinningLine(scene, last, 0, 0, last);
+        return true;
+    }
+
+    return false;
+}
+
+function drawWinningLine(scene, startCol, startRow, endCol, endRow) {
+    // Calculate the pixel positions
+    const startX = gameState.gridOffset + startCol * gameState.cellSize + gameState.cellSize/2;
+    const startY = gameState.gridOffset + startRow * gameState.cellSize + gameState.cellSize/2;
+    const endX = gameState.gridOffset + endCol * gameState.cellSize + gameState.cellSize/2;
+    const endY = gameState.gridOffset + endRow * gameState.cellSize + gameState.cellSize/2;
+
+    // Draw the winning line
+    const graphics = scene.add.graphics();
+    graphics.lineStyle(5, 0x00FF00, 1);
+    graphics.beginPath();
+    graphics.moveTo(startX, startY);
+    graphics.lineTo(endX, endY);
+    graphics.closePath();
+    graphics.strokePath();
+}
+
+function checkDraw() {
+    for (let row = 0; row < BOARD_SIZE; row++) {
+        for (let col = 0; col < BOARD_SIZE; col++) {
+            if (gameState.board[row][col] === '') {
+                return false;
+            }
+        }
+    }
+    return true;
+}
@@ -0,0 +1,98 @@
+import logging
+import re
+from importlib.metadata import entry_points
+
+logger = logging.getLogger(__name__)
+
+# Entry point group third-party packages use to add game generators. Each entry
+# point's name is the game key and its object a function game_logic -> code.
+ENTRY_POINT_GROUP = "ai2d.game_generators"
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_game_key(name):
+    """Canonical key for a game name: "Tic-Tac-Toe", "tic tac toe" -> "tictactoe" """
+    return _NON_ALNUM_RE.sub("", str(name).lower())
+
+
+class UnknownGeneratorError(LookupError):
+    """Raised when no generator is registered for a game key"""
+
+
+class GeneratorRegistry:
+    """Maps normalized game keys to code generator functions"""
+
+    def __init__(self, default=None):
+        # Key resolve(use_default=True) falls back to for free-form games whose name matches no generator
+        self.default = normalize_game_key(default) if default else None
+        self._generators = {}
+
+    def register(self, *names):
+        """Decorator registering a generator under one or more game names"""
+        def decorator(fn):
+            for name in names:
+                self.add(name, fn)
+            return fn
+        return decorator
+
+    def add(self, name, fn):
+        key = normalize_game_key(name)
+        if not key:
+            raise ValueError(f"Invalid game generator name {name!r}")
+        existing = self._generators.get(key)
+        if existing is not None and existing is not fn:
+            raise ValueError(f"Game generator {key!r} is already registered")
+        self._generators[key] = fn
+
+    def get(self, name):
+        """Return the generator for a game name, raising UnknownGeneratorError if none"""
+        try:
+            return self._generators[normalize_game_key(name)]
+        except KeyError:
+            raise UnknownGeneratorError(
+                f"No game generator for {name!r} (known: {', '.join(self.keys())})"
+            ) from None
+
+    def _match(self, name):
+        # The whole name first, then each of its words
+        candidates = [normalize_game_key(name)] + [normalize_game_key(word) for word in str(name).split()]
+        for key in candidates:
+            if key in self._generators:
+                return key
+        return None
+
+    def key_for(self, game_logic):
+        """Generator key resolve(use_default=True) would pick for a game logic object, or None"""
+        return self._match(game_logic.get("name") or "") or self.default
+
+    def resolve(self, game_logic, use_default=False):
+        """Return (key, generator) for a game logic object
+
+        The whole name is looked up first, then each of its words, so "Super
+        Snake" still gets the snake generator. Names matching nothing raise
+        UnknownGeneratorError, unless use_default is set and the registry has
+        a default generator, in which case the fallback is logged.
+        """
+        name = game_logic.get("name") or ""
+        key = self._match(name)
+        if key is not None:
+            return key, self._generators[key]
+        if not use_default or self.default is None:
+            raise UnknownGeneratorError(f"No game generator for {name!r} (known: {', '.join(self.keys())})")
+        logger.warning("No game generator for %r, using %s", name, self.default)
+        return self.default, self._generators[self.default]
+
+    def keys(self):
+        return sorted(self._generators)
+
+    def load_entry_points(self, group=ENTRY_POINT_GROUP):
+        """Register generators published by installed packages; returns the keys added"""
+        added = []
+        for entry_point in entry_points(group=group):
+            try:
+                self.add(entry_point.name, entry_point.load())
+                added.append(normalize_game_key(entry_point.name))
+            except Exception as e:
+                logger.warning("Skipping game generator plugin %r: %s", entry_point.name, e)
+        return added
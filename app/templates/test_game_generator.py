@@ -0,0 +1,88 @@
+import json
+import time
+
+import pytest
+
+from app import config
+from app.templates import game_generator
+from app.templates.registry import UnknownGeneratorError
+
+
+def parse_delta(code):
+    """Return (game, params) from an AI2D.run(game, params) bundle"""
+    assert code.startswith("AI2D.run(") and code.endswith(");\n")
+    game, params = json.loads("[" + code[len("AI2D.run("):-len(");\n")] + "]")
+    return game, params
+
+
+def test_tic_tac_toe_uses_board_size_and_symbols():
+    game, params = parse_delta(game_generator._generate_tic_tac_toe_code({
+        "name": "Big Board",
+        "board": {"size": 4},
+        "players": {"symbols": ["A", "B"]},
+        "assets": {"background": "#102030"},
+    }))
+    assert game == "tic_tac_toe"
+    assert params["size"] == 4 and params["cell_size"] == 90
+    assert params["symbols"] == ["A", "B"]
+    assert params["background"] == "#102030"
+    assert params["title"] == "Big Board"
+
+
+def test_controls_and_rules_are_rendered():
+    _, params = parse_delta(game_generator._generate_pong_code({
+        "controls": {"player1": ["Q", "A"], "player2": ["UP", "DOWN"]},
+        "rules": {"winCondition": "First player to reach 5 points"},
+    }))
+    assert params["player1_keys"] == {"up": "Q", "down": "A"}
+    assert params["score_to_win"] == 5
+
+    _, params = parse_delta(game_generator._generate_snake_code({"controls": {"keys": ["w", "s", "a", "d"]}}))
+    assert params["keys"] == {"up": "W", "down": "S", "left": "A", "right": "D"}
+
+
+def test_invalid_values_fall_back_to_defaults():
+    _, params = parse_delta(game_generator._generate_breakout_code({
+        "controls": {"keys": ["LEFT", "'); alert(1); ('"]},
+        "assets": {"bricks": "multiple rows", "background": "red; evil()"},
+    }))
+    assert params["keys"] == {"left": "LEFT", "right": "RIGHT"}
+    assert params["brick_rows"] == 5
+    assert params["background"] == "#2d2d2d"
+
+
+def test_title_is_escaped_as_a_js_string():
+    code = game_generator._generate_tic_tac_toe_code({"name": "It's \"fun\"\n</script>"})
+    assert '"It\'s \\"fun\\"\\n</script>"' in code
+
+
+def test_runtime_contains_every_game():
+    for game in game_generator.TEMPLATE_FILES:
+        assert f'games["{game}"] = function (params) {{' in game_generator.RUNTIME_CODE
+    assert "params.size" in game_generator.RUNTIME_CODE
+    assert "{{" not in game_generator.RUNTIME_CODE
+    name = game_generator.runtime_name()
+    assert name.startswith("ai2d-runtime.") and name.endswith(".js")
+
+
+def test_bytecode_is_cached_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TEMPLATE_BYTECODE_CACHE_DIR", str(tmp_path))
+    env = game_generator._create_environment()
+    env.get_template(game_generator.RUNTIME_FILE)
+    assert any(path.name.startswith("__jinja2_") for path in tmp_path.iterdir())
+
+
+def test_rendering_is_sub_millisecond():
+    game_logic = {"gameType": "continuous", "name": "Snake", "controls": {"keys": ["UP", "DOWN", "LEFT", "RIGHT"]}}
+    game_generator.generate_game_code(game_logic)
+    runs = 200
+    started = time.perf_counter()
+    for _ in range(runs):
+        game_generator.generate_game_code(game_logic)
+    assert (time.perf_counter() - started) / runs < 0.001
+    assert set(game_generator.template_stats()["render_ms"]) == set(game_generator.TEMPLATE_FILES)
+
+
+def test_unknown_games_are_errors():
+    with pytest.raises(UnknownGeneratorError, match="Space Shooter"):
+        game_generator.generate_game_code({"gameType": "continuous", "name": "Space Shooter"})
@@ -0,0 +1,76 @@
+import pytest
+
+from app.models.phi2_model import GAME_TEMPLATES
+from app.templates import game_generator
+from app.templates.registry import GeneratorRegistry, UnknownGeneratorError, normalize_game_key
+
+
+def test_normalize_game_key():
+    assert normalize_game_key("Tic-Tac-Toe") == "tictactoe"
+    assert normalize_game_key("tic tac toe") == "tictactoe"
+    assert normalize_game_key("  Snake!! ") == "snake"
+
+
+def test_every_template_gets_its_own_generator():
+    expected = {
+        "tic": game_generator._generate_tic_tac_toe_code,
+        "snake": game_generator._generate_snake_code,
+        "pong": game_generator._generate_pong_code,
+        "breakout": game_generator._generate_breakout_code,
+    }
+    for key, game_logic in GAME_TEMPLATES.items():
+        assert game_generator.registry.resolve(game_logic)[1] is expected[key]
+    assert game_generator.generate_game_code(GAME_TEMPLATES["tic"]).startswith('AI2D.run("tic_tac_toe", ')
+
+
+def test_resolve_tries_words_then_opt_in_default(caplog):
+    registry = GeneratorRegistry(default="other")
+    snake, other = object(), object()
+    registry.add("Snake", snake)
+    registry.add("other", other)
+    assert registry.resolve({"name": "Super Snake"}) == ("snake", snake)
+    assert registry.resolve({"name": "Space Shooter"}, use_default=True) == ("other", other)
+    assert "No game generator for 'Space Shooter'" in caplog.text
+    assert registry.resolve({}, use_default=True) == ("other", other)
+
+
+def test_unknown_name_raises_without_opt_in():
+    registry = GeneratorRegistry(default="other")
+    registry.add("other", object())
+    with pytest.raises(UnknownGeneratorError, match="Space Shooter"):
+        registry.resolve({"name": "Space Shooter"})
+    with pytest.raises(UnknownGeneratorError):
+        registry.resolve({})
+
+
+def test_unknown_and_duplicate_keys_are_errors():
+    registry = GeneratorRegistry()
+    registry.add("pong", len)
+    registry.add("Pong", len)
+    with pytest.raises(ValueError):
+        registry.add("PONG", print)
+    with pytest.raises(ValueError):
+        registry.add("--", print)
+    with pytest.raises(UnknownGeneratorError, match="known: pong"):
+        registry.get("tennis")
+    with pytest.raises(UnknownGeneratorError):
+        registry.resolve({"name": "Tennis"}, use_default=True)
+    assert registry.get("P-O-N-G") is len
+
+
+def test_entry_points_register_generators(monkeypatch):
+    class FakeEntryPoint:
+        def __init__(self, name, obj):
+            self.name = name
+            self.obj = obj
+
+        def load(self):
+            if isinstance(self.obj, Exception):
+                raise self.obj
+            return self.obj
+
+    plugins = [FakeEntryPoint("Space Invaders", len), FakeEntryPoint("broken", ImportError("nope"))]
+    monkeypatch.setattr("app.templates.registry.entry_points", lambda group: plugins)
+    registry = GeneratorRegistry()
+    assert registry.load_entry_points() == ["spaceinvaders"]
+    assert registry.get("space-invaders") is len
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app import batch, config
+from app import pipeline as pipeline_module
+from app.batch import build_artifacts, generate_logic, store_games
+from app.cache import GenerationCache
+from app.catalog import GameCatalog
+from app.executor import Executors
+from app.packed_store import PackedArtifactStore, SegmentStore
+from app.pipeline import GenerationPipeline
+from app.store import ArtifactStore
+
+
+def built_game(prompt):
+    game = generate_logic(prompt)
+    _, game["code"], game["encoded"], _ = build_artifacts(game["game_logic"])
+    return game
+
+
+def test_store_games_writes_in_bulk(tmp_path):
+    catalog = GameCatalog(str(tmp_path / "catalog.db"))
+    stores = [
+        ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games")),
+        PackedArtifactStore(SegmentStore(str(tmp_path / "segments"), fsync=False), str(tmp_path / "runtime")),
+    ]
+    games = [built_game("a snake game"), built_game("a space shooter")]
+    for store in stores:
+        store_games(store, None, games)
+        for game in games:
+            game_id = game["digest"][:16]
+            assert store.has_game(game_id) and store.load_logic(game_id) == game["game_logic"]
+    assert store_games(stores[1], catalog, games) == 2
+    assert store_games(stores[1], catalog, games) == 0
+    assert catalog.get(games[0]["digest"][:16])["prompt"] == "a snake game"
+    assert len(stores[1].segments.keys()) == len(games) * 2 + sum(len(game["encoded"] or {}) for game in games)
+
+
+def test_generate_batch_dedupes_by_digest(tmp_path):
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    catalog = GameCatalog(str(tmp_path / "catalog.db"))
+    executors = Executors(io_workers=2, cpu_kind="thread")
+    pipeline = GenerationPipeline(store, GenerationCache(), executors, catalog)
+    prompts = ["a snake game", "A snake game", "a space shooter", "a snake game"]
+
+    async def run():
+        return [result async for result in pipeline.generate_batch(prompts, chunk_size=2)]
+
+    results = asyncio.run(run())
+    executors.shutdown()
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert [result["deduplicated"] for result in results] == [False, True, False, True]
+    assert results[0]["game_id"] == results[3]["game_id"] != results[2]["game_id"]
+    assert all(store.has_game(result["game_id"]) for result in results)
+    assert len(catalog) == 2
+
+
+def test_batch_generation_uses_the_code_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "BUNDLE_MINIFY", False)
+    monkeypatch.setattr(config, "BUNDLE_PRECOMPRESS", False)
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    cache = GenerationCache()
+    executors = Executors(io_workers=2, cpu_kind="thread")
+    pipeline = GenerationPipeline(store, cache, executors)
+    snake, pong = generate_logic("a snake game")["digest"], generate_logic("a pong game")["digest"]
+    cache.put_code(snake, "AI2D.run('cached', {});\n")
+
+    async def run():
+        return [result async for result in pipeline.generate_batch(["a snake game", "a pong game"])]
+
+    results = asyncio.run(run())
+    executors.shutdown()
+    assert store.load_bundle(results[0]["game_id"]) == b"AI2D.run('cached', {});\n"
+    # Code built by the batch is cached for single generations of the same logic
+    assert cache.get_code(pong).startswith("AI2D.run(")
+
+
+def test_unknown_games_fail_without_being_stored(tmp_path, monkeypatch):
+    unknown = {"gameType": "continuous", "name": "Space Shooter"}
+    monkeypatch.setattr(pipeline_module, "generate_game_logic", lambda prompt: unknown)
+    monkeypatch.setattr(batch, "generate_game_logic", lambda prompt: unknown)
+    assert "Space Shooter" in generate_logic("a space shooter")["error"]
+
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    executors = Executors(io_workers=1, cpu_kind="thread")
+    pipeline = GenerationPipeline(store, GenerationCache(), executors)
+
+    async def run():
+        with pytest.raises(pipeline_module.GenerationError, match="Space Shooter"):
+            await pipeline.generate("a space shooter")
+        return [result async for result in pipeline.generate_batch(["a space shooter"])]
+
+    results = asyncio.run(run())
+    executors.shutdown()
+    assert "Space Shooter" in results[0]["error"]
+    assert not list(store.logic_ids())
@@ -0,0 +1,122 @@
+import gzip
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import bundles
+from app.bundles import BundleStats, PrecompressedStaticFiles, accepted_encodings, build_bundle
+from app.store import ArtifactStore
+
+CODE = """
+// Generated game
+const config = {
+    width: 800,   // pixels
+    height: 600
+};
+"""
+
+# Large enough for gzip to pay off
+LARGE_CODE = CODE + "".join(f"const level{i} = {{width: 800, height: 600}};\n" for i in range(20))
+
+
+def test_build_bundle_minifies_and_compresses():
+    assert build_bundle(CODE)["code"] == "const config={width:800,height:600};"
+    bundle = build_bundle(LARGE_CODE)
+    assert gzip.decompress(bundle["encoded"]["gzip"]) == bundle["code"].encode("utf-8")
+    stats = bundle["stats"]
+    assert stats["raw_bytes"] == len(LARGE_CODE)
+    assert stats["minified_bytes"] == len(bundle["code"])
+    assert stats["gzip_bytes"] == len(bundle["encoded"]["gzip"])
+    assert stats["seconds"] >= 0
+
+    plain = build_bundle(CODE, minify=False, precompress=False)
+    assert plain["code"] == CODE and plain["encoded"] == {}
+
+
+def test_encodings_that_do_not_shrink_are_skipped():
+    bundle = build_bundle("var a=1;")
+    assert bundle["encoded"] == {}
+    assert bundle["stats"]["gzip_bytes"] == bundle["stats"]["minified_bytes"] == 8
+
+    large = build_bundle("var player = {x: 1, y: 2};\n" * 50)
+    assert "gzip" in large["encoded"]
+    assert large["stats"]["gzip_bytes"] == len(large["encoded"]["gzip"]) < large["stats"]["minified_bytes"]
+
+
+def test_bundle_stats_totals():
+    totals = BundleStats()
+    totals.record({"raw_bytes": 100, "minified_bytes": 60, "gzip_bytes": 20, "seconds": 0.002})
+    totals.record({"raw_bytes": 100, "minified_bytes": 40, "gzip_bytes": 20, "seconds": 0.004})
+    stats = totals.stats()
+    assert stats["bundles"] == 2
+    assert stats["minified_bytes"] == 100 and stats["minified_ratio"] == 0.5
+    assert stats["gzip_ratio"] == 0.2
+    assert stats["postprocess_ms_avg"] == 3.0
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert accepted_encodings("") == set()
+
+
+def test_precompressed_siblings_are_served(tmp_path, monkeypatch):
+    monkeypatch.setattr(bundles, "brotli", None)
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    bundle = build_bundle(LARGE_CODE)
+    path = store.put_bundle("abc", bundle["code"], bundle["encoded"])
+    assert os.path.exists(path + ".gz")
+    url = store.bundle_url("abc")
+
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)), name="static")
+    client = TestClient(app)
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == bundle["code"]
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.text == bundle["code"]
+
+
+def test_immutable_prefixes_get_long_lived_cache_headers(tmp_path):
+    (tmp_path / "runtime").mkdir()
+    (tmp_path / "runtime" / "ai2d-runtime.abc.js").write_text("var x;")
+    (tmp_path / "other.js").write_text("var y;")
+
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path), immutable_prefixes=("runtime/",)))
+    client = TestClient(app)
+
+    response = client.get("/static/runtime/ai2d-runtime.abc.js")
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert "cache-control" not in client.get("/static/other.js").headers
+
+
+def test_immutable_files_use_name_etags(tmp_path, monkeypatch):
+    monkeypatch.setattr(bundles, "brotli", None)
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    bundle = build_bundle(LARGE_CODE)
+    store.put_bundle("abc123", bundle["code"], bundle["encoded"])
+    url = store.bundle_url("abc123")
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path), immutable_prefixes=("games/",)))
+    client = TestClient(app)
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert plain.headers["etag"] == '"abc123.js"'
+    gzipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["etag"] == '"abc123.js.gz"'
+
+    revalidated = client.get(url,
+                             headers={"Accept-Encoding": "gzip", "If-None-Match": 'W/"abc123.js.gz"'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert "content-encoding" not in revalidated.headers
+    stale = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": '"abc123.js"'})
+    assert stale.status_code == 200
@@ -0,0 +1,77 @@
+from app.cache import GenerationCache, LRUCache, SQLiteCache, TieredCache, normalize_prompt
+
+LOGIC = {"name": "Snake"}
+
+
+def test_normalize_prompt():
+    assert normalize_prompt("  A   Snake\tGame ") == "a snake game"
+
+
+def test_lru_expires_after_ttl(clock):
+    cache = LRUCache(max_entries=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1 and len(cache) == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_tier_expires_and_is_promoted(tmp_path, clock):
+    disk = SQLiteCache(str(tmp_path / "cache.db"), "logic", ttl=100, clock=clock)
+    disk.set("a", {"x": 1})
+    # A new process: empty memory tier, same database
+    memory = LRUCache(max_entries=4)
+    cache = TieredCache(memory, SQLiteCache(disk.path, "logic", ttl=100, clock=clock))
+    assert cache.get("a") == {"x": 1}
+    assert memory.get("a") == {"x": 1}
+    assert SQLiteCache(disk.path, "code", clock=clock).get("a") is None
+
+    clock.now += 100
+    assert disk.get("a") is None
+
+
+def test_template_change_drops_cached_entries(tmp_path):
+    version = ["v1"]
+    cache = GenerationCache(disk_path=str(tmp_path / "cache.db"), fingerprint=lambda: version[0])
+    invalidated = []
+    cache.on_invalidate(lambda: invalidated.append(True))
+    digest = cache.put_logic("A snake game", LOGIC)
+    cache.put_code(digest, "var x;")
+    assert cache.get_logic("a snake  game") == (LOGIC, digest)
+    assert not cache.check_templates()
+
+    version[0] = "v2"
+    assert cache.check_templates()
+    assert cache.get_logic("a snake game") is None and cache.get_code(digest) is None
+    assert invalidated == [True] and cache.stats()["invalidations"] == 1
+    # Entries written under the old version are never read back from disk either
+    reopened = GenerationCache(disk_path=cache.logic.disk.path, fingerprint=lambda: "v2")
+    assert reopened.get_logic("a snake game") is None
+
+
+def test_template_checks_are_rate_limited(clock):
+    calls = []
+
+    def fingerprint():
+        calls.append(clock.now)
+        return f"v{len(calls)}"
+
+    cache = GenerationCache(fingerprint=fingerprint, check_seconds=5, clock=clock)
+    clock.now += 4
+    assert not cache.template_check_due() and not cache.check_templates()
+    assert len(calls) == 1
+    clock.now += 1
+    assert cache.template_check_due() and cache.check_templates()
+    assert len(calls) == 2 and not cache.template_check_due()
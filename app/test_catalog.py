@@ -0,0 +1,116 @@
+import pytest
+
+from app.catalog import GameCatalog, InvalidCursorError
+from app.store import ArtifactStore
+
+
+def make_catalog(tmp_path, **kwargs):
+    return GameCatalog(str(tmp_path / "catalog.db"), **kwargs)
+
+
+def test_add_get_and_totals(tmp_path):
+    catalog = make_catalog(tmp_path)
+    assert catalog.add("abc", "abc123", template="snake", name="Snake", prompt="a snake game",
+                       logic_bytes=100, bundle_bytes=40)
+    assert not catalog.add("abc", "abc123")
+    game = catalog.get("abc")
+    assert game["template"] == "snake" and game["prompt"] == "a snake game" and game["hits"] == 0
+    assert catalog.get("missing") is None
+    assert catalog.totals() == (1, 100, 40)
+    assert len(catalog) == 1
+
+
+def test_touch_counts_hits_in_batches(tmp_path, clock):
+    catalog = make_catalog(tmp_path, flush_seconds=10, clock=clock)
+    catalog.add("abc", "abc123")
+    assert catalog.touch("abc") and catalog.touch("abc")
+    assert not catalog.touch("missing")
+    assert catalog.stats()["pending_hits"] == 2 and catalog.flushes == 0
+
+    clock.now += 11
+    catalog.touch("abc")
+    assert catalog.flushes == 1
+    game = catalog.get("abc")
+    assert game["hits"] == 3 and game["last_accessed"] == clock.now
+
+
+def test_list_paginates_filters_and_searches(tmp_path, clock):
+    catalog = make_catalog(tmp_path, clock=clock)
+    for i in range(5):
+        clock.now += 1
+        catalog.add(f"g{i}", f"d{i}", template="snake" if i % 2 else "pong", name=f"Game {i}",
+                    prompt="fast_100%" if i == 3 else "slow")
+
+    games, cursor = catalog.list(limit=2)
+    assert [g["game_id"] for g in games] == ["g4", "g3"]
+    games, cursor = catalog.list(limit=2, cursor=cursor)
+    assert [g["game_id"] for g in games] == ["g2", "g1"]
+    games, cursor = catalog.list(limit=2, cursor=cursor)
+    assert [g["game_id"] for g in games] == ["g0"] and cursor is None
+
+    assert [g["game_id"] for g in catalog.list(template="snake")[0]] == ["g3", "g1"]
+    # Every word must prefix a word of the name or prompt; punctuation is ignored
+    assert [g["game_id"] for g in catalog.list(query="100%")[0]] == ["g3"]
+    assert [g["game_id"] for g in catalog.list(query="gam 2")[0]] == ["g2"]
+    assert [g["game_id"] for g in catalog.list(query="SLOW", template="pong", limit=1)[0]] == ["g4"]
+    assert catalog.list(query="fast slow")[0] == [] and catalog.list(query="%%")[0] == []
+
+    for _ in range(3):
+        catalog.touch("g1")
+    catalog.touch("g0")
+    clock.now += 5
+    games, _ = catalog.list(sort="popular", limit=2)
+    assert [g["game_id"] for g in games] == ["g1", "g0"]
+    assert [g["game_id"] for g in catalog.list(template="pong", sort="popular", limit=1)[0]] == ["g0"]
+
+    with pytest.raises(InvalidCursorError):
+        catalog.list(cursor="nope")
+    with pytest.raises(ValueError):
+        catalog.list(sort="random")
+
+
+def test_import_store(tmp_path):
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    store.put_logic("playable", {"name": "Snake"})
+    store.put_bundle("playable", "AI2D.run('snake', {});")
+    store.put_logic("logic-only", {"name": "Pong"})
+    catalog = make_catalog(tmp_path)
+
+    assert catalog.import_store(store, lambda game_logic: game_logic["name"].lower()) == 1
+    game = catalog.get("playable")
+    assert game["template"] == "snake" and game["name"] == "Snake"
+    assert (game["logic_bytes"], game["bundle_bytes"]) == store.artifact_sizes("playable")
+    assert catalog.import_store(store) == 0
+
+
+def test_reads_only_flush_hits_when_due(tmp_path, clock):
+    catalog = make_catalog(tmp_path, flush_seconds=10, clock=clock)
+    catalog.add("abc", "abc123", name="Snake")
+    catalog.touch("abc")
+    assert catalog.get("abc")["hits"] == 0 and catalog.list()[0][0]["hits"] == 0
+    clock.now += 10
+    assert catalog.get("abc")["hits"] == 1 and catalog.flushes == 1
+
+
+def test_search_and_popular_listings_use_indexes(tmp_path):
+    catalog = make_catalog(tmp_path)
+    catalog.add("abc", "abc123", template="snake", name="Snake", prompt="a snake game")
+    catalog.remove(["abc"])
+    assert catalog.list(query="snake")[0] == []
+
+    def plan(sql, *params):
+        return " ".join(row[-1] for row in catalog._conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+    assert "games_template_hits" in plan(
+        "SELECT game_id FROM games WHERE template = ? ORDER BY hits DESC, game_id DESC LIMIT 20", "snake")
+    assert "VIRTUAL TABLE INDEX" in plan(
+        "SELECT game_id FROM games WHERE rowid IN (SELECT rowid FROM games_fts WHERE games_fts MATCH ?)", "snake")
+
+
+def test_existing_catalogs_get_a_search_index(tmp_path):
+    catalog = make_catalog(tmp_path)
+    catalog.add("abc", "abc123", name="Snake")
+    # As created before the full-text index existed
+    catalog._conn.execute("DROP TABLE games_fts")
+    catalog.close()
+    assert [g["game_id"] for g in make_catalog(tmp_path).list(query="snake")[0]] == ["abc"]
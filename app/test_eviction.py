@@ -0,0 +1,99 @@
+import asyncio
+import os
+import time
+
+from app.catalog import GameCatalog
+from app.eviction import ArtifactCollector
+from app.executor import Executors
+from app.store import ArtifactStore, ShardedLayout, iter_files
+
+
+def setup(tmp_path, clock, **kwargs):
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    catalog = GameCatalog(str(tmp_path / "catalog.db"), clock=clock)
+    executors = Executors(io_workers=2, cpu_kind="thread")
+    kwargs.setdefault("orphan_grace", 0)
+    collector = ArtifactCollector(store, catalog, executors, batch_size=2, pause=0, clock=clock, **kwargs)
+    return store, catalog, collector, clock
+
+
+def add_game(store, catalog, game_id, clock, code="AI2D.run('snake', {});"):
+    store.put_logic(game_id, {"name": game_id})
+    store.put_bundle(game_id, code)
+    catalog.add(game_id, game_id, logic_bytes=sum(store.artifact_sizes(game_id)))
+    clock.now += 10
+
+
+def test_max_age_and_idle(tmp_path, clock):
+    store, catalog, collector, clock = setup(tmp_path, clock, max_age=25, max_idle=15)
+    for game_id in ("a", "b", "c", "d"):
+        add_game(store, catalog, game_id, clock)
+    catalog.touch("b")
+    catalog.flush()
+    clock.now += 1
+    # Created at 1000..1030, now 1041: a, b are older than 25 s; c is idle for 21 s
+    report = asyncio.run(collector.collect())
+    assert report["removed"]["max_age"] == 2 and report["removed"]["max_idle"] == 1
+    assert [g["game_id"] for g in catalog.list()[0]] == ["d"]
+    assert not store.has_logic("a") and not store.has_bundle("c") and store.has_game("d")
+    assert report["bytes_reclaimed"] > 0 and collector.stats()["runs"] == 1
+
+
+def test_max_bytes_evicts_least_recently_played(tmp_path, clock):
+    store, catalog, collector, clock = setup(tmp_path, clock)
+    for game_id in ("a", "b", "c"):
+        add_game(store, catalog, game_id, clock)
+    size = sum(store.artifact_sizes("a"))
+    catalog.touch("a")
+    collector.max_bytes = size * 2
+    report = asyncio.run(collector.collect())
+    assert report["removed"]["max_bytes"] == 1 and report["bytes_reclaimed"] == size
+    assert catalog.get("b") is None and store.has_game("a") and store.has_game("c")
+
+
+def test_orphans_and_dangling_rows(tmp_path, clock):
+    store, catalog, collector, clock = setup(tmp_path, clock, orphan_grace=60)
+    store.put_logic("logic-only", {"name": "x"})
+    store.put_bundle("bundle-only", "var x;", {"gzip": b"gz"})
+    open(os.path.join(os.path.dirname(store.js_path("bundle-only")), ".tmp-abc.tmp"), "w").close()
+    add_game(store, catalog, "deleted", clock)
+    os.unlink(store.js_path("deleted"))
+    store.put_logic("uncatalogued", {"name": "Snake"})
+    store.put_bundle("uncatalogued", "var y;")
+
+    # Fresh files are within the grace period
+    clock.now = os.path.getmtime(store.json_path("logic-only")) + 30
+    assert asyncio.run(collector.collect())["removed"]["orphans"] == 1  # the dangling catalog row
+    assert store.has_logic("logic-only")
+
+    clock.now += 60
+    report = asyncio.run(collector.collect())
+    assert report["removed"]["orphans"] == 2
+    assert [entry.path for entry in iter_files(store.games_dir)] == [store.js_path("uncatalogued")]
+    assert [entry.path for entry in iter_files(store.logic_dir)] == [store.json_path("uncatalogued")]
+    assert catalog.get("uncatalogued")["name"] == "Snake"
+
+
+def test_sweep_keeps_games_moved_by_a_running_migration(tmp_path, clock, monkeypatch):
+    flat = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"), layout=ShardedLayout(0))
+    flat.put_logic("abc", {"name": "abc"})
+    flat.put_bundle("abc", "var x;")
+    store, catalog, collector, clock = setup(tmp_path, clock)
+    assert store.legacy_fallback
+    catalog.add("abc", "abc")
+    clock.now = time.time() + 60
+
+    legacy, moved, exists = os.path.join(store.games_dir, "abc.js"), [], os.path.exists
+
+    def migrating_exists(path):
+        if path == legacy and not moved:
+            # The migration renames the bundle just after its sharded path was checked
+            os.makedirs(os.path.dirname(store.js_path("abc")), exist_ok=True)
+            os.replace(legacy, store.js_path("abc"))
+            moved.append(path)
+        return exists(path)
+
+    monkeypatch.setattr(os.path, "exists", migrating_exists)
+    report = asyncio.run(collector.collect())
+    assert moved and report["removed"]["orphans"] == 0
+    assert store.has_game("abc") and catalog.get("abc") is not None
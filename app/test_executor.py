@@ -0,0 +1,77 @@
+import asyncio
+import operator
+import threading
+
+import pytest
+
+from app.executor import Executors
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def test_results_and_exceptions_come_back():
+    executors = Executors(io_workers=2, cpu_workers=2, cpu_kind="thread")
+
+    async def run():
+        assert await executors.run_io(operator.add, 1, 2) == 3
+        assert await executors.run_cpu(sorted, [3, 1, 2], reverse=True) == [3, 2, 1]
+        with pytest.raises(ValueError, match="boom"):
+            await executors.run_io(fail, "boom")
+        with pytest.raises(ValueError, match="bang"):
+            await executors.run_cpu(fail, "bang")
+
+    asyncio.run(run())
+    executors.shutdown()
+
+
+def test_cpu_process_pool_runs_calls():
+    executors = Executors(cpu_workers=1, cpu_kind="process")
+    try:
+        assert asyncio.run(executors.run_cpu(operator.mul, 6, 7)) == 42
+    finally:
+        executors.shutdown()
+
+
+def test_concurrency_is_bounded():
+    executors = Executors(cpu_workers=8, cpu_kind="thread", max_concurrency=2)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.05)
+        with lock:
+            running[0] -= 1
+
+    async def run():
+        await asyncio.gather(*(executors.run_cpu(work) for _ in range(6)))
+        assert executors.stats()["cpu_slots_free"] == 2
+
+    asyncio.run(run())
+    executors.shutdown()
+    assert peak[0] == 2
+
+
+def test_shutdown_in_thread_mode():
+    executors = Executors(cpu_kind="thread")
+
+    async def run():
+        await executors.run_io(len, "ab")
+        await executors.run_cpu(len, "ab")
+        await executors.run_inference(len, "ab")
+
+    asyncio.run(run())
+    io, cpu = executors.io, executors.cpu
+    executors.shutdown()
+    assert executors._io is None and executors._cpu is None and executors._model is None
+    with pytest.raises(RuntimeError):
+        io.submit(len, "ab")
+    with pytest.raises(RuntimeError):
+        cpu.submit(len, "ab")
+    # Pools are recreated on next use
+    assert asyncio.run(executors.run_io(len, "abc")) == 3
+    executors.shutdown()
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from app.hot_set import LogicHotSet
+from app.store import ArtifactStore
+
+LOGIC = {"name": "Snake", "controls": {"keys": ["W", "S", "A", "D"]}}
+
+
+def make_store(tmp_path, **kwargs):
+    hot_set = LogicHotSet(**kwargs)
+    return ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"), hot_set=hot_set), hot_set
+
+
+def test_hits_are_served_from_memory(tmp_path):
+    store, hot_set = make_store(tmp_path, check_seconds=60)
+    store.put_logic("abc", LOGIC)
+    assert store.load_logic("abc") == LOGIC
+    assert store.load_logic_bytes("abc") == json.dumps(LOGIC, separators=(",", ":")).encode()
+    # Served without touching the file again
+    os.unlink(store.json_path("abc"))
+    assert store.load_logic("abc") == LOGIC
+    stats = hot_set.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (2, 1, 0.6667)
+    assert stats["entries"] == 1 and stats["bytes"] > 0
+
+
+def test_entries_are_revalidated_by_mtime(tmp_path, clock):
+    store, hot_set = make_store(tmp_path, check_seconds=1.0, clock=clock)
+    store.put_logic("abc", LOGIC)
+    store.load_logic("abc")
+    with open(store.json_path("abc"), "w") as f:
+        json.dump({"name": "Pong"}, f)
+    assert store.load_logic("abc") == LOGIC
+
+    clock.now += 2
+    assert store.load_logic("abc") == {"name": "Pong"}
+    assert hot_set.stats()["stale"] == 1
+    os.unlink(store.json_path("abc"))
+    clock.now += 2
+    assert store.load_logic("abc") is None
+    assert len(hot_set) == 0
+
+
+def test_store_writes_invalidate(tmp_path):
+    store, hot_set = make_store(tmp_path, check_seconds=60)
+    assert store.load_logic("abc") is None
+    store.put_logic("abc", LOGIC)
+    assert store.load_logic("abc") == LOGIC
+    assert hot_set.stats()["misses"] == 2
+
+
+def test_bounded_by_entries_and_bytes(tmp_path):
+    store, hot_set = make_store(tmp_path, max_entries=2)
+    for game_id in ("a", "b", "c"):
+        store.put_logic(game_id, LOGIC)
+        store.load_logic(game_id)
+    assert len(hot_set) == 2 and hot_set.stats()["evictions"] == 1
+
+    small = LogicHotSet(max_bytes=1)
+    assert small.load("a", store.json_path("a")).logic == LOGIC
+    assert len(small) == 0 and small.bytes == 0
+
+
+def test_corrupt_logic_is_not_cached(tmp_path):
+    store, hot_set = make_store(tmp_path)
+    os.makedirs(os.path.dirname(store.json_path("bad")))
+    with open(store.json_path("bad"), "w") as f:
+        f.write("{not json")
+    with pytest.raises(json.JSONDecodeError):
+        store.load_logic("bad")
+    assert len(hot_set) == 0
@@ -0,0 +1,44 @@
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.http_cache import etag_matches, not_modified, strong_etag
+
+
+def test_strong_etag():
+    assert strong_etag("abc123") == '"abc123"'
+    combined = strong_etag("abc123", "/static/runtime/r.js")
+    assert combined.startswith('"') and len(combined) == 34
+    assert combined == strong_etag("abc123", "/static/runtime/r.js")
+    assert combined != strong_etag("abc123", "/static/runtime/s.js")
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"abc"', None)
+
+
+def test_not_modified_response():
+    app = FastAPI()
+
+    @app.get("/item")
+    async def item(request: Request):
+        headers = {"ETag": strong_etag("abc"), "Cache-Control": "public, max-age=60"}
+        response = not_modified(request, headers["ETag"], headers)
+        if response is not None:
+            return response
+        return JSONResponse({"ok": True}, headers=headers)
+
+    client = TestClient(app)
+    first = client.get("/item")
+    assert first.status_code == 200 and first.headers["etag"] == '"abc"'
+    second = client.get("/item", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == '"abc"'
+    assert second.headers["cache-control"] == "public, max-age=60"
@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import pytest
+
+from app.jobs import FAILED, QUEUED, SUCCEEDED, TIMED_OUT, JobQueue, QueueFullError, format_sse
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def finish(*jobs):
+    """Wait until every job has finished"""
+    for job in jobs:
+        async for _ in job.stream():
+            pass
+
+
+def test_higher_priorities_run_first():
+    order = []
+    gate = asyncio.Event()
+
+    async def runner(prompt, progress):
+        if prompt == "gate":
+            await gate.wait()
+        order.append(prompt)
+        return {"prompt": prompt}
+
+    async def scenario():
+        # One worker, held on the first job while the others queue up
+        queue = JobQueue(runner, workers=1)
+        await queue.start()
+        first, _ = queue.submit("gate")
+        while first.status == QUEUED:
+            await asyncio.sleep(0)
+        jobs = [queue.submit(prompt, priority)[0] for prompt, priority in
+                (("low", 0), ("high", 5), ("mid", 1), ("also low", 0))]
+        gate.set()
+        await finish(first, *jobs)
+        await queue.stop()
+        return jobs
+
+    jobs = run(scenario())
+    assert order == ["gate", "high", "mid", "low", "also low"]
+    assert all(job.status == SUCCEEDED for job in jobs)
+    assert jobs[1].result == {"prompt": "high"}
+
+
+def test_same_normalized_prompt_shares_one_job():
+    calls = []
+
+    async def runner(prompt, progress):
+        calls.append(prompt)
+        progress("logic_generated")
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    async def scenario():
+        queue = JobQueue(runner, workers=2)
+        await queue.start()
+        job, deduplicated = queue.submit("A  Snake game")
+        same, shared = queue.submit("a snake GAME")
+        assert not deduplicated and shared and same is job
+        await finish(job)
+        # Finished jobs no longer absorb new submissions
+        again, shared = queue.submit("a snake game")
+        assert not shared and again is not job
+        await finish(again)
+        await queue.stop()
+        return queue, job
+
+    queue, job = run(scenario())
+    assert len(calls) == 2 and queue.stats()["deduplicated"] == 1
+    assert job.to_dict()["stages"] == ["logic_generated"]
+
+
+def test_full_queue_rejects_submissions():
+    async def runner(prompt, progress):
+        return {}
+
+    async def scenario():
+        # No workers: nothing is taken off the queue
+        queue = JobQueue(runner, workers=0, max_depth=2)
+        await queue.start()
+        queue.submit("a")
+        queue.submit("b")
+        with pytest.raises(QueueFullError):
+            queue.submit("c")
+        assert queue.stats()["rejected"] == 1 and queue.stats()["queue_depth"] == 2
+        assert queue.submit("a")[1]
+        await queue.stop()
+
+    run(scenario())
+
+
+def test_timeouts_and_errors_finish_the_job():
+    async def runner(prompt, progress):
+        if prompt == "slow":
+            await asyncio.sleep(1)
+        raise RuntimeError("no template")
+
+    async def scenario():
+        queue = JobQueue(runner, workers=2, timeout=0.05)
+        await queue.start()
+        slow, _ = queue.submit("slow")
+        broken, _ = queue.submit("broken")
+        await finish(slow, broken)
+        await queue.stop()
+        return slow, broken
+
+    slow, broken = run(scenario())
+    assert slow.status == TIMED_OUT and "exceeded" in slow.error
+    assert broken.status == FAILED and broken.error == "no template"
+    assert slow.events[-1] == ("status", {"error": slow.error, "status": TIMED_OUT})
+
+
+def test_retention_forgets_oldest_finished_jobs():
+    async def runner(prompt, progress):
+        return {}
+
+    async def scenario():
+        queue = JobQueue(runner, workers=1, retention=2)
+        await queue.start()
+        jobs = []
+        for prompt in ("a", "b", "c"):
+            job, _ = queue.submit(prompt)
+            await finish(job)
+            jobs.append(job)
+        pending, _ = queue.submit("d")
+        await finish(pending)
+        await queue.stop()
+        return queue, jobs
+
+    queue, jobs = run(scenario())
+    assert queue.get(jobs[0].id) is None and queue.get(jobs[1].id) is None
+    assert queue.get(jobs[2].id) is jobs[2]
+
+
+def test_format_sse():
+    assert format_sse("status", {"status": QUEUED}) == 'event: status\ndata: {"status": "queued"}\n\n'
+    body = format_sse("done", {"text": "line\nbreak"})
+    assert body.count("\n") == 3 and json.loads(body.split("data: ")[1]) == {"text": "line\nbreak"}
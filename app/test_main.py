@@ -0,0 +1,198 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.cache import GenerationCache
+from app.catalog import GameCatalog
+from app.executor import Executors
+from app.jobs import JobQueue
+from app.models import phi2_model
+from app.models.phi2_model import GAME_TEMPLATES
+from app.pipeline import STAGES, GenerationPipeline
+from app.store import ArtifactStore
+
+
+class FakeStreamer(list):
+    error = None
+    cancelled = False
+
+    @property
+    def text(self):
+        return "".join(self)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeEngine:
+    def __init__(self, text):
+        self.text = text
+        self.streamers = []
+
+    def stream_logic(self, prompt):
+        # Streamed a few characters at a time
+        streamer = FakeStreamer(self.text[i:i + 8] for i in range(0, len(self.text), 8))
+        self.streamers.append(streamer)
+        return streamer
+
+
+@pytest.fixture
+def main(tmp_path, monkeypatch):
+    # Importing app.main opens the configured catalog; keep it out of the working directory
+    monkeypatch.setattr(config, "CATALOG_PATH", "")
+    from app import main
+
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"), str(tmp_path / "runtime"))
+    catalog = GameCatalog(str(tmp_path / "catalog.db"))
+    executors = Executors(io_workers=4, cpu_kind="thread")
+    pipeline = GenerationPipeline(store, GenerationCache(), executors, catalog)
+    for name, value in {
+        "store": store,
+        "catalog": catalog,
+        "executors": executors,
+        "pipeline": pipeline,
+        "collector": None,
+        "job_queue": JobQueue(pipeline.generate, workers=1),
+    }.items():
+        monkeypatch.setattr(main, name, value)
+    return main
+
+
+@pytest.fixture
+def client(main):
+    with TestClient(main.app) as client:
+        yield client
+
+
+def sse_events(body):
+    """(event, data) pairs of a Server-Sent Events body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_in_template_mode_sends_the_whole_logic(client):
+    events = sse_events(client.post("/generate/stream", data={"prompt": "a snake game"}).text)
+    assert [event for event, _ in events] == ["token", "done"]
+    assert json.loads(events[0][1]["text"]) == events[1][1]["game_logic"] == GAME_TEMPLATES["snake"]
+
+
+def test_stream_sends_model_tokens_then_the_stored_game(client, main, monkeypatch):
+    engine = FakeEngine(json.dumps(GAME_TEMPLATES["pong"]))
+    monkeypatch.setattr(config, "MODEL_ENABLED", True)
+    monkeypatch.setattr(phi2_model, "_engine", engine)
+    events = sse_events(client.post("/generate/stream", data={"prompt": "a tennis game"}).text)
+    names = [event for event, _ in events]
+    assert names == ["token"] * len(engine.streamers[0]) + ["done"]
+    assert "".join(data["text"] for event, data in events if event == "token") == engine.text
+    done = events[-1][1]
+    assert done["game_logic"] == GAME_TEMPLATES["pong"]
+    assert main.store.has_game(done["game_id"])
+    assert engine.streamers[0].cancelled
+
+
+def test_stream_falls_back_and_shortcuts_like_generate(client, monkeypatch):
+    engine = FakeEngine("not valid json")
+    monkeypatch.setattr(config, "MODEL_ENABLED", True)
+    monkeypatch.setattr(phi2_model, "_engine", engine)
+    events = sse_events(client.post("/generate/stream", data={"prompt": "a tennis game"}).text)
+    assert [event for event, _ in events] == ["token", "token", "fallback", "done"]
+    assert events[2][1]["reason"] == "Model output was not valid game logic"
+
+    # Clear template matches skip the model, as they do on /generate
+    monkeypatch.setattr(config, "TEMPLATE_MIN_CONFIDENCE", 0.1)
+    events = sse_events(client.post("/generate/stream", data={"prompt": "a breakout game"}).text)
+    assert [event for event, _ in events] == ["token", "done"]
+    assert events[1][1]["game_logic"] == GAME_TEMPLATES["breakout"]
+    assert len(engine.streamers) == 1
+
+
+def test_closing_the_stream_cancels_the_model(main, monkeypatch):
+    engine = FakeEngine(json.dumps(GAME_TEMPLATES["pong"]))
+    monkeypatch.setattr(config, "MODEL_ENABLED", True)
+    monkeypatch.setattr(phi2_model, "_engine", engine)
+
+    async def scenario():
+        events = main.pipeline.stream("a tennis game")
+        assert (await events.__anext__())[0] == "token"
+        await events.aclose()
+
+    asyncio.run(scenario())
+    main.executors.shutdown()
+    assert engine.streamers[0].cancelled
+
+
+def generate(client, prompt="a snake game"):
+    response = client.post("/generate", data={"prompt": prompt})
+    assert response.status_code == 200
+    return response.json()["game_id"]
+
+
+def test_play_pages_and_bundles_answer_revalidations(client):
+    game_id = generate(client)
+    page = client.get(f"/play/{game_id}")
+    assert page.status_code == 200 and page.headers["etag"]
+    revalidated = client.get(f"/play/{game_id}", headers={"If-None-Match": page.headers["etag"]})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["cache-control"] == page.headers["cache-control"]
+    assert client.get("/play/0000000000000000").status_code == 404
+
+    bundle = client.get(f"/bundles/{game_id}.js", headers={"Accept-Encoding": "identity"})
+    assert bundle.status_code == 200 and bundle.text.startswith("AI2D.run(")
+    assert bundle.headers["etag"] == f'"{game_id}.js"' and "immutable" in bundle.headers["cache-control"]
+    revalidated = client.get(f"/bundles/{game_id}.js",
+                             headers={"Accept-Encoding": "identity", "If-None-Match": bundle.headers["etag"]})
+    assert revalidated.status_code == 304 and revalidated.headers["vary"] == "Accept-Encoding"
+    assert client.get("/bundles/0000000000000000.js").status_code == 404
+
+
+def test_game_logic_revalidation_and_missing_games(client, main, monkeypatch):
+    game_id = generate(client)
+    logic = client.get(f"/game-logic/{game_id}")
+    assert logic.status_code == 200 and logic.json() == GAME_TEMPLATES["snake"]
+    assert logic.headers["etag"] == f'"{game_id}"'
+    unknown = "0000000000000000"
+    for catalog in (main.catalog, None):
+        monkeypatch.setattr(main, "catalog", catalog)
+        revalidated = client.get(f"/game-logic/{game_id}", headers={"If-None-Match": logic.headers["etag"]})
+        assert revalidated.status_code == 304
+        # A matching ETag does not make an unknown game exist
+        assert client.get(f"/game-logic/{unknown}", headers={"If-None-Match": f'"{unknown}"'}).status_code == 404
+        assert client.get(f"/game-logic/{unknown}").status_code == 404
+
+
+def test_jobs_report_status_and_stream_stages(client):
+    created = client.post("/jobs", data={"prompt": "a pong game"})
+    assert created.status_code == 202
+    job_id = created.json()["job_id"]
+    assert created.json()["events_url"] == f"/jobs/{job_id}/events"
+
+    events = sse_events(client.get(f"/jobs/{job_id}/events").text)
+    statuses = [data["status"] for event, data in events if event == "status"]
+    assert statuses == ["queued", "running", "succeeded"]
+    assert [data["stage"] for event, data in events if event == "stage"] == list(STAGES)
+
+    job = client.get(f"/jobs/{job_id}").json()
+    assert job["status"] == "succeeded" and job["stages"] == list(STAGES)
+    # The job produced the same game /generate does
+    assert job["result"]["game_id"] == generate(client, "a pong game")
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.get("/jobs/missing/events").status_code == 404
+
+
+def test_batch_streams_results_and_a_summary_line(client):
+    prompts = ["a snake game", "A snake game", "a breakout game"]
+    response = client.post("/generate/batch", json={"prompts": prompts})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["prompt"] for line in lines[:-1]] == prompts
+    summary = lines[-1]
+    assert summary["done"] and (summary["created"], summary["deduplicated"], summary["errors"]) == (2, 1, 0)
+    # Only newly created games count towards games_per_second
+    assert summary["games_per_second"] < summary["prompts_per_second"]
+    assert client.post("/generate/batch", json={"prompts": []}).status_code == 400
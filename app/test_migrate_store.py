@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from app.hot_set import LogicHotSet
+from app.migrate_store import migrate
+from app.store import ArtifactStore, ShardedLayout, iter_files
+
+LOGIC = {"name": "Snake"}
+
+
+def flat_store(tmp_path):
+    """A store written with the flat layout, as before sharding"""
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"), layout=ShardedLayout(0))
+    for game_id in ("abc", "def"):
+        store.put_logic(game_id, LOGIC)
+        store.put_bundle(game_id, "var x;", {"gzip": b"gz"})
+    return store
+
+
+def test_sharded_layout():
+    layout = ShardedLayout(2, 2)
+    shards = layout.shards("abc")
+    assert len(shards) == 2 and all(len(shard) == 2 for shard in shards)
+    assert layout.path("games", "abc", ".js") == os.path.join("games", *shards, "abc.js")
+    assert layout.url_path("abc", ".js") == f"{shards[0]}/{shards[1]}/abc.js"
+    assert ShardedLayout(0).path("games", "abc", ".js") == os.path.join("games", "abc.js")
+    with pytest.raises(ValueError):
+        ShardedLayout(20, 4)
+
+
+def test_sharded_store_writes_and_urls(tmp_path):
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    assert not store.legacy_fallback
+    store.put_logic("abc", LOGIC)
+    store.put_bundle("abc", "var x;")
+    assert store.has_game("abc") and store.load_logic("abc") == LOGIC
+    shard = "/".join(store.layout.shards("abc"))
+    assert store.bundle_url("abc") == f"/static/games/{shard}/abc.js"
+    assert store.json_url("abc") == f"/static/game_logic/{shard}/abc.json"
+    assert sorted(store.logic_ids()) == ["abc"]
+
+
+def test_flat_files_are_found_until_migrated(tmp_path):
+    flat_store(tmp_path)
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"), hot_set=LogicHotSet())
+    assert store.legacy_fallback
+    assert store.has_game("abc") and store.load_logic("abc") == LOGIC
+    assert store.bundle_url("abc") == "/static/games/abc.js"
+    # An identical game generated now is not written twice
+    assert store.put_bundle("abc", "var x;") == os.path.join(store.games_dir, "abc.js")
+
+    stats = migrate(store, batch_size=1, pause=0)
+    assert stats["moved"] == 6 and stats["duplicate"] == 0
+    files = sorted(entry.path for entry in iter_files(store.games_dir))
+    assert files == sorted(store.bundle_paths("abc")[:2] + store.bundle_paths("def")[:2])
+    assert store.has_game("def") and store.load_logic("def") == LOGIC
+    assert store.bundle_url("abc") == "/static/games/" + store.layout.url_path("abc", ".js")
+    assert not ArtifactStore(store.logic_dir, store.games_dir).legacy_fallback
+
+
+def test_migrate_drops_flat_duplicates(tmp_path):
+    flat_store(tmp_path)
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    os.makedirs(os.path.dirname(store.json_path("abc")))
+    os.link(os.path.join(store.logic_dir, "abc.json"), store.json_path("abc"))
+    assert migrate(store, dry_run=True, pause=0)["files"] == 6
+    stats = migrate(store, pause=0)
+    assert (stats["moved"], stats["duplicate"]) == (5, 1)
+    assert sorted(store.logic_ids()) == ["abc", "def"]
@@ -0,0 +1,52 @@
+import pytest
+
+from app.minify import minify_js
+from app.templates import game_generator
+
+
+def test_comments_and_whitespace_are_removed():
+    source = """
+    // line comment
+    function add(a, b) {
+        /* block
+           comment */
+        return a + b;   // trailing
+    }
+    """
+    assert minify_js(source) == "function add(a,b){return a+b;}"
+
+
+def test_literals_are_copied_verbatim():
+    source = "const s = 'a  // b', t = \"/* c */\";\nconst r = /x\\/[/]  y/g;\nconst u = `p  ${ q + `r  ${ s }` }  // t`;"
+    assert minify_js(source) == (
+        "const s='a  // b',t=\"/* c */\";const r=/x\\/[/]  y/g;const u=`p  ${q+`r  ${s}`}  // t`;"
+    )
+
+
+def test_division_is_not_a_regex():
+    assert minify_js("const half = (a + b) / 2 / c;") == "const half=(a+b)/2/c;"
+
+
+def test_tokens_that_would_merge_stay_apart():
+    assert minify_js("let d = a - -b, e = a + +b;") == "let d=a- -b,e=a+ +b;"
+    assert minify_js("const x = typeof y in z;") == "const x=typeof y in z;"
+    assert minify_js("1 .toString()") == "1 .toString()"
+
+
+def test_newlines_that_may_end_statements_are_kept():
+    assert minify_js("let a = b\n++c\nfoo()\n(bar)") == "let a=b\n++c\nfoo()\n(bar)"
+    assert minify_js("return x\n  - 1") == "return x\n-1"
+    assert minify_js("f(a,\n  b)\n{\n}") == "f(a,b)\n{}"
+
+
+def test_unterminated_literals_raise():
+    with pytest.raises(ValueError):
+        minify_js("const s = 'abc")
+    with pytest.raises(ValueError):
+        minify_js("/* open")
+
+
+def test_game_runtime_shrinks():
+    minified = minify_js(game_generator.RUNTIME_CODE)
+    assert len(minified) < len(game_generator.RUNTIME_CODE) * 0.7
+    assert "// " not in minified
@@ -0,0 +1,99 @@
+import json
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.catalog import GameCatalog
+from app.packed_store import PackedArtifactStore, SegmentStore, SliceResponse
+
+LOGIC = {"name": "Snake", "speed": 3}
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("segment-"))
+
+
+def test_put_get_returns_views(tmp_path):
+    segments = SegmentStore(str(tmp_path), fsync=False)
+    assert segments.put("a", b"alpha")
+    assert not segments.put("a", b"other")
+    assert segments.put_many([("b", b"beta"), ("c", b"gamma")]) == 2
+    body = segments.get("a")
+    assert isinstance(body, memoryview) and bytes(body) == b"alpha"
+    assert segments.get("missing") is None
+    assert "b" in segments and segments.size("c") == 5
+    assert sorted(segments.keys()) == ["a", "b", "c"]
+
+
+def test_reopen_rebuilds_index_and_drops_torn_tail(tmp_path):
+    segments = SegmentStore(str(tmp_path), fsync=False)
+    segments.put_many([("a", b"alpha"), ("b", b"beta")])
+    segments.delete_many(["a"])
+    segments.close()
+    path = os.path.join(str(tmp_path), segment_files(str(tmp_path))[0])
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"AP\x01garbage")
+
+    segments = SegmentStore(str(tmp_path), fsync=False)
+    assert segments.keys() == ["b"] and bytes(segments.get("b")) == b"beta"
+    assert os.path.getsize(path) == size
+    segments.put("c", b"gamma")
+    assert bytes(segments.get("c")) == b"gamma"
+
+
+def test_segments_rotate_and_compact(tmp_path):
+    directory = str(tmp_path)
+    segments = SegmentStore(directory, max_segment_bytes=200, fsync=False)
+    for i in range(10):
+        segments.put(f"key{i}", bytes(40))
+    assert len(segment_files(directory)) > 1
+    before = segments.stats()["bytes"]
+    assert segments.compact_one() is None
+
+    segments.delete_many([f"key{i}" for i in range(8)])
+    while segments.compact_one() is not None:
+        pass
+    stats = segments.stats()
+    assert stats["bytes"] < before and stats["compactions"] >= 1
+    assert sorted(segments.keys()) == ["key8", "key9"]
+    segments.close()
+
+    # Deleted keys stay deleted after compaction and a reopen
+    segments = SegmentStore(directory, max_segment_bytes=200, fsync=False)
+    assert sorted(segments.keys()) == ["key8", "key9"]
+    assert bytes(segments.get("key9")) == bytes(40)
+
+
+def test_packed_artifact_store(tmp_path):
+    store = PackedArtifactStore(SegmentStore(str(tmp_path / "segments"), fsync=False), str(tmp_path / "runtime"))
+    store.put_logic("abc", LOGIC)
+    store.put_bundle("abc", "var x;", {"gzip": b"gz"})
+    assert store.has_game("abc") and not store.has_game("def")
+    assert store.load_logic("abc") == LOGIC
+    assert json.loads(bytes(store.load_logic_bytes("abc"))) == LOGIC
+    assert bytes(store.load_bundle("abc", "gzip")) == b"gz" and store.load_bundle("abc", "br") is None
+    assert store.bundle_url("abc") == "/bundles/abc.js"
+    assert list(store.logic_ids()) == ["abc"]
+
+    catalog = GameCatalog(str(tmp_path / "catalog.db"))
+    assert catalog.import_store(store) == 1
+    assert catalog.get("abc")["bundle_bytes"] == len("var x;") + 2
+
+    assert store.delete_game("abc") > 0
+    assert not store.has_game("abc") and store.load_logic("abc") is None
+
+
+def test_slice_response_sends_views(tmp_path):
+    segments = SegmentStore(str(tmp_path), fsync=False)
+    segments.put("a", b"console.log(1);")
+    app = FastAPI()
+
+    @app.get("/a")
+    def get_a():
+        return SliceResponse(content=segments.get("a"), media_type="text/javascript")
+
+    response = TestClient(app).get("/a")
+    assert response.content == b"console.log(1);"
+    assert response.headers["content-length"] == "15"
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def work(value):
+        runs.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", work, 21) for _ in range(3)), flight.do("other", work, 1))
+
+    results = asyncio.run(scenario())
+    assert results == [(42, False), (42, True), (42, True), (2, False)]
+    assert runs == [21, 1]
+    assert flight.stats() == {"in_flight": 0, "calls": 4, "executions": 2, "coalesced": 2}
+
+
+def test_exceptions_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("no logic")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert all(isinstance(error, ValueError) and str(error) == "no logic" for error in errors)
+    assert flight.stats()["executions"] == 1 and flight.stats()["in_flight"] == 0
+
+
+def test_cancelling_a_waiter_keeps_the_shared_run():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("key", work))
+        follower = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        return await follower
+
+    assert asyncio.run(scenario()) == ("done", True)
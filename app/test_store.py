@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from app.store import ArtifactStore, atomic_write, canonical_json, game_id_for, iter_files, logic_digest
+
+LOGIC = {"name": "Snake", "settings": {"speed": 3, "grid": 20}, "colors": ["#00ff00"]}
+
+
+def test_game_id_is_stable_across_key_order():
+    reordered = {"colors": ["#00ff00"], "settings": {"grid": 20, "speed": 3}, "name": "Snake"}
+    assert canonical_json(LOGIC) == canonical_json(reordered)
+    assert game_id_for(LOGIC) == game_id_for(reordered) == logic_digest(LOGIC)[:16]
+    assert game_id_for(dict(LOGIC, name="Pong")) != game_id_for(LOGIC)
+
+
+def test_artifacts_are_written_once(tmp_path):
+    store = ArtifactStore(str(tmp_path / "logic"), str(tmp_path / "games"))
+    game_id = game_id_for(LOGIC)
+    path = store.put_logic(game_id, LOGIC)
+    bundle = store.put_bundle(game_id, "var x;", {"gzip": b"gz"})
+    assert os.path.exists(bundle + ".gz")
+    mtimes = (os.stat(path).st_mtime_ns, os.stat(bundle).st_mtime_ns)
+
+    assert store.put_logic(game_id, {"name": "changed"}) == path
+    assert store.put_bundle(game_id, "var y;") == bundle
+    assert (os.stat(path).st_mtime_ns, os.stat(bundle).st_mtime_ns) == mtimes
+    assert store.load_logic(game_id) == LOGIC
+    with open(bundle) as f:
+        assert f.read() == "var x;"
+
+
+def test_atomic_write_leaves_no_temp_file_on_failure(tmp_path, monkeypatch):
+    path = str(tmp_path / "out" / "a.json")
+    atomic_write(path, "first")
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    with pytest.raises(OSError, match="disk full"):
+        atomic_write(path, "second")
+    assert [entry.name for entry in iter_files(str(tmp_path / "out"))] == ["a.json"]
+    with open(path) as f:
+        assert f.read() == "first"
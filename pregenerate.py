@@ -0,0 +1,104 @@
+"""Generate games for a file of prompts without going through the server
+
+Usage:
+    python pregenerate.py prompts.txt --workers 4 --chunk-size 500
+
+Prompts are read one per line; blank lines and lines starting with # are
+skipped. Game logic and bundles are built in a process pool. A prompt whose
+logic has the same digest as an earlier prompt, or as a stored game, is not
+built again. Each chunk's new games are written to the store and catalog in
+one bulk write. Uses the same AI2D_* settings as the server. With the packed
+store backend, run it while the server is stopped, because the server owns
+the segment directory.
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app import config
+from app.batch import build_artifacts, generate_logic, store_games
+from app.catalog import create_game_catalog
+from app.packed_store import create_artifact_store
+from app.store import GAME_ID_LENGTH
+
+
+def read_prompts(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _map_chunksize(count, workers):
+    # A few tasks per worker: fewer round trips, still balanced across workers
+    return max(1, count // (workers * 4))
+
+
+def pregenerate(prompts, store, catalog, pool, workers, chunk_size=500):
+    """Generate and store games for prompts; returns counts and rates"""
+    started = time.perf_counter()
+    stats = {"prompts": len(prompts), "created": 0, "deduplicated": 0, "errors": 0}
+    seen = set()
+    for start in range(0, len(prompts), chunk_size):
+        chunk = prompts[start:start + chunk_size]
+        games = {}
+        for result in pool.map(generate_logic, chunk, chunksize=_map_chunksize(len(chunk), workers)):
+            if "error" in result:
+                stats["errors"] += 1
+                print(f"Failed: {result['prompt']!r}: {result['error']}")
+            elif result["digest"] in seen or result["digest"] in games:
+                stats["deduplicated"] += 1
+            else:
+                games[result["digest"]] = result
+        new = []
+        for digest, game in games.items():
+            seen.add(digest)
+            if store.has_game(digest[:GAME_ID_LENGTH]):
+                stats["deduplicated"] += 1
+            else:
+                new.append(game)
+        built = pool.map(build_artifacts, [game["game_logic"] for game in new],
+                         chunksize=_map_chunksize(len(new), workers))
+        for game, (_, code, encoded, _) in zip(new, built):
+            game["code"], game["encoded"] = code, encoded
+        if new:
+            store_games(store, catalog, new)
+        stats["created"] += len(new)
+
+        done = min(start + chunk_size, len(prompts))
+        elapsed = time.perf_counter() - started
+        print(f"{done}/{len(prompts)} prompts: {stats['created']} created, "
+              f"{stats['deduplicated']} duplicates, {stats['errors']} failed ({done / elapsed:.1f} prompts/s)")
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    seconds = stats["seconds"]
+    # Only newly created games count as generated; prompts_per_second covers duplicates too
+    stats["games_per_second"] = round(stats["created"] / seconds, 1) if seconds else None
+    stats["prompts_per_second"] = round(stats["prompts"] / seconds, 1) if seconds else None
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate AI2D games for a file of prompts")
+    parser.add_argument("prompts", help="text file with one prompt per line")
+    parser.add_argument("--workers", type=int, default=config.EXECUTOR_CPU_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=500, help="prompts per bulk store write")
+    args = parser.parse_args()
+
+    prompts = read_prompts(args.prompts)
+    store = create_artifact_store()
+    catalog = create_game_catalog()
+    try:
+        with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            stats = pregenerate(prompts, store, catalog, pool, args.workers, args.chunk_size)
+    finally:
+        if catalog is not None:
+            catalog.close()
+        segments = getattr(store, "segments", None)
+        if segments is not None:
+            segments.close()
+    print(f"Done: {stats['created']} games created, {stats['deduplicated']} duplicates, "
+          f"{stats['errors']} failed in {stats['seconds']:.1f} s ({stats['games_per_second']} new games/s, "
+          f"{stats['prompts_per_second']} prompts/s)")
+
+
+if __name__ == "__main__":
+    main()